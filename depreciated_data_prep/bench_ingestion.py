@@ -0,0 +1,95 @@
+"""
+Benchmark: peak memory (RSS) and throughput of export ingestion versus export size.
+Compares the full load (json.load + json_normalize), the streaming load (export_stream.load_export_streaming) and
+streaming to JSON lines (export_stream.stream_export) on synthetic exports. Every run uses a fresh interpreter so
+peak RSS is measured per mode.
+
+Usage:
+    python bench_ingestion.py --sizes 10000 50000 100000 --chunk-size 5000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Runs in the child interpreter; prints peak RSS (MB) and seconds as JSON
+RUN = """
+import json, resource, sys, time
+import catalog_build, export_stream
+mode, path, out, chunk_size = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "load":
+    catalog_build.translate_columns(catalog_build.load_export(path))
+elif mode == "stream":
+    catalog_build.translate_columns(export_stream.load_export_streaming(path, chunk_size))
+else:
+    export_stream.stream_export(path, out, chunk_size)
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "peak_mb": peak / 1024, "import_mb": baseline / 1024}))
+"""
+
+
+def synthetic_record(i):
+    """
+    One export record shaped like the VHS export (nested price, location and appointment fields).
+    """
+    return {
+        "guid": f"guid-{i:08d}",
+        "nummer": f"BE{i:06d}",
+        "name": f"Deutsch als Fremdsprache A{i % 3 + 1} Kurs {i}",
+        "untertitel": "Intensivkurs am Vormittag",
+        "bezirk": ["Mitte", "Pankow", "Neukölln", "Spandau"][i % 4],
+        "minimale_teilnehmerzahl": "6",
+        "aktuelle_teilnehmerzahl": str(i % 15),
+        "maximale_teilnehmerzahl": "16",
+        "zielgruppe": ["Frauen", "Jugendliche", None][i % 3],
+        "schlagwort": ["Sprache", "Deutsch", "Integration"],
+        "text": "Dieser Kurs richtet sich an Teilnehmende mit Vorkenntnissen. " * 8,
+        "preis": {"betrag": str(50 + i % 200), "rabatt_moeglich": "true"},
+        "ortetermine": {
+            "adresse": {"plz": "10115", "ort": "Berlin", "strasse": "Linienstraße 162", "raum": f"R{i % 40}"},
+            "termin": {"wochentag": "Mo", "beginn_datum": "2025-04-07", "beginn_uhrzeit": "09:00"},
+        },
+    }
+
+
+def write_export(path, n):
+    """
+    Write a synthetic export of n records without building it in memory.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"veranstaltungen": {"veranstaltung": [')
+        for i in range(n):
+            f.write((",\n" if i else "\n") + json.dumps(synthetic_record(i), ensure_ascii=False))
+        f.write("\n]}}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in args.sizes:
+            export = os.path.join(tmpdir, f"courses_{n}.json")
+            write_export(export, n)
+            print(f"\n{n} courses, {os.path.getsize(export) / 1e6:.0f} MB export")
+            for mode in ("load", "stream", "stage"):
+                output = subprocess.run(
+                    [sys.executable, "-c", RUN, mode, export, os.path.join(tmpdir, "out.jsonl"),
+                     str(args.chunk_size)],
+                    check=True, capture_output=True, text=True, cwd=here).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"  {mode:<7} peak RSS {result['peak_mb']:7.0f} MB (+{result['peak_mb'] - result['import_mb']:5.0f} MB"
+                      f" over imports) | {result['seconds']:6.2f} s | {n / result['seconds']:8.0f} courses/s")
+
+
+if __name__ == "__main__":
+    main()
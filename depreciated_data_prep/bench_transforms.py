@@ -0,0 +1,64 @@
+"""
+Benchmark: the data-prep transformations (derived metrics, target group encoding, search text) before and after
+vectorization. The per-row apply/lambda versions they replace (per_row_transforms.py) are the reference; every run
+checks that both produce the same catalog for the same seed before reporting timings.
+
+Usage:
+    python bench_transforms.py --sizes 10000 100000 500000 --repeat 3
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from catalog_build import DEFAULT_SEED, translate_columns
+from per_row_transforms import LEGACY_STEPS, STEPS, run
+
+
+def synthetic_export(n, seed=0):
+    """
+    Flattened export frame (as load_export returns it) with n courses.
+    """
+    rng = np.random.default_rng(seed)
+    maximum = rng.integers(8, 25, n)
+    current = np.minimum(rng.integers(0, 25, n), maximum)
+    keywords = np.array(["['Sprache', 'Deutsch']", "['Kunst']", "Gesundheit", "['Beruf', 'EDV', 'Excel']", None],
+                        dtype=object)
+    return pd.DataFrame({
+        "guid": [f"guid-{i:08d}" for i in range(n)],
+        "nummer": [f"BE{i:06d}" for i in range(n)],
+        "name": [f"Deutsch als Fremdsprache A{i % 3 + 1} Kurs {i % 5000}" for i in range(n)],
+        "untertitel": np.where(rng.random(n) < 0.1, None, "Intensivkurs am Vormittag"),
+        "bezirk": rng.choice(["Mitte", "Pankow", "Neukölln", "Spandau"], n),
+        "minimale_teilnehmerzahl": rng.integers(3, 8, n).astype(str),
+        "aktuelle_teilnehmerzahl": current.astype(str),
+        "maximale_teilnehmerzahl": maximum.astype(str),
+        "zielgruppe": rng.choice(np.array(["Frauen", "Jugendliche", "Senioren", "Familien", None], dtype=object), n),
+        "schlagwort": keywords[rng.integers(0, len(keywords), n)],
+        "preis_betrag": (50 + current * 7).astype(str),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    names = ("derived metrics", "target groups", "search text")
+    for n in args.sizes:
+        df_translated = translate_columns(synthetic_export(n))
+        legacy = [min(t) for t in zip(*(run(LEGACY_STEPS, df_translated, args.seed)[1] for _ in range(args.repeat)))]
+        current = [min(t) for t in zip(*(run(STEPS, df_translated, args.seed)[1] for _ in range(args.repeat)))]
+        pd.testing.assert_frame_equal(run(STEPS, df_translated, args.seed)[0],
+                                      run(LEGACY_STEPS, df_translated, args.seed)[0])
+
+        print(f"\n{n} courses (identical output for seed {args.seed})")
+        for name, before, after in zip(names + ("total",), legacy + [sum(legacy)], current + [sum(current)]):
+            print(f"  {name:<16} {before * 1000:9.1f} ms -> {after * 1000:8.1f} ms  ({before / after:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
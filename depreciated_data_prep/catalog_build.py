@@ -0,0 +1,473 @@
+"""
+Steps of the data-prep pipeline that turns the VHS course export (courses.json) into the catalog the app loads
+(Processed_data_for_app.pkl), as importable functions.
+
+A full build runs every step over the whole export. An incremental build diffs the export against the previous
+catalog by guid and a per-course content hash, reruns the steps only for added or changed courses, keeps the rows
+of unchanged ones and drops removed ones. Each build is written as a new versioned artifact.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# German → English column mapping of the export
+COLUMN_TRANSLATION = {
+    'guid': 'guid',
+    'nummer': 'course_number',
+    'name': 'course_name',
+    'untertitel': 'course_subtitle',
+    'bezirk': 'district',
+    'veranstaltungsart': 'event_type',
+    'minimale_teilnehmerzahl': 'minimum_participants',
+    'aktuelle_teilnehmerzahl': 'current_participants',
+    'maximale_teilnehmerzahl': 'maximum_participants',
+    'anzahl_termine': 'number_of_sessions',
+    'beginn_datum': 'start_date',
+    'ende_datum': 'end_date',
+    'zielgruppe': 'target_group',
+    'schlagwort': 'keywords',
+    'text': 'description',
+    'dvv_kategorie_#text': 'category_label',
+    'anmeldung_telefon': 'registration_phone',
+    'anmeldung_mail': 'registration_email',
+    'anmeldung_link': 'registration_link',
+    'ansprechperson_anrede': 'contact_person_salutation',
+    'ansprechperson_titel': 'contact_person_title',
+    'ansprechperson_name': 'contact_person_last_name',
+    'ansprechperson_vorname': 'contact_person_first_name',
+    'ansprechperson_telefon': 'contact_person_phone',
+    'ansprechperson_mail': 'contact_person_email',
+    'preis_betrag': 'price_amount',
+    'preis_rabatt_moeglich': 'price_discount_possible',
+    'preis_zusatz': 'price_additional',
+    'dozent_anrede': 'lecturer_salutation',
+    'dozent_titel': 'lecturer_title',
+    'dozent_name': 'lecturer_last_name',
+    'dozent_vorname': 'lecturer_first_name',
+    'ortetermine_adresse_plz': 'locations_address_postal_code',
+    'ortetermine_adresse_ort': 'locations_address_city',
+    'ortetermine_adresse_strasse': 'locations_address_street',
+    'ortetermine_adresse_raum': 'locations_address_room',
+    'ortetermine_adresse_laengengrad': 'locations_address_longitude',
+    'ortetermine_adresse_breitengrad': 'locations_address_latitude',
+    'ortetermine_adresse_behindertenzugang': 'locations_address_accessible',
+    'ortetermine_termin_wochentag': 'locations_appointments_weekday',
+    'ortetermine_termin_beginn_datum': 'locations_appointments_start_date',
+    'ortetermine_termin_beginn_uhrzeit': 'locations_appointments_start_time',
+    'ortetermine_termin_ende_uhrzeit': 'locations_appointments_end_time'
+}
+
+# Per-course hash of the raw export record, used to detect changed courses between exports
+CONTENT_HASH_COLUMN = 'content_hash'
+
+DEFAULT_SEED = 42
+
+# Versioned catalog artifacts kept by save_versioned (older ones are deleted)
+DEFAULT_KEEP_VERSIONS = 5
+
+
+def record_hash(record):
+    """
+    Stable hash of one raw export record (independent of key order).
+
+    Args:
+        record (dict): One 'veranstaltung' record.
+
+    Returns:
+        str: 16 hex digits.
+    """
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_export(path):
+    """
+    Load the course export and flatten its records (nested fields joined with '_').
+
+    Args:
+        path (str): courses.json export.
+
+    Returns:
+        pd.DataFrame: One row per course with the German export columns and CONTENT_HASH_COLUMN.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    records = data['veranstaltungen']['veranstaltung']
+    df_german = pd.json_normalize(records, sep='_')
+    df_german[CONTENT_HASH_COLUMN] = [record_hash(record) for record in records]
+    return df_german
+
+
+def translate_columns(df_german):
+    """
+    Keep the mapped export columns under their English names and fix numeric types.
+
+    Args:
+        df_german (pd.DataFrame): Output of load_export.
+
+    Returns:
+        pd.DataFrame: Course frame with English column names and course_name_german.
+    """
+    available_cols = [col for col in COLUMN_TRANSLATION if col in df_german.columns]
+    df_translated = df_german[available_cols].rename(columns={k: COLUMN_TRANSLATION[k] for k in available_cols})
+
+    # Add original German course name
+    df_translated['course_name_german'] = df_german['name']
+    if CONTENT_HASH_COLUMN in df_german.columns:
+        df_translated[CONTENT_HASH_COLUMN] = df_german[CONTENT_HASH_COLUMN]
+
+    # Ensure numeric types
+    for col in ['maximum_participants', 'minimum_participants', 'current_participants']:
+        df_translated[col] = pd.to_numeric(df_translated[col], errors='coerce')
+    return df_translated
+
+
+def add_derived_metrics(df_translated, seed=DEFAULT_SEED):
+    """
+    Add occupancy metrics, the simulated gender distribution and sponsorship flags (in place).
+
+    Args:
+        df_translated (pd.DataFrame): Output of translate_columns.
+        seed (int, optional): Seed of the simulated columns. Defaults to DEFAULT_SEED.
+    """
+    df_translated['prop_occupancy_left'] = (
+        (df_translated['maximum_participants'] - df_translated['current_participants']) /
+        df_translated['maximum_participants']
+    )
+
+    df_translated['prop_minimum_to_reach'] = (
+        (df_translated['minimum_participants'] - df_translated['current_participants']) /
+        df_translated['minimum_participants']
+    ).clip(lower=0)
+
+    # Simulate gender distribution: one draw in [0, participants] per course with participants, in row order.
+    # A single array call of the legacy generator consumes the stream exactly like one call per row did
+    np.random.seed(seed)
+    participants = df_translated['current_participants'].to_numpy(dtype=np.float64)
+    has_participants = participants > 0
+    number_of_women = np.zeros(len(participants), dtype=np.int64)
+    number_of_women[has_participants] = np.random.randint(0, (participants[has_participants] + 1).astype(np.int64))
+    df_translated['number_of_women'] = number_of_women
+    df_translated['percent_women'] = np.where(df_translated['current_participants'] > 0,
+                                              df_translated['number_of_women'] / df_translated['current_participants'],
+                                              0)
+    df_translated['prop_men'] = 1 - df_translated['percent_women']
+
+    # Additional flags
+    df_translated['sponsored'] = np.random.choice([1, 0], size=len(df_translated), p=[0.25, 0.75])
+    df_translated['gap_to_80_percent_women'] = 0.8 - df_translated['percent_women']
+    df_translated['gap_to_80_percent_men'] = 0.8 - df_translated['prop_men']
+
+
+def encode_target_groups(df_translated):
+    """
+    Add one binary target_group_<group> column per target group found (in place).
+    """
+    if 'target_group' in df_translated.columns:
+        df_translated['target_group_raw'] = df_translated['target_group']
+        # One pass: category code of every row, compared with all groups at once (in order of first appearance)
+        groups = df_translated['target_group_raw'].dropna().unique()
+        codes = pd.Categorical(df_translated['target_group_raw'], categories=groups).codes
+        if len(groups):
+            one_hot = (codes[:, None] == np.arange(len(groups))[None, :]).astype(np.int64)
+            df_translated[[f"target_group_{group}" for group in groups]] = one_hot
+
+
+def safe_parse(x):
+    try:
+        return ast.literal_eval(x) if isinstance(x, str) else x
+    except:
+        return x
+
+
+def flatten_keywords(x):
+    x = safe_parse(x)
+    if isinstance(x, list):
+        return ', '.join(map(str, x))
+    return str(x)
+
+
+_FIRST_WORD = re.compile(r'[^\W\d]\w*')
+
+
+def _is_plain_text(x):
+    """
+    Whether ast.literal_eval is bound to fail on x (it starts with a word that cannot begin a literal).
+    """
+    match = _FIRST_WORD.match(x)
+    return (match is not None and match.group() not in ('True', 'False', 'None')
+            and not x.startswith(('"', "'"), match.end()))
+
+
+def flatten_keywords_column(values):
+    """
+    flatten_keywords over a column, parsing each distinct keyword string once.
+
+    Strings starting with a word that is neither True/False/None nor a string prefix (r'...', b"...") cannot be a
+    literal, so they are returned as they are without parsing (what flatten_keywords returns for them too).
+
+    Args:
+        values (iterable): Raw keyword values (strings, lists or missing values).
+
+    Returns:
+        list[str]: Flattened keywords, one per value.
+    """
+    parsed = {}
+    flattened = []
+    for x in values:
+        if isinstance(x, str):
+            if x not in parsed:
+                parsed[x] = x if _is_plain_text(x) else flatten_keywords(x)
+            flattened.append(parsed[x])
+        else:
+            flattened.append(flatten_keywords(x))
+    return flattened
+
+
+def add_search_text(df_translated):
+    """
+    Add the flattened keywords and the concatenated search text (in place).
+    """
+    df_translated['keywords_clean'] = flatten_keywords_column(df_translated['keywords'])
+    df_translated['search_text'] = (
+        df_translated['course_name_german'].fillna('') + ' ' +
+        df_translated['course_subtitle'].fillna('') + ' ' +
+        df_translated['keywords_clean'].fillna('')
+    )
+
+
+def translate_course_names(df_translated, translate):
+    """
+    Add the English course names (in place).
+
+    Args:
+        df_translated (pd.DataFrame): Course frame with course_name_german.
+        translate (callable): Maps an iterable of German names to a {name: translation} dict,
+            e.g. translation_stage.translate_names.
+    """
+    translation_map = translate(df_translated['course_name_german'])
+    df_translated['course_name_translated'] = df_translated['course_name_german'].map(translation_map)
+
+
+def remove_full_courses(df_translated):
+    """
+    Drop courses without free places.
+
+    Returns:
+        pd.DataFrame: Courses with prop_occupancy_left > 0.
+    """
+    return df_translated[df_translated['prop_occupancy_left'] > 0].copy()
+
+
+def build_catalog(df_german, translate, seed=DEFAULT_SEED):
+    """
+    Run every pipeline step over an export.
+
+    Args:
+        df_german (pd.DataFrame): Output of load_export.
+        translate (callable): Course name translator, see translate_course_names.
+        seed (int, optional): Seed of the simulated columns. Defaults to DEFAULT_SEED.
+
+    Returns:
+        pd.DataFrame: The processed catalog.
+    """
+    df_translated = translate_columns(df_german)
+    add_derived_metrics(df_translated, seed=seed)
+    encode_target_groups(df_translated)
+    add_search_text(df_translated)
+    translate_course_names(df_translated, translate)
+    return remove_full_courses(df_translated)
+
+
+def export_hashes(df_german):
+    """
+    guid -> content hash of every course of an export, full courses included (they are not in the catalog).
+
+    Args:
+        df_german (pd.DataFrame): Output of load_export.
+
+    Returns:
+        dict: Content hash per guid.
+    """
+    return dict(zip(df_german['guid'].astype(str), df_german[CONTENT_HASH_COLUMN].astype(str)))
+
+
+def export_hashes_path(catalog_path):
+    """
+    Return the path of the export hashes stored next to a catalog.
+    """
+    return os.path.splitext(catalog_path)[0] + ".export_hashes.json"
+
+
+def load_export_hashes(catalog_path):
+    """
+    Read the export hashes saved with a catalog by save_versioned.
+
+    Returns:
+        dict: Content hash per guid, or None for catalogs saved without them.
+    """
+    path = export_hashes_path(catalog_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def diff_export(df_german, previous, previous_hashes=None):
+    """
+    Compare an export with the previous one by guid and content hash.
+
+    Args:
+        df_german (pd.DataFrame): Output of load_export.
+        previous (pd.DataFrame): Previous processed catalog, with guid and CONTENT_HASH_COLUMN.
+        previous_hashes (dict, optional): export_hashes of the previous export. Without them, courses that were
+            full (so not in the previous catalog) count as added. Defaults to the hashes of the previous catalog.
+
+    Returns:
+        dict: Boolean mask 'rebuild' over the export rows (added or changed courses) and the counts
+            'added', 'changed', 'unchanged' and 'removed'.
+    """
+    if previous_hashes is None:
+        previous_hashes = dict(zip(previous['guid'].astype(str), previous[CONTENT_HASH_COLUMN].astype(str)))
+    guids = df_german['guid'].astype(str)
+    known = guids.isin(previous_hashes.keys()).to_numpy(dtype=bool)
+    same = (guids.map(previous_hashes) == df_german[CONTENT_HASH_COLUMN].astype(str)).to_numpy(dtype=bool)
+    export_guids = set(guids)
+    return {
+        "rebuild": ~same,
+        "added": int((~known).sum()),
+        "changed": int((known & ~same).sum()),
+        "unchanged": int(same.sum()),
+        "removed": sum(guid not in export_guids for guid in previous_hashes),
+    }
+
+
+def incremental_build(df_german, previous, translate, seed=DEFAULT_SEED, previous_hashes=None):
+    """
+    Rebuild only the added or changed courses of an export and reuse the previous rows of the others.
+
+    Simulated columns (gender split, sponsorship) of unchanged courses keep their previous values; rebuilt courses
+    get fresh draws from the seed. Unchanged courses that were full stay out of the catalog without being rebuilt.
+    Previous catalogs without content hashes trigger a full build.
+
+    Args:
+        df_german (pd.DataFrame): Output of load_export.
+        previous (pd.DataFrame): Previous processed catalog, or None.
+        translate (callable): Course name translator, see translate_course_names.
+        seed (int, optional): Seed of the simulated columns. Defaults to DEFAULT_SEED.
+        previous_hashes (dict, optional): export_hashes of the previous export (see load_export_hashes).
+
+    Returns:
+        tuple: (processed catalog in export order, diff counts as returned by diff_export).
+    """
+    if previous is None or CONTENT_HASH_COLUMN not in previous.columns:
+        catalog = build_catalog(df_german, translate, seed=seed)
+        return catalog, {"added": len(df_german), "changed": 0, "unchanged": 0, "removed": 0}
+
+    # Step 1: Diff by guid and content hash
+    diff = diff_export(df_german, previous, previous_hashes)
+    rebuild = diff.pop("rebuild")
+
+    # Step 2: Run the pipeline on the added and changed courses only
+    rebuilt = build_catalog(df_german[rebuild].reset_index(drop=True), translate, seed=seed)
+
+    # Step 3: Keep the unchanged courses' previous rows (unchanged full courses have none); removed and changed
+    # guids are dropped
+    unchanged_guids = set(df_german.loc[~rebuild, 'guid'])
+    kept = previous[previous['guid'].isin(unchanged_guids)]
+    catalog = pd.concat([kept, rebuilt], ignore_index=True)
+
+    # Target groups new to this export have no column in the previous rows (and vice versa)
+    group_cols = [col for col in catalog.columns if col.startswith("target_group_") and col != 'target_group_raw']
+    catalog[group_cols] = catalog[group_cols].fillna(0).astype(int)
+
+    # Step 4: Export order
+    order = {guid: position for position, guid in enumerate(df_german['guid'])}
+    catalog = catalog.iloc[np.argsort(catalog['guid'].map(order).to_numpy(), kind="stable")].reset_index(drop=True)
+    return catalog, diff
+
+
+def catalog_version(df):
+    """
+    Version of a processed catalog: hash of its courses' guids and content hashes.
+
+    Returns:
+        str: 12 hex digits.
+    """
+    digest = hashlib.sha256()
+    for guid, content in zip(df['guid'].astype(str), df[CONTENT_HASH_COLUMN].astype(str)):
+        digest.update(f"{guid}:{content}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def save_versioned(df, output_path, hashes=None, keep=DEFAULT_KEEP_VERSIONS):
+    """
+    Write a catalog as a new versioned artifact next to output_path, then atomically make it the current one.
+
+    Args:
+        df (pd.DataFrame): Processed catalog.
+        output_path (str): Current catalog path read by the app (e.g. Processed_data_for_app.pkl).
+        hashes (dict, optional): export_hashes of the export the catalog was built from, saved next to both
+            catalogs for the next incremental build. Defaults to None.
+        keep (int, optional): Versioned artifacts kept (newest first, the new one included); older ones are
+            deleted. None keeps all. Defaults to DEFAULT_KEEP_VERSIONS.
+
+    Returns:
+        str: Path of the versioned artifact (<name>.<version>.pkl).
+    """
+    stem, ext = os.path.splitext(output_path)
+    versioned_path = f"{stem}.{catalog_version(df)}{ext}"
+    df.to_pickle(versioned_path)
+    if hashes is not None:
+        _write_json(export_hashes_path(versioned_path), hashes)
+
+    # The current hashes must never describe another catalog: drop them until the new catalog is in place, so an
+    # interrupted run leaves none (the next incremental build then diffs against the catalog's own hashes)
+    if os.path.exists(export_hashes_path(output_path)):
+        os.remove(export_hashes_path(output_path))
+
+    # Readers see either the old or the new catalog, never a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=ext)
+    os.close(fd)
+    shutil.copyfile(versioned_path, tmp_path)
+    os.replace(tmp_path, output_path)
+    if hashes is not None:
+        _write_json(export_hashes_path(output_path), hashes)
+
+    if keep is not None:
+        _remove_old_versions(output_path, versioned_path, keep)
+    return versioned_path
+
+
+def _write_json(path, content):
+    """
+    Write a JSON file through a temporary file.
+    """
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(content, f)
+    os.replace(path + ".tmp", path)
+
+
+def _remove_old_versions(output_path, current_path, keep):
+    """
+    Delete all but the newest `keep` versioned artifacts of output_path (never current_path), with their hashes.
+    """
+    stem, ext = os.path.splitext(output_path)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r"\.[0-9a-f]{12}" + re.escape(ext) + "$")
+    versions = [os.path.join(directory, name) for name in os.listdir(directory) if pattern.match(name)]
+    versions = [path for path in versions if not os.path.samefile(path, current_path)]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for path in versions[max(keep - 1, 0):]:
+        os.remove(path)
+        if os.path.exists(export_hashes_path(path)):
+            os.remove(export_hashes_path(path))
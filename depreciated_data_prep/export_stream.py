@@ -0,0 +1,168 @@
+"""
+Streaming ingestion of the course export: the 'veranstaltung' records are parsed one by one from a bounded read
+buffer (json.JSONDecoder.raw_decode) and flattened with the same column mapping as load_export in fixed-size chunks,
+so the raw JSON document is never held in memory. stream_export also writes the chunks out one by one: its peak
+memory depends on the chunk size, not on the export size, so multi-city exports can be staged on small build
+machines. load_export_streaming still returns the whole flattened frame.
+
+Usage (stage an export as JSON lines with the English column names):
+    python export_stream.py courses.json courses_flat.jsonl --chunk-size 5000
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+
+import pandas as pd
+
+from catalog_build import COLUMN_TRANSLATION, CONTENT_HASH_COLUMN, record_hash, translate_columns
+
+DEFAULT_CHUNK_SIZE = 5000
+READ_SIZE = 1 << 20
+
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def iter_export_records(path, array_key="veranstaltung", read_size=READ_SIZE):
+    """
+    Yield the records of the export's course array one at a time.
+
+    Args:
+        path (str): courses.json export.
+        array_key (str, optional): Key of the course array. Defaults to "veranstaltung".
+        read_size (int, optional): Characters read from the file at a time. Defaults to 1 MiB.
+
+    Yields:
+        dict: One course record.
+
+    Raises:
+        ValueError: If the array is missing or the file ends inside it.
+    """
+    decoder = json.JSONDecoder()
+    marker = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+    tail = len(array_key) + 64  # Kept between reads, in case the marker spans two of them
+
+    with open(path, encoding="utf-8") as f:
+        # Step 1: Skip to the opening bracket of the array
+        buffer = ""
+        while True:
+            match = marker.search(buffer)
+            if match:
+                buffer, pos = buffer[match.end():], 0
+                break
+            chunk = f.read(read_size)
+            if not chunk:
+                raise ValueError(f"No '{array_key}' array found in {path}.")
+            buffer = buffer[-tail:] + chunk
+
+        # Step 2: Decode one record at a time, reading more whenever the buffer ends mid-record
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos < len(buffer):
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    end = None
+                if end is not None:
+                    yield record
+                    pos = end
+                    continue
+
+            chunk = f.read(read_size)
+            if not chunk:
+                raise ValueError(f"{path} ends inside the '{array_key}' array.")
+            buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_export_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Flatten the export in chunks of records, keeping only the mapped columns.
+
+    Args:
+        path (str): courses.json export.
+        chunk_size (int, optional): Records per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Yields:
+        pd.DataFrame: Flattened German export columns (as load_export) and CONTENT_HASH_COLUMN, for one chunk.
+    """
+    records = []
+    for record in iter_export_records(path):
+        records.append(record)
+        if len(records) == chunk_size:
+            yield _flatten(records)
+            records = []
+    if records:
+        yield _flatten(records)
+
+
+def _flatten(records):
+    """
+    Flatten a list of records like load_export, keeping only the columns of COLUMN_TRANSLATION.
+    """
+    df_german = pd.json_normalize(records, sep='_')
+    columns = [col for col in COLUMN_TRANSLATION if col in df_german.columns]
+    return df_german[columns].assign(**{CONTENT_HASH_COLUMN: [record_hash(record) for record in records]})
+
+
+def load_export_streaming(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streaming counterpart of catalog_build.load_export: the same frame (restricted to the mapped columns),
+    without holding the parsed JSON document in memory. The flattened frame of every course is still built, so
+    memory grows with the export; use stream_export for bounded memory.
+
+    Args:
+        path (str): courses.json export.
+        chunk_size (int, optional): Records flattened at a time. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        pd.DataFrame: One row per course.
+    """
+    chunks = list(iter_export_chunks(path, chunk_size))
+    if not chunks:
+        return pd.DataFrame(columns=[CONTENT_HASH_COLUMN])
+    df_german = pd.concat(chunks, ignore_index=True)
+    # Chunks may have seen different fields; translate_columns only reads the mapped ones
+    return df_german[[col for col in COLUMN_TRANSLATION if col in df_german.columns] + [CONTENT_HASH_COLUMN]]
+
+
+def stream_export(path, output_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Flatten and translate the export columns chunk by chunk and append them to a JSON lines file.
+
+    Args:
+        path (str): courses.json export.
+        output_path (str): JSON lines file to write (one course per line, English column names).
+        chunk_size (int, optional): Records per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of courses written.
+    """
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for df_german in iter_export_chunks(path, chunk_size):
+            lines = translate_columns(df_german).to_json(orient="records", lines=True, force_ascii=False)
+            out.write(lines if lines.endswith("\n") else lines + "\n")
+            count += len(df_german)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stage the course export as JSON lines with bounded memory.")
+    parser.add_argument("export", help="courses.json export")
+    parser.add_argument("output", help="JSON lines file to write")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records per chunk")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = stream_export(args.export, args.output, args.chunk_size)
+    seconds = time.perf_counter() - start
+    print(f"✅ {count} courses staged to {args.output} in {seconds:.1f} s ({count / seconds:.0f} courses/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Per-row (apply/lambda) versions of the catalog_build transformations that were vectorized, kept as the reference
+the vectorized steps must reproduce exactly for a given seed (test_catalog_build.py, bench_transforms.py).
+"""
+
+import time
+
+import numpy as np
+
+from catalog_build import (DEFAULT_SEED, add_derived_metrics, add_search_text, encode_target_groups,
+                           flatten_keywords)
+
+
+def legacy_add_derived_metrics(df_translated, seed=DEFAULT_SEED):
+    """
+    add_derived_metrics as it was: one np.random.randint call per row.
+    """
+    df_translated['prop_occupancy_left'] = (
+        (df_translated['maximum_participants'] - df_translated['current_participants']) /
+        df_translated['maximum_participants']
+    )
+    df_translated['prop_minimum_to_reach'] = (
+        (df_translated['minimum_participants'] - df_translated['current_participants']) /
+        df_translated['minimum_participants']
+    ).clip(lower=0)
+
+    np.random.seed(seed)
+    df_translated['number_of_women'] = df_translated['current_participants'].apply(
+        lambda x: np.random.randint(0, x + 1) if x > 0 else 0)
+    df_translated['percent_women'] = np.where(df_translated['current_participants'] > 0,
+                                              df_translated['number_of_women'] / df_translated['current_participants'],
+                                              0)
+    df_translated['prop_men'] = 1 - df_translated['percent_women']
+
+    df_translated['sponsored'] = np.random.choice([1, 0], size=len(df_translated), p=[0.25, 0.75])
+    df_translated['gap_to_80_percent_women'] = 0.8 - df_translated['percent_women']
+    df_translated['gap_to_80_percent_men'] = 0.8 - df_translated['prop_men']
+
+
+def legacy_encode_target_groups(df_translated):
+    """
+    encode_target_groups as it was: one full-column apply per target group.
+    """
+    if 'target_group' in df_translated.columns:
+        df_translated['target_group_raw'] = df_translated['target_group']
+        for group in df_translated['target_group_raw'].dropna().unique():
+            col_name = f"target_group_{group}"
+            df_translated[col_name] = df_translated['target_group_raw'].apply(lambda x: 1 if x == group else 0)
+
+
+def legacy_add_search_text(df_translated):
+    """
+    add_search_text as it was: ast.literal_eval on every keyword value.
+    """
+    df_translated['keywords_clean'] = df_translated['keywords'].apply(flatten_keywords)
+    df_translated['search_text'] = (
+        df_translated['course_name_german'].fillna('') + ' ' +
+        df_translated['course_subtitle'].fillna('') + ' ' +
+        df_translated['keywords_clean'].fillna('')
+    )
+
+
+LEGACY_STEPS = (legacy_add_derived_metrics, legacy_encode_target_groups, legacy_add_search_text)
+STEPS = (add_derived_metrics, encode_target_groups, add_search_text)
+
+
+def run(steps, df_translated, seed):
+    """
+    Apply transformation steps to a copy of a frame.
+
+    Args:
+        steps (tuple): STEPS or LEGACY_STEPS.
+        df_translated (pd.DataFrame): Output of translate_columns (left unchanged).
+        seed (int): Seed of the simulated columns.
+
+    Returns:
+        tuple: (transformed copy, seconds spent in each step).
+    """
+    df = df_translated.copy()
+    timings = []
+    for step in steps:
+        start = time.perf_counter()
+        if step in (add_derived_metrics, legacy_add_derived_metrics):
+            step(df, seed=seed)
+        else:
+            step(df)
+        timings.append(time.perf_counter() - start)
+    return df, timings
@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from catalog_build import (CONTENT_HASH_COLUMN, build_catalog, export_hashes, incremental_build, load_export,
+                           load_export_hashes, save_versioned, translate_columns)
+from export_stream import iter_export_records, load_export_streaming, stream_export
+from per_row_transforms import LEGACY_STEPS, STEPS, run
+
+
+def make_record(i, **changes):
+    record = {
+        "guid": f"g{i}",
+        "nummer": f"N{i}",
+        "name": f"Kurs {i}",
+        "untertitel": f"Untertitel {i}",
+        "bezirk": "Mitte",
+        "minimale_teilnehmerzahl": "5",
+        "aktuelle_teilnehmerzahl": str(i % 7),
+        "maximale_teilnehmerzahl": "12",
+        "zielgruppe": ["Frauen", "Kinder", None][i % 3],
+        "schlagwort": "['Sprache', 'Deutsch']" if i % 2 else "Kunst",
+        "preis": {"betrag": str(10 + i)},
+    }
+    record.update(changes)
+    return record
+
+
+def write_export(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"veranstaltungen": {"veranstaltung": records}}, f, ensure_ascii=False)
+
+
+class RecordingTranslator:
+
+    def __init__(self):
+        self.names = []
+
+    def __call__(self, names):
+        names = [name for name in names if isinstance(name, str)]
+        self.names.extend(names)
+        return {name: name.replace("Kurs", "Course") for name in names}
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def test_only_changed_courses_are_rebuilt(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            export = os.path.join(tmpdir, "courses.json")
+            write_export(export, [make_record(i) for i in range(30)])
+            previous = build_catalog(load_export(export), RecordingTranslator())
+
+            # Next export: course 3 edited, course 4 removed, course 30 added
+            records = [make_record(i) for i in range(30) if i != 4] + [make_record(30)]
+            records[3] = make_record(3, name="Kurs 3 neu")
+            write_export(export, records)
+            translator = RecordingTranslator()
+            catalog, diff = incremental_build(load_export(export), previous, translator)
+
+            self.assertEqual((diff["added"], diff["changed"], diff["removed"]), (1, 1, 1))
+            self.assertEqual(sorted(translator.names), ["Kurs 3 neu", "Kurs 30"])
+            self.assertNotIn("g4", set(catalog["guid"]))
+            self.assertEqual(catalog.loc[catalog["guid"] == "g3", "course_name_translated"].iat[0], "Course 3 neu")
+
+            # Unchanged courses keep their previous rows, in export order
+            unchanged = previous[previous["guid"].isin(["g0", "g1", "g2", "g5"])].reset_index(drop=True)
+            kept = catalog[catalog["guid"].isin(["g0", "g1", "g2", "g5"])].reset_index(drop=True)
+            pd.testing.assert_frame_equal(kept[unchanged.columns], unchanged, check_dtype=False)
+            expected = [r["guid"] for r in records]
+            self.assertEqual(list(catalog["guid"]), [g for g in expected if g in set(catalog["guid"])])
+
+            # Every build is a new versioned artifact and becomes the current catalog
+            output = os.path.join(tmpdir, "Processed_data_for_app.pkl")
+            first = save_versioned(previous, output)
+            second = save_versioned(catalog, output)
+            self.assertNotEqual(first, second)
+            self.assertTrue(os.path.exists(first))
+            self.assertListEqual(list(pd.read_pickle(output)[CONTENT_HASH_COLUMN]), list(catalog[CONTENT_HASH_COLUMN]))
+
+
+    def test_unchanged_full_courses_are_not_rebuilt(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            export = os.path.join(tmpdir, "courses.json")
+            output = os.path.join(tmpdir, "Processed_data_for_app.pkl")
+            # Courses 0-4 are full, so they are never in the catalog
+            records = [make_record(i, aktuelle_teilnehmerzahl="12" if i < 5 else str(i % 7)) for i in range(20)]
+            write_export(export, records)
+            df_german = load_export(export)
+            save_versioned(build_catalog(df_german, RecordingTranslator()), output, hashes=export_hashes(df_german))
+
+            records[0] = make_record(0, aktuelle_teilnehmerzahl="3")  # a place became free
+            write_export(export, records)
+            translator = RecordingTranslator()
+            catalog, diff = incremental_build(load_export(export), pd.read_pickle(output), translator,
+                                              previous_hashes=load_export_hashes(output))
+
+            self.assertEqual((diff["added"], diff["changed"], diff["unchanged"], diff["removed"]), (0, 1, 19, 0))
+            self.assertEqual(translator.names, ["Kurs 0"])
+            self.assertEqual(catalog["guid"].tolist(), [f"g{i}" for i in [0] + list(range(5, 20))])
+
+
+    def test_versioned_catalogs_are_pruned_and_hashes_follow_the_catalog(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "Processed_data_for_app.pkl")
+            export = os.path.join(tmpdir, "courses.json")
+            paths = []
+            for n in range(4, 8):
+                write_export(export, [make_record(i) for i in range(n)])
+                df_german = load_export(export)
+                paths.append(save_versioned(build_catalog(df_german, RecordingTranslator()), output,
+                                            hashes=export_hashes(df_german), keep=2))
+                os.utime(paths[-1], (n, n))  # distinct modification times, oldest first
+
+            self.assertEqual([os.path.exists(path) for path in paths], [False, False, True, True])
+            self.assertFalse(os.path.exists(paths[0].replace(".pkl", ".export_hashes.json")))
+            self.assertEqual(sorted(load_export_hashes(output)), sorted(f"g{i}" for i in range(7)))
+
+
+class TestStreamingIngestion(unittest.TestCase):
+
+    def test_streaming_matches_full_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            export = os.path.join(tmpdir, "courses.json")
+            records = [make_record(i, text="Beschreibung mit \"Zitat\", Komma und ] Klammer " * 20)
+                       for i in range(120)]
+            with open(export, "w", encoding="utf-8") as f:
+                json.dump({"meta": {"stand": "2025-03"}, "veranstaltungen": {"veranstaltung": records}}, f,
+                          ensure_ascii=False, indent=1)
+
+            # A tiny read size makes records span many buffer refills
+            self.assertEqual(list(iter_export_records(export, read_size=97)), records)
+
+            expected = translate_columns(load_export(export))
+            streamed = translate_columns(load_export_streaming(export, chunk_size=7))
+            pd.testing.assert_frame_equal(streamed, expected)
+
+            staged = os.path.join(tmpdir, "courses.jsonl")
+            self.assertEqual(stream_export(export, staged, chunk_size=50), 120)
+            with open(staged, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual([line["guid"] for line in lines], [r["guid"] for r in records])
+            self.assertEqual(lines[5]["course_name_german"], "Kurs 5")
+
+
+class TestVectorizedTransforms(unittest.TestCase):
+
+    def test_same_output_as_per_row_steps(self):
+        records = [make_record(i, zielgruppe=["Frauen", "Kinder", "Senioren", None][i % 4],
+                               maximale_teilnehmerzahl=str(8 + i % 9)) for i in range(500)]
+        df_german = pd.json_normalize(records, sep='_')
+        df_translated = translate_columns(df_german)
+        # Odd keyword values take the literal_eval path
+        df_translated.loc[:5, 'keywords'] = ["True ", "r'Kunst'", "[1, 2]", "None", "Sprache'", "  ['EDV']"]
+        for seed in (0, 42):
+            vectorized, _ = run(STEPS, df_translated, seed)
+            legacy, _ = run(LEGACY_STEPS, df_translated, seed)
+            pd.testing.assert_frame_equal(vectorized, legacy)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
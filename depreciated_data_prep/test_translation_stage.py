@@ -0,0 +1,95 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from translation_stage import RateLimiter, TranslationMemory, translate_names
+
+
+class FlakyBackend:
+    """
+    Local stand-in for Google Translate: upper-cases texts, fails the first call for some of them and records the
+    highest number of concurrent calls.
+    """
+
+    def __init__(self, fail_first=()):
+        self.fail_first = set(fail_first)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, source, target):
+        with self._lock:
+            self.calls.append(text)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            with self._lock:
+                if text in self.fail_first:
+                    self.fail_first.discard(text)
+                    raise ConnectionError("rate limited")
+            return text.upper()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestTranslationStage(unittest.TestCase):
+
+    def test_concurrent_translation_resumes_from_memory(self):
+        names = [f"Kurs {i}" for i in range(40)] + ["Kurs 1", None, ""]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "memory.sqlite3")
+            backend = FlakyBackend(fail_first=["Kurs 3", "Kurs 7"])
+            result = translate_names(names, backend=backend, memory=TranslationMemory(path), workers=4, rate=0,
+                                     backoff=0)
+
+            self.assertEqual(len(result), 40)
+            self.assertEqual(result["Kurs 3"], "KURS 3")  # retried after the failure
+            self.assertEqual(len(backend.calls), 42)
+            self.assertLessEqual(backend.max_active, 4)
+
+            # A rerun with one new name only translates that name
+            rerun = FlakyBackend()
+            result = translate_names(names + ["Neuer Kurs"], backend=rerun, memory=TranslationMemory(path), rate=0)
+            self.assertEqual(rerun.calls, ["Neuer Kurs"])
+            self.assertEqual(result["Kurs 39"], "KURS 39")
+
+    def test_failed_translations_are_not_stored(self):
+        memory = TranslationMemory(":memory:")
+        backend = FlakyBackend(fail_first=["Yoga"])
+        result = translate_names(["Yoga"], backend=backend, memory=memory, retries=0, rate=0)
+        self.assertIsNone(result["Yoga"])
+        self.assertEqual(len(memory), 0)
+
+    def test_interrupted_run_stops_and_keeps_finished_translations(self):
+        names = [f"Kurs {i}" for i in range(200)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "memory.sqlite3")
+            backend = FlakyBackend()
+            finished = []
+
+            def interrupt(count):
+                finished.append(count)
+                if len(finished) == 5:
+                    raise KeyboardInterrupt
+
+            with self.assertRaises(KeyboardInterrupt):
+                translate_names(names, backend=backend, memory=TranslationMemory(path), workers=2, rate=100,
+                                progress=interrupt)
+            # The queued names were cancelled, and every name sent to the backend is in the memory
+            self.assertLess(len(backend.calls), 20)
+            self.assertEqual(len(TranslationMemory(path)), len(backend.calls))
+
+    def test_rate_limiter_spaces_calls(self):
+        limiter = RateLimiter(rate=200)
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
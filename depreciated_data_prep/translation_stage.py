@@ -0,0 +1,220 @@
+"""
+Concurrent, resumable translation stage of the data-prep pipeline.
+
+Unique course names are translated by a bounded thread pool that shares one rate limit and retries failed calls with
+exponential backoff. Every successful translation is written to an on-disk translation memory (SQLite) as soon as it
+arrives, so an interrupted run resumes where it stopped and a catalog refresh only translates names it has not seen.
+The backend is pluggable: any object with a translate(text, source, target) method (tests use a local stand-in).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Default translation memory, next to this script
+DEFAULT_MEMORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_memory.sqlite3")
+
+
+class GoogleTranslatorBackend:
+    """
+    Translator backend calling Google Translate through deep-translator (one network round-trip per call).
+    """
+
+    def translate(self, text, source, target):
+        """
+        Translate a text.
+
+        Args:
+            text (str): Text to translate.
+            source (str): Source language code.
+            target (str): Target language code.
+
+        Returns:
+            str: The translated text.
+        """
+        from deep_translator import GoogleTranslator
+
+        return GoogleTranslator(source=source, target=target).translate(text)
+
+
+class TranslationMemory:
+    """
+    Persistent store of finished translations, keyed by (text, source, target). Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH):
+        """
+        Open (or create) the translation memory.
+
+        Args:
+            path (str, optional): SQLite file; ":memory:" keeps it in memory only. Defaults to DEFAULT_MEMORY_PATH.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " text TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, translation TEXT NOT NULL,"
+            " PRIMARY KEY (text, source, target))"
+        )
+
+    def get_many(self, texts, source, target):
+        """
+        Look up the stored translations of several texts.
+
+        Args:
+            texts (iterable[str]): Texts to look up.
+            source (str): Source language code.
+            target (str): Target language code.
+
+        Returns:
+            dict: text -> translation for the texts found.
+        """
+        found = {}
+        texts = list(texts)
+        with self._lock:
+            # Bounded batches keep each statement under SQLite's variable limit
+            for start in range(0, len(texts), 500):
+                batch = texts[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text, translation FROM translations WHERE source = ? AND target = ? "
+                    f"AND text IN ({placeholders})",
+                    (source, target, *batch),
+                )
+                found.update(rows)
+        return found
+
+    def put(self, text, source, target, translation):
+        """
+        Store one translation (committed immediately, so it survives an interrupted run).
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                               (text, source, target, translation))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1 / rate seconds apart across all threads.
+    """
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate (float): Maximum calls per second; 0 or None disables the limit.
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        """
+        Block until the caller may make its call.
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _translate_with_retries(backend, limiter, text, source, target, retries, backoff):
+    """
+    Translate one text, retrying with exponential backoff.
+
+    Returns:
+        str: The translation, or None if every attempt failed or returned nothing.
+    """
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            translation = backend.translate(text, source, target)
+            if translation:
+                return translation
+        except Exception:
+            pass
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+    return None
+
+
+def _translate_and_store(backend, limiter, memory, text, source, target, retries, backoff):
+    """
+    Translate one text and store a successful translation right away, in the worker thread, so it is kept even if
+    the run is interrupted before the result is collected.
+    """
+    translation = _translate_with_retries(backend, limiter, text, source, target, retries, backoff)
+    if translation is not None:
+        memory.put(text, source, target, translation)
+    return translation
+
+
+def translate_names(names, backend=None, memory=None, source="de", target="en", workers=8, rate=5.0, retries=3,
+                    backoff=1.0, progress=None):
+    """
+    Translate unique texts concurrently, reusing and filling the translation memory.
+
+    Args:
+        names (iterable[str]): Texts to translate (missing values and duplicates are skipped).
+        backend (object, optional): Object with translate(text, source, target). Defaults to GoogleTranslatorBackend.
+        memory (TranslationMemory, optional): Translation memory. Defaults to one at DEFAULT_MEMORY_PATH.
+        source (str, optional): Source language code. Defaults to "de".
+        target (str, optional): Target language code. Defaults to "en".
+        workers (int, optional): Concurrent backend calls. Defaults to 8.
+        rate (float, optional): Maximum backend calls per second over all workers (0 = unlimited). Defaults to 5.
+        retries (int, optional): Retries per text after a failed call. Defaults to 3.
+        backoff (float, optional): Delay before the first retry in seconds, doubled on every retry. Defaults to 1.
+        progress (callable, optional): Called with the number of newly finished texts (e.g. tqdm's update).
+
+    Returns:
+        dict: text -> translation, None for texts that could not be translated (they are retried on the next run).
+    """
+    backend = backend if backend is not None else GoogleTranslatorBackend()
+    memory = memory if memory is not None else TranslationMemory()
+    unique = list(dict.fromkeys(name for name in names if isinstance(name, str) and name))
+
+    # Step 1: Reuse what earlier runs already translated
+    translations = memory.get_many(unique, source, target)
+    pending = [name for name in unique if name not in translations]
+    print(f"🌍 {len(unique)} unique texts: {len(translations)} from the translation memory, {len(pending)} to translate")
+    if progress is not None and translations:
+        progress(len(translations))
+
+    # Step 2: Translate the rest concurrently; workers store every result as it arrives
+    limiter = RateLimiter(rate)
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = {
+            pool.submit(_translate_and_store, backend, limiter, memory, name, source, target, retries, backoff): name
+            for name in pending
+        }
+        for future in as_completed(futures):
+            translations[futures[future]] = future.result()
+            if progress is not None:
+                progress(1)
+    except BaseException:
+        # Interrupted (e.g. Ctrl-C): drop the queued texts instead of translating them all first; the calls in
+        # flight finish and are stored, and the rerun resumes from the memory
+        pool.shutdown(cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    failed = sum(translations[name] is None for name in pending)
+    if failed:
+        print(f"⚠️ {failed} texts could not be translated; rerun to retry them")
+    return translations
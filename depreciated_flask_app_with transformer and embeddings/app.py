@@ -6,13 +6,30 @@ import os
  
 app = Flask(__name__)
 
+# Model, catalog and embeddings are loaded once per worker, on the first request
+_loader = None
+
+def get_loader():
+    global _loader
+    if _loader is None:
+        _loader = AssetLoader(
+            model_path=os.path.abspath("app/saved_sentence_transformer_model"),
+            df_path=os.path.abspath("app/Processed_data_for_app.pkl"),
+            embeddings_path=os.path.abspath("app/course_embeddings.npy"),
+            quantization="int8"
+        )
+    return _loader
+
+def warm_up():
+    """
+    Load the model, catalog and embeddings and encode one query before the worker serves requests
+    (the first encode initializes the model's runtime).
+    """
+    get_loader().get_model().encode(["Deutsch Grundlagen"], normalize_embeddings=True)
+
 @app.route("/courses", methods=["GET", "POST"])
 def course_list():
-    loader = AssetLoader(
-        model_path=os.path.abspath("app/saved_sentence_transformer_model"),
-        df_path=os.path.abspath("app/Processed_data_for_app.pkl"),
-        embeddings_path=os.path.abspath("app/course_embeddings.npy")
-    )
+    loader = get_loader()
 
     if request.method == "POST":
         try:
@@ -47,4 +64,5 @@ def home():
     return redirect(url_for("course_list"))
 
 if __name__ == "__main__":
+    warm_up()
     app.run(debug=True)
@@ -0,0 +1,249 @@
+"""
+Approximate nearest-neighbour search over the course embeddings: an inverted file (IVF) index.
+
+The normalized embeddings are clustered by spherical k-means into `n_lists` cells; a query is compared with the
+cell centroids and only the courses of the `n_probe` closest cells are scored exactly. With n_lists ~ sqrt(n) a
+search touches about n_probe / sqrt(n) of the catalog. n_probe is the recall/latency knob (n_probe = n_lists is
+exact search).
+
+The index is persisted next to the embeddings it was built from (course_embeddings.ivf.npz).
+
+Usage (from this app's root folder, after python -m app.embedding_store):
+    python -m app.ann_index app/course_embeddings.npy --lists 40
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+DEFAULT_N_PROBE = 8
+
+
+def index_path(embeddings_path):
+    """
+    Return the path of the IVF index stored next to an embeddings file.
+    """
+    return os.path.splitext(embeddings_path)[0] + ".ivf.npz"
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=10, seed=0, chunk_size=8192):
+    """
+    Cluster unit-length vectors by cosine similarity (k-means with centroids projected back on the sphere).
+
+    Args:
+        vectors (np.ndarray): (n x d) unit-length vectors.
+        n_clusters (int): Number of clusters (at most n).
+        iterations (int, optional): Assignment/update rounds. Defaults to 10.
+        seed (int, optional): Seed of the initial centroid sample. Defaults to 0.
+        chunk_size (int, optional): Vectors assigned per matrix product, to bound memory. Defaults to 8192.
+
+    Returns:
+        tuple: (centroids as a (n_clusters x d) float32 array, cluster of every vector).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+
+    for _ in range(iterations):
+        # Step 1: Assign every vector to its most similar centroid
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignment[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+
+        # Step 2: Move every centroid to the normalized mean of its vectors; reseed empty clusters
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.flatnonzero(np.bincount(assignment, minlength=n_clusters) == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+
+    return centroids, assignment
+
+
+class IVFIndex:
+    """
+    Inverted file index over a fixed embedding matrix (the index stores row numbers, not vectors).
+
+    The rows of each cell are stored contiguously in `order`, cell l spanning order[offsets[l]:offsets[l + 1]].
+    """
+
+    def __init__(self, centroids, order, offsets, n_probe=DEFAULT_N_PROBE):
+        """
+        Args:
+            centroids (np.ndarray): (n_lists x d) unit-length cell centroids.
+            order (np.ndarray): Embedding rows grouped by cell.
+            offsets (np.ndarray): Start of every cell in order, plus the total row count.
+            n_probe (int, optional): Cells scored per query by default. Defaults to DEFAULT_N_PROBE.
+        """
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self):
+        """
+        int: Number of cells.
+        """
+        return len(self.centroids)
+
+    @property
+    def n_vectors(self):
+        """
+        int: Number of indexed embedding rows.
+        """
+        return int(self.offsets[-1])
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, iterations=10, seed=0, n_probe=DEFAULT_N_PROBE):
+        """
+        Cluster an embedding matrix into an IVF index.
+
+        Args:
+            vectors (np.ndarray): (n x d) unit-length embeddings.
+            n_lists (int, optional): Number of cells. Defaults to round(sqrt(n)).
+            iterations (int, optional): k-means rounds. Defaults to 10.
+            seed (int, optional): k-means seed, for reproducible indexes. Defaults to 0.
+            n_probe (int, optional): Default cells scored per query. Defaults to DEFAULT_N_PROBE.
+
+        Returns:
+            IVFIndex: The built index.
+
+        Raises:
+            ValueError: If there are no vectors or n_lists is not between 1 and n.
+        """
+        n = len(vectors)
+        n_lists = n_lists or max(1, int(round(np.sqrt(n))))
+        if n == 0 or not 1 <= n_lists <= n:
+            raise ValueError(f"Cannot build {n_lists} index cells over {n} embeddings.")
+
+        centroids, assignment = spherical_kmeans(vectors, n_lists, iterations=iterations, seed=seed)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        return cls(centroids.astype(np.float32), order.astype(np.int64), offsets.astype(np.int64), n_probe=n_probe)
+
+    def save(self, path, fingerprint=None):
+        """
+        Persist the index as a .npz file (written to a temporary file first, as workers may be reading it).
+
+        Args:
+            path (str): .npz file.
+            fingerprint (str, optional): embedding_store.embeddings_fingerprint of the embeddings it was built from.
+        """
+        arrays = {"centroids": self.centroids, "order": self.order, "offsets": self.offsets}
+        if fingerprint is not None:
+            arrays["fingerprint"] = np.array(fingerprint)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path, n_vectors=None, fingerprint=None, n_probe=DEFAULT_N_PROBE):
+        """
+        Load an index saved by save().
+
+        Args:
+            path (str): .npz file.
+            n_vectors (int, optional): Row count of the embeddings it will search, to detect a stale index.
+            fingerprint (str, optional): Fingerprint of the embeddings it will search; an index saved with another
+                one (or none) is stale.
+            n_probe (int, optional): Default cells scored per query. Defaults to DEFAULT_N_PROBE.
+
+        Returns:
+            IVFIndex: The loaded index.
+
+        Raises:
+            ValueError: If the index does not cover n_vectors embeddings or was built from other embeddings.
+        """
+        with np.load(path) as data:
+            index = cls(data["centroids"], data["order"], data["offsets"], n_probe=n_probe)
+            saved_fingerprint = str(data["fingerprint"]) if "fingerprint" in data else None
+        if n_vectors is not None and index.n_vectors != n_vectors:
+            raise ValueError(f"{path} indexes {index.n_vectors} embeddings, not {n_vectors}. "
+                             "Please rebuild it with python -m app.ann_index.")
+        if fingerprint is not None and saved_fingerprint != fingerprint:
+            raise ValueError(f"{path} was built from other embeddings. Please rebuild it with python -m app.ann_index.")
+        return index
+
+    def candidates(self, query_vector, n_probe=None):
+        """
+        Embedding rows in the n_probe cells closest to the query.
+
+        Args:
+            query_vector (np.ndarray): Unit-length query embedding.
+            n_probe (int, optional): Cells to scan. Defaults to self.n_probe.
+
+        Returns:
+            np.ndarray: Candidate rows, sorted (for sequential reads of a memory map).
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        centroid_scores = self.centroids @ query_vector
+        cells = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+        return np.sort(rows)
+
+    def search(self, vectors, query_vector, k, n_probe=None):
+        """
+        Approximate top-k embedding rows by cosine similarity.
+
+        Args:
+            vectors (np.ndarray): The (n x d) unit-length embeddings the index was built over.
+            query_vector (np.ndarray): Unit-length query embedding.
+            k (int): Number of neighbours.
+            n_probe (int, optional): Cells to scan. Defaults to self.n_probe.
+
+        Returns:
+            tuple: (rows, similarities), best first; fewer than k if the probed cells hold fewer rows.
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        rows = self.candidates(query_vector, n_probe)
+        return top_k(rows, vectors[rows] @ query_vector, k)
+
+
+def top_k(rows, scores, k):
+    """
+    Select the k best-scoring rows, best first.
+
+    Args:
+        rows (np.ndarray): Candidate rows.
+        scores (np.ndarray): Score of each candidate.
+        k (int): Number of rows to keep.
+
+    Returns:
+        tuple: (rows, scores) of the k best candidates in descending score order, ties by ascending row.
+    """
+    if k < len(scores):
+        # Keep every row tied with the k-th score, so tie-breaking does not depend on the partition
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        best = np.flatnonzero(scores >= kth)
+        rows, scores = rows[best], scores[best]
+    order = np.lexsort((rows, -scores))[:k]
+    return rows[order], scores[order]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the IVF index of the course embeddings.")
+    parser.add_argument("embeddings", help=".npy file written by app.embedding_store")
+    parser.add_argument("--lists", type=int, default=None, help="number of index cells (default: sqrt(courses))")
+    parser.add_argument("--iterations", type=int, default=10, help="k-means rounds")
+    parser.add_argument("--seed", type=int, default=0, help="k-means seed")
+    args = parser.parse_args(argv)
+
+    from app.embedding_store import embeddings_fingerprint, normalize_rows
+
+    # Files without a guid order may not be normalized yet (see CourseEmbeddings.load)
+    vectors = normalize_rows(np.load(args.embeddings, mmap_mode='r'))
+    index = IVFIndex.build(vectors, n_lists=args.lists, iterations=args.iterations, seed=args.seed)
+    index.save(index_path(args.embeddings), fingerprint=embeddings_fingerprint(args.embeddings))
+    sizes = np.diff(index.offsets)
+    print(f"✅ Indexed {index.n_vectors} embeddings in {index.n_lists} cells "
+          f"({sizes.min()}-{sizes.max()} courses per cell) to {index_path(args.embeddings)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
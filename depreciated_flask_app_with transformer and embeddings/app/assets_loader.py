@@ -1,10 +1,10 @@
 import os
 import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from app.embedding_store import CourseEmbeddings
 
 class AssetLoader:
-    def __init__(self, model_path, df_path, embeddings_path):
+    def __init__(self, model_path, df_path, embeddings_path, quantization=None):
         print("📦 [AssetLoader] Initializing...")
         print(f"📁 model_path: {model_path}")
         print(f"🔍 exists: {os.path.exists(model_path)}")
@@ -16,9 +16,13 @@ class AssetLoader:
         print(f"📁 df_path: {df_path} — exists: {os.path.exists(df_path)}")
         print(f"📁 embeddings_path: {embeddings_path} — exists: {os.path.exists(embeddings_path)}")
 
+        # Imported here rather than at module level: sentence-transformers pulls in torch, which only the loader needs
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(model_path)
         self.df = pd.read_pickle(df_path)
-        self.embeddings = np.load(embeddings_path)
+        # Memory-mapped and aligned to the catalog by guid; only queries are encoded at search time.
+        # With quantization ("float16"/"int8") first-pass scores come from the compact copy
+        self.embeddings = CourseEmbeddings.load(embeddings_path, self.df, quantization=quantization)
 
     def get_model(self):
         return self.model
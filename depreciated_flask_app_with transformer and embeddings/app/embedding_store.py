@@ -0,0 +1,462 @@
+"""
+Precomputed course embeddings: one L2-normalized float32 row per course, saved as .npy next to the guid of every
+row, and memory-mapped at load time so workers share the pages and only the query is encoded per search.
+
+Usage (from this app's root folder, with the sentence transformer saved as in script_to_save_sentencetransformer.py):
+    python -m app.embedding_store app/Processed_data_for_app.pkl app/saved_sentence_transformer_model app/course_embeddings.npy
+
+Files saved before the matrix was normalized on disk are migrated once, in place:
+    python -m app.embedding_store --normalize app/course_embeddings.npy
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from app.ann_index import IVFIndex, index_path, top_k
+from app.quantization import QUANTIZATION_DTYPES, QuantizedVectors, quantized_path
+
+# Compact-score candidates re-ranked at full precision per requested neighbour
+RERANK_FACTOR = 4
+# Largest error of a compact similarity; prefiltered rows within it of the threshold are rescored exactly
+QUANTIZATION_MARGIN = 0.02
+# Rows checked or rewritten per step when migrating a file, so a large matrix is never held in memory at once
+CHUNK_ROWS = 4096
+# Largest deviation from 1 of a row norm still counted as unit length
+NORM_TOLERANCE = 1e-3
+
+
+def guids_path(embeddings_path):
+    """
+    Return the path of the guid order file stored next to an embeddings file.
+    """
+    return os.path.splitext(embeddings_path)[0] + ".guids.json"
+
+
+def hashes_path(embeddings_path):
+    """
+    Return the path of the search-text hashes stored next to an embeddings file (one per row, in guid order).
+    """
+    return os.path.splitext(embeddings_path)[0] + ".hashes.json"
+
+
+def text_hash(text):
+    """
+    Short hash of a course's search text, to tell which embeddings are still valid after a catalog refresh.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def embeddings_fingerprint(embeddings_path):
+    """
+    Identify the content of an embeddings file, so the index and compact copies built from it can detect that it
+    changed even when the row count did not (e.g. a course edited by an incremental build).
+
+    Args:
+        embeddings_path (str): .npy file written by build_embeddings.
+
+    Returns:
+        str: Digest of the guid order and search-text hashes, or of the .npy size and modification time for files
+            written without them.
+    """
+    digest = hashlib.sha1()
+    sidecars = [path for path in (guids_path(embeddings_path), hashes_path(embeddings_path)) if os.path.exists(path)]
+    if len(sidecars) == 2:
+        for path in sidecars:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        digest.update(str(os.path.getsize(embeddings_path)).encode())
+    else:
+        stat = os.stat(embeddings_path)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def vectors_digest(vectors):
+    """
+    Digest of an embedding matrix's shape and of a fixed sample of its rows (at most 64, first and last included),
+    cheap enough to compute at every load. It ties a guid order to the matrix it was written for: adding, removing
+    or reordering courses moves rows, which changes the sample.
+
+    Args:
+        vectors (np.ndarray): (courses x dimensions) float32 matrix.
+
+    Returns:
+        str: 16 hex digits.
+    """
+    sample = np.unique(np.linspace(0, len(vectors) - 1, min(len(vectors), 64)).astype(np.int64))
+    digest = hashlib.sha1(repr(tuple(vectors.shape)).encode())
+    digest.update(np.ascontiguousarray(vectors[sample], dtype=np.float32).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def read_guid_order(embeddings_path, vectors):
+    """
+    Read the guid order stored next to an embeddings file and check that it was written for these vectors.
+
+    Args:
+        embeddings_path (str): .npy file written by build_embeddings.
+        vectors (np.ndarray): The (memory-mapped) matrix of embeddings_path.
+
+    Returns:
+        list[str]: guid of every matrix row.
+
+    Raises:
+        ValueError: If the guid order belongs to another matrix (e.g. read while build_embeddings replaces the files).
+    """
+    with open(guids_path(embeddings_path), encoding="utf-8") as f:
+        order = json.load(f)
+    if isinstance(order, list):
+        # Written before the matrix digest was stored
+        return order
+    if order["rows"] != len(vectors) or order["vectors_digest"] != vectors_digest(vectors):
+        raise ValueError(f"{guids_path(embeddings_path)} was written for other embeddings than {embeddings_path} "
+                         "(they may be being rebuilt). Please retry, or rebuild them with "
+                         "python -m app.embedding_store.")
+    return order["guids"]
+
+
+def _previous_vectors(embeddings_path):
+    """
+    Map guid -> (search text hash, vector) of an existing embeddings file, or {} if it has no (matching) guid order
+    or hashes.
+    """
+    if not all(os.path.exists(path) for path in (embeddings_path, guids_path(embeddings_path),
+                                                 hashes_path(embeddings_path))):
+        return {}
+    vectors = np.load(embeddings_path, mmap_mode='r')
+    try:
+        guids = read_guid_order(embeddings_path, vectors)
+    except ValueError:
+        return {}
+    with open(hashes_path(embeddings_path), encoding="utf-8") as f:
+        hashes = json.load(f)
+    return {guid: (digest, vectors[row]) for row, (guid, digest) in enumerate(zip(guids, hashes))}
+
+
+def normalize_rows(matrix):
+    """
+    L2-normalize the rows of a matrix, so dot products are cosine similarities.
+
+    Args:
+        matrix (array-like): (rows x dimensions) vectors.
+
+    Returns:
+        np.ndarray: float32 copy with unit-length rows (all-zero rows stay zero).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def is_normalized(vectors, chunk_rows=CHUNK_ROWS):
+    """
+    Whether every row of a (possibly memory-mapped) matrix is unit-length or all zero, checked a chunk at a time.
+
+    Args:
+        vectors (np.ndarray): (rows x dimensions) vectors.
+        chunk_rows (int, optional): Rows read per step. Defaults to CHUNK_ROWS.
+
+    Returns:
+        bool: True if the rows can be used as they are for cosine similarities.
+    """
+    for start in range(0, len(vectors), chunk_rows):
+        norms = np.linalg.norm(np.asarray(vectors[start:start + chunk_rows], dtype=np.float32), axis=1)
+        if not np.all((np.abs(norms - 1.0) <= NORM_TOLERANCE) | (norms == 0)):
+            return False
+    return True
+
+
+def normalize_file(embeddings_path, chunk_rows=CHUNK_ROWS):
+    """
+    Normalize the rows of an embeddings file on disk (through a temporary file), so every worker can memory-map it
+    instead of keeping its own normalized copy. The IVF index and compact copies next to it are rebuilt.
+
+    Args:
+        embeddings_path (str): .npy file to migrate.
+        chunk_rows (int, optional): Rows rewritten per step. Defaults to CHUNK_ROWS.
+
+    Returns:
+        bool: True if the file was rewritten, False if its rows were already unit-length.
+    """
+    vectors = np.load(embeddings_path, mmap_mode='r')
+    if is_normalized(vectors, chunk_rows):
+        return False
+
+    tmp_npy = embeddings_path + ".tmp.npy"
+    normalized = np.lib.format.open_memmap(tmp_npy, mode="w+", dtype=np.float32, shape=vectors.shape)
+    for start in range(0, len(vectors), chunk_rows):
+        normalized[start:start + chunk_rows] = normalize_rows(vectors[start:start + chunk_rows])
+    normalized.flush()
+    del normalized, vectors
+    os.replace(tmp_npy, embeddings_path)
+
+    _rebuild_derived(embeddings_path, np.load(embeddings_path, mmap_mode='r'))
+    return True
+
+
+def build_embeddings(model, df, embeddings_path, batch_size=64, incremental=False):
+    """
+    Encode the search text of every course once and save the normalized matrix with its guid order. The IVF index
+    and compact copies found next to embeddings_path are rebuilt from the new vectors.
+
+    Args:
+        model (SentenceTransformer): Model used to encode courses (and later the queries).
+        df (pd.DataFrame): Course catalog with 'guid' and 'search_text' columns.
+        embeddings_path (str): .npy file to write; the guids go to guids_path(embeddings_path).
+        batch_size (int, optional): Courses encoded per model call. Defaults to 64.
+        incremental (bool, optional): Reuse the vectors of courses whose search text is unchanged since the
+            existing file was built, and only encode added or edited courses. Defaults to False.
+
+    Returns:
+        CourseEmbeddings: The saved embeddings, memory-mapped and aligned to df.
+    """
+    texts = df['search_text'].fillna("").astype(str).tolist()
+    guids = [str(guid) for guid in df['guid']]
+    hashes = [text_hash(text) for text in texts]
+
+    # Step 1: Vectors still valid from the previous build
+    previous = _previous_vectors(embeddings_path) if incremental else {}
+    reuse = [guid in previous and previous[guid][0] == digest for guid, digest in zip(guids, hashes)]
+    encode_rows = [row for row, reused in enumerate(reuse) if not reused]
+
+    # Step 2: Encode the rest
+    vectors = None
+    if encode_rows:
+        encoded = model.encode([texts[row] for row in encode_rows], batch_size=batch_size, convert_to_numpy=True,
+                               show_progress_bar=False)
+        vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        vectors[encode_rows] = normalize_rows(encoded)
+    for row, reused in enumerate(reuse):
+        if reused:
+            vector = previous[guids[row]][1]
+            if vectors is None:
+                vectors = np.empty((len(texts), len(vector)), dtype=np.float32)
+            vectors[row] = vector
+    if incremental:
+        print(f"🔁 Encoded {len(encode_rows)} courses, reused {len(texts) - len(encode_rows)} embeddings")
+
+    # Step 3: Write every file to a temporary file first, since the previous ones may still be memory-mapped or
+    # read. The matrix replaces the old one first; the guid order names the matrix it belongs to (row count and
+    # vectors_digest), so a load between the replacements is rejected instead of pairing rows with the wrong courses
+    order = {"rows": len(vectors), "vectors_digest": vectors_digest(vectors), "guids": guids}
+    tmp_npy = embeddings_path + ".tmp.npy"
+    np.save(tmp_npy, vectors)
+    for path, content in ((hashes_path(embeddings_path), hashes), (guids_path(embeddings_path), order)):
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(content, f)
+    os.replace(tmp_npy, embeddings_path)
+    for path in (hashes_path(embeddings_path), guids_path(embeddings_path)):
+        os.replace(path + ".tmp", path)
+
+    # Step 4: Rebuild the index and compact copies that were built from the previous file
+    _rebuild_derived(embeddings_path, vectors)
+    return CourseEmbeddings.load(embeddings_path, df)
+
+
+def _rebuild_derived(embeddings_path, vectors):
+    """
+    Rebuild the IVF index (with the same number of cells, at most one per course) and the compact copies present
+    next to an embeddings file, so they match the embeddings just written.
+    """
+    fingerprint = embeddings_fingerprint(embeddings_path)
+    if os.path.exists(index_path(embeddings_path)):
+        with np.load(index_path(embeddings_path)) as data:
+            n_lists = min(len(data["centroids"]), len(vectors))
+        IVFIndex.build(vectors, n_lists=n_lists).save(index_path(embeddings_path), fingerprint=fingerprint)
+        print(f"🔁 Rebuilt the IVF index ({n_lists} cells)")
+    for dtype in QUANTIZATION_DTYPES:
+        if os.path.exists(quantized_path(embeddings_path, dtype)):
+            QuantizedVectors.encode(vectors, dtype).save(quantized_path(embeddings_path, dtype),
+                                                         fingerprint=fingerprint)
+            print(f"🔁 Rebuilt the {dtype} copy")
+
+
+class CourseEmbeddings:
+    """
+    Normalized course embeddings aligned to the rows of a catalog DataFrame.
+
+    The matrix stays in the order it was saved in (memory-mapped, read-only); `rows` maps every catalog row
+    position to its matrix row, so a catalog can be filtered or reordered without touching the embeddings.
+    """
+
+    def __init__(self, vectors, rows, index=None, quantized=None):
+        """
+        Args:
+            vectors (np.ndarray): (courses x dimensions) float32 matrix with unit-length rows.
+            rows (np.ndarray): Matrix row of each catalog row position.
+            index (IVFIndex, optional): Approximate nearest-neighbour index over vectors. Defaults to None (exact).
+            quantized (QuantizedVectors, optional): Compact copy of vectors for first-pass scoring; candidates are
+                re-ranked with vectors. Defaults to None (full precision only).
+        """
+        self.vectors = vectors
+        self.rows = rows
+        self.index = index
+        self.quantized = quantized
+
+        # Catalog position of every matrix row (-1 for courses no longer in the catalog)
+        self.positions = np.full(len(vectors), -1, dtype=np.int64)
+        self.positions[rows] = np.arange(len(rows))
+
+    @classmethod
+    def load(cls, embeddings_path, df, quantization=None):
+        """
+        Memory-map an embeddings file and align it to a catalog by guid.
+
+        Files written before the guid order was stored are accepted when they have one row per catalog row; they
+        are then assumed to follow the catalog order, and only normalized in memory if they were not normalized on
+        disk (see normalize_file). The IVF index saved next to the
+        embeddings (python -m app.ann_index) is loaded too, when present. An index or compact copy built from other
+        embeddings (see embeddings_fingerprint) is skipped with a warning, and the search falls back to exact scoring.
+
+        Args:
+            embeddings_path (str): .npy file written by build_embeddings.
+            df (pd.DataFrame): Catalog the matcher searches, with a 'guid' column.
+            quantization (str, optional): "float16" or "int8" to score on the compact copy written by
+                python -m app.quantization (full precision if it is missing). Defaults to None.
+
+        Returns:
+            CourseEmbeddings: Embeddings aligned to df.
+
+        Raises:
+            ValueError: If a catalog course has no embedding, the guid order was written for other embeddings, or an
+                unversioned file does not match the catalog size.
+        """
+        vectors = np.load(embeddings_path, mmap_mode='r')
+        order_path = guids_path(embeddings_path)
+        fingerprint = embeddings_fingerprint(embeddings_path)
+        index = None
+        if os.path.exists(index_path(embeddings_path)):
+            try:
+                index = IVFIndex.load(index_path(embeddings_path), n_vectors=len(vectors), fingerprint=fingerprint)
+            except ValueError as e:
+                print(f"⚠️ {e} Searching without the index.")
+        quantized = None
+        if quantization:
+            compact_path = quantized_path(embeddings_path, quantization)
+            if os.path.exists(compact_path):
+                try:
+                    quantized = QuantizedVectors.load(compact_path, n_vectors=len(vectors), fingerprint=fingerprint)
+                except ValueError as e:
+                    print(f"⚠️ {e} Scoring at full precision.")
+            else:
+                print(f"⚠️ {compact_path} not found, scoring at full precision.")
+
+        if not os.path.exists(order_path):
+            if len(vectors) != len(df):
+                raise ValueError(f"{embeddings_path} has {len(vectors)} rows for {len(df)} courses and no guid order. "
+                                 "Please rebuild it with python -m app.embedding_store.")
+            print(f"⚠️ No guid order for {embeddings_path}, assuming catalog order. Rebuild it to align it by guid.")
+            if not is_normalized(vectors):
+                print(f"⚠️ {embeddings_path} is not normalized, normalizing a copy in memory. "
+                      "Run python -m app.embedding_store --normalize on it to memory-map it.")
+                vectors = normalize_rows(vectors)
+            return cls(vectors, np.arange(len(df)), index=index, quantized=quantized)
+
+        positions = {guid: row for row, guid in enumerate(read_guid_order(embeddings_path, vectors))}
+        try:
+            rows = np.fromiter((positions[str(guid)] for guid in df['guid']), dtype=np.int64, count=len(df))
+        except KeyError as e:
+            raise ValueError(f"Course {e.args[0]} has no embedding. Please rebuild {embeddings_path}.")
+        return cls(vectors, rows, index=index, quantized=quantized)
+
+    def similarities(self, query_vector, positions, min_score=None):
+        """
+        Cosine similarity between a normalized query vector and a subset of catalog rows.
+
+        With a compact copy and a min_score, all rows are scored on the compact copy and only those that may reach
+        min_score are rescored at full precision; the others keep their (lower) approximate score.
+
+        Args:
+            query_vector (np.ndarray): Unit-length query embedding.
+            positions (np.ndarray): Catalog row positions to score.
+            min_score (float, optional): Similarity threshold the caller filters on. Defaults to None (all exact).
+
+        Returns:
+            np.ndarray: One similarity per position, in the same order.
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        rows = self.rows[positions]
+        if self.quantized is None or min_score is None:
+            # Fancy indexing reads only the requested rows of the memory map
+            return self.vectors[rows] @ query_vector
+
+        scores = self.quantized.scores(rows, query_vector)
+        close = np.flatnonzero(scores >= min_score - QUANTIZATION_MARGIN)
+        scores[close] = self.vectors[rows[close]] @ query_vector
+        return scores
+
+    def nearest(self, query_vector, k, n_probe=None):
+        """
+        Catalog courses most similar to a query, through the IVF index when one is loaded.
+
+        Args:
+            query_vector (np.ndarray): Unit-length query embedding.
+            k (int): Number of courses to return.
+            n_probe (int, optional): Index cells to scan (recall/latency trade-off). Defaults to the index default.
+
+        Returns:
+            tuple: (catalog positions, similarities), most similar first.
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        if self.index is not None:
+            rows = self.index.candidates(query_vector, n_probe)
+        else:
+            rows = np.sort(self.rows)
+
+        # Over-fetch by the number of stale rows so filtering them out still leaves k courses
+        stale = len(self.vectors) - len(self.rows)
+        rows, scores = self._top_rows(rows, query_vector, k + stale)
+
+        positions = self.positions[rows]
+        keep = positions >= 0
+        return positions[keep][:k], scores[keep][:k]
+
+    def _top_rows(self, rows, query_vector, k):
+        """
+        Best k of the candidate matrix rows by exact similarity, shortlisted on the compact copy when loaded.
+        """
+        if self.quantized is not None:
+            rows, _ = top_k(rows, self.quantized.scores(rows, query_vector), k * RERANK_FACTOR)
+            rows = np.sort(rows)
+        return top_k(rows, self.vectors[rows] @ query_vector, k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the normalized course embeddings.")
+    parser.add_argument("catalog", nargs="?", help="processed catalog pickle")
+    parser.add_argument("model", nargs="?", help="saved sentence transformer folder")
+    parser.add_argument("output", nargs="?", help=".npy file for the embeddings")
+    parser.add_argument("--batch-size", type=int, default=64, help="courses encoded per model call")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only encode courses added or edited since OUTPUT was built")
+    parser.add_argument("--normalize", metavar="EMBEDDINGS",
+                        help="normalize an existing .npy file in place instead of building one")
+    args = parser.parse_args(argv)
+
+    if args.normalize:
+        if normalize_file(args.normalize):
+            print(f"✅ Normalized {args.normalize} on disk")
+        else:
+            print(f"✅ {args.normalize} is already normalized")
+        return 0
+    if not (args.catalog and args.model and args.output):
+        parser.error("catalog, model and output are required unless --normalize is given")
+
+    import pandas as pd
+    from sentence_transformers import SentenceTransformer
+
+    df = pd.read_pickle(args.catalog)
+    embeddings = build_embeddings(SentenceTransformer(args.model), df, args.output, batch_size=args.batch_size,
+                                  incremental=args.incremental)
+    print(f"✅ Saved {embeddings.vectors.shape[0]} course embeddings ({embeddings.vectors.shape[1]} dimensions) "
+          f"to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,20 +2,50 @@
 import pandas as pd
 import numpy as np
 import json
-from langdetect import detect
-from deep_translator import GoogleTranslator
 from rapidfuzz import fuzz
-from sklearn.metrics.pairwise import cosine_similarity
 
 def translate_query_to_german(query):
+    from deep_translator import GoogleTranslator
+
     try:
         return GoogleTranslator(source='auto', target='de').translate(query)
     except Exception as e:
         raise ValueError(f"Translation failed: {e}")
 
-def get_course_matches(user_query, df, model, course_embeddings, user_budget, top_n=20, similarity_threshold=0.45):
+# Candidate generators: fuzzy keyword prefilter, or nearest neighbours in embedding space (IVF index when built)
+RETRIEVAL_MODES = ("keyword", "semantic")
+
+def get_course_matches(user_query, df, model, course_embeddings, user_budget, top_n=20, similarity_threshold=0.45,
+                       retrieval="keyword", semantic_candidates=200, n_probe=None):
+    """
+    Match courses to a query by candidate retrieval and semantic similarity, then apply the budget filter.
+
+    Args:
+        user_query (str): Search query in English or German.
+        df (pd.DataFrame): Course catalog, in the row order course_embeddings was aligned to.
+        model (SentenceTransformer): Model used to encode the query.
+        course_embeddings (CourseEmbeddings): Precomputed normalized course embeddings aligned to df.
+        user_budget (float): Budget in euros; 0 or None disables the price filter.
+        top_n (int, optional): Number of courses to return. Defaults to 20.
+        similarity_threshold (float, optional): Minimum cosine similarity. Defaults to 0.45.
+        retrieval (str, optional): "keyword" (fuzzy prefilter, then similarity) or "semantic" (the
+            semantic_candidates nearest courses, sublinear with the IVF index). Defaults to "keyword".
+        semantic_candidates (int, optional): Courses retrieved in semantic mode. Defaults to 200.
+        n_probe (int, optional): IVF cells scanned in semantic mode; more is slower with higher recall.
+            Defaults to the index default.
+
+    Returns:
+        pd.DataFrame: Top matches with semantic_score, final_score and final_rank.
+
+    Raises:
+        ValueError: If the query is empty, the retrieval mode is unknown or no course passes the filters.
+    """
     if not isinstance(user_query, str) or not user_query.strip():
         raise ValueError("Invalid input. Please provide a non-empty search query.")
+    if retrieval not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {retrieval}. Use one of: {', '.join(RETRIEVAL_MODES)}.")
+
+    from langdetect import detect
 
     try:
         detected_lang = detect(user_query)
@@ -23,31 +53,37 @@ def get_course_matches(user_query, df, model, course_embeddings, user_budget, to
         detected_lang = "en"
 
     translated_query = user_query if detected_lang == 'de' else translate_query_to_german(user_query)
-    search_tokens = translated_query.lower().split()
+    # Only the query is encoded; the courses' normalized embeddings are precomputed
+    query_embedding = model.encode([translated_query], normalize_embeddings=True, convert_to_numpy=True)[0]
 
-    def fuzzy_token_match(text):
-        if pd.isna(text): return False
-        text = text.lower()
-        return any(fuzz.partial_ratio(token, text) >= 50 for token in search_tokens)
+    if retrieval == "semantic":
+        positions, similarities = course_embeddings.nearest(query_embedding, semantic_candidates, n_probe=n_probe)
+    else:
+        search_tokens = translated_query.lower().split()
 
-    df_filtered = df[
-        df['course_name_german'].apply(fuzzy_token_match) |
-        df['course_name_translated'].apply(fuzzy_token_match)
-    ]
+        def fuzzy_token_match(text):
+            if pd.isna(text): return False
+            text = text.lower()
+            return any(fuzz.partial_ratio(token, text) >= 50 for token in search_tokens)
 
-    if df_filtered.empty:
-        raise ValueError("No courses matched any extracted keyword tokens. Try a different query.")
+        keyword_mask = (
+            df['course_name_german'].apply(fuzzy_token_match) |
+            df['course_name_translated'].apply(fuzzy_token_match)
+        ).to_numpy()
+        positions = np.flatnonzero(keyword_mask)
+
+        if len(positions) == 0:
+            raise ValueError("No courses matched any extracted keyword tokens. Try a different query.")
 
-    query_embedding = model.encode([translated_query])
-    filtered_embeddings = model.encode(df_filtered['search_text'].tolist())
-    similarities = cosine_similarity(query_embedding, filtered_embeddings)[0]
+        # Cosine similarity is a single matrix-vector product over the prefiltered rows
+        similarities = course_embeddings.similarities(query_embedding, positions, min_score=similarity_threshold)
 
-    df_filtered = df_filtered.copy()
+    df_filtered = df.iloc[positions].copy()
     df_filtered['semantic_score'] = similarities
     df_filtered = df_filtered[similarities >= similarity_threshold]
 
     if df_filtered.empty:
-        raise ValueError("Courses matched the keywords, but were semantically too distant.")
+        raise ValueError("Courses matched the search, but were semantically too distant.")
 
     if user_budget and user_budget > 0:
         min_price = user_budget * 0.7
@@ -4,10 +4,11 @@ from app.models.platform_ranker import PlatformPreferenceRanker
 from app.models.consensus_ranker import ConsensusRanker
 
 class CourseMatcher:
-    def __init__(self, df, model, course_embeddings):
+    def __init__(self, df, model, course_embeddings, retrieval="keyword"):
         self.df = df
         self.model = model
         self.embeddings = course_embeddings
+        self.retrieval = retrieval
 
     def run(self, user_query, user_budget):
         return get_course_matches(
@@ -15,11 +16,13 @@ class CourseMatcher:
             df=self.df,
             model=self.model,
             course_embeddings=self.embeddings,
-            user_budget=user_budget
+            user_budget=user_budget,
+            retrieval=self.retrieval
         )
 
-def process_user_inputs(user_query, user_budget, user_gender, user_target_groups, model, df, course_embeddings):
-    matcher = CourseMatcher(df=df, model=model, course_embeddings=course_embeddings)
+def process_user_inputs(user_query, user_budget, user_gender, user_target_groups, model, df, course_embeddings,
+                        retrieval="keyword"):
+    matcher = CourseMatcher(df=df, model=model, course_embeddings=course_embeddings, retrieval=retrieval)
     final_matches_df = matcher.run(user_query=user_query, user_budget=user_budget)
 
     ranker = PlatformPreferenceRanker(user_gender=user_gender, selected_target_groups=user_target_groups)
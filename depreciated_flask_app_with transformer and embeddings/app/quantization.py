@@ -0,0 +1,158 @@
+"""
+Compact copies of the course embeddings for first-pass scoring: float16 (2x smaller than float32) or int8 with
+one float32 scale per vector (about 4x smaller). Candidates scored on the compact copy are re-ranked with the
+full-precision embeddings, which stay memory-mapped so a worker only pages in the rows it re-ranks.
+
+Usage (from this app's root folder, after python -m app.embedding_store):
+    python -m app.quantization app/course_embeddings.npy --dtype int8
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+QUANTIZATION_DTYPES = ("float16", "int8")
+
+
+def quantized_path(embeddings_path, dtype):
+    """
+    Return the path of the compact copy of an embeddings file.
+    """
+    return os.path.splitext(embeddings_path)[0] + f".{dtype}.npz"
+
+
+class QuantizedVectors:
+    """
+    Compact embedding matrix: codes (float16 or int8) and, for int8, the scale of every row so that
+    vector ~= codes * scale.
+    """
+
+    def __init__(self, codes, scales=None):
+        """
+        Args:
+            codes (np.ndarray): (rows x dimensions) float16 or int8 matrix.
+            scales (np.ndarray, optional): float32 scale per row, required for int8 codes. Defaults to None.
+        """
+        self.codes = codes
+        self.scales = scales
+
+    @property
+    def dtype(self):
+        """
+        str: Code type, one of QUANTIZATION_DTYPES.
+        """
+        return self.codes.dtype.name
+
+    @property
+    def nbytes(self):
+        """
+        int: Memory used by the codes and scales.
+        """
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def encode(cls, vectors, dtype="int8"):
+        """
+        Quantize an embedding matrix.
+
+        Args:
+            vectors (np.ndarray): (rows x dimensions) float32 embeddings.
+            dtype (str, optional): "float16", or "int8" with symmetric per-row scales. Defaults to "int8".
+
+        Returns:
+            QuantizedVectors: The compact matrix.
+
+        Raises:
+            ValueError: If dtype is not supported.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if dtype == "float16":
+            return cls(vectors.astype(np.float16))
+        if dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            return cls(codes, scales.astype(np.float32))
+        raise ValueError(f"Unknown quantization: {dtype}. Use one of: {', '.join(QUANTIZATION_DTYPES)}.")
+
+    def save(self, path, fingerprint=None):
+        """
+        Persist the codes (and scales) as an uncompressed .npz file (written to a temporary file first).
+
+        Args:
+            path (str): .npz file.
+            fingerprint (str, optional): embedding_store.embeddings_fingerprint of the embeddings it was built from.
+        """
+        arrays = {"codes": self.codes}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        if fingerprint is not None:
+            arrays["fingerprint"] = np.array(fingerprint)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path, n_vectors=None, fingerprint=None):
+        """
+        Load codes saved by save().
+
+        Args:
+            path (str): .npz file.
+            n_vectors (int, optional): Row count of the full-precision embeddings, to detect a stale copy.
+            fingerprint (str, optional): Fingerprint of the full-precision embeddings; a copy saved with another
+                one (or none) is stale.
+
+        Returns:
+            QuantizedVectors: The compact matrix.
+
+        Raises:
+            ValueError: If the copy does not have n_vectors rows or was built from other embeddings.
+        """
+        with np.load(path) as data:
+            quantized = cls(data["codes"], data["scales"] if "scales" in data else None)
+            saved_fingerprint = str(data["fingerprint"]) if "fingerprint" in data else None
+        if n_vectors is not None and len(quantized.codes) != n_vectors:
+            raise ValueError(f"{path} holds {len(quantized.codes)} embeddings, not {n_vectors}. "
+                             "Please rebuild it with python -m app.quantization.")
+        if fingerprint is not None and saved_fingerprint != fingerprint:
+            raise ValueError(f"{path} was built from other embeddings. "
+                             "Please rebuild it with python -m app.quantization.")
+        return quantized
+
+    def scores(self, rows, query_vector):
+        """
+        Approximate dot products between some rows and a query vector.
+
+        Args:
+            rows (np.ndarray): Rows to score.
+            query_vector (np.ndarray): float32 query embedding.
+
+        Returns:
+            np.ndarray: float32 score per row.
+        """
+        scores = self.codes[rows].astype(np.float32) @ query_vector
+        if self.scales is not None:
+            scores *= self.scales[rows]
+        return scores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the compact copy of the course embeddings.")
+    parser.add_argument("embeddings", help=".npy file written by app.embedding_store")
+    parser.add_argument("--dtype", choices=QUANTIZATION_DTYPES, default="int8", help="code type")
+    args = parser.parse_args(argv)
+
+    from app.embedding_store import embeddings_fingerprint, normalize_rows
+
+    vectors = normalize_rows(np.load(args.embeddings, mmap_mode='r'))
+    quantized = QuantizedVectors.encode(vectors, args.dtype)
+    quantized.save(quantized_path(args.embeddings, args.dtype), fingerprint=embeddings_fingerprint(args.embeddings))
+    print(f"✅ {args.dtype} copy of {len(vectors)} embeddings: {quantized.nbytes / 1e6:.2f} MB "
+          f"instead of {vectors.nbytes / 1e6:.2f} MB, saved to {quantized_path(args.embeddings, args.dtype)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+import json
+import os
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from app.ann_index import IVFIndex, index_path, spherical_kmeans, top_k
+from app.embedding_store import (QUANTIZATION_MARGIN, CourseEmbeddings, build_embeddings, embeddings_fingerprint,
+                                 guids_path, hashes_path, normalize_file, normalize_rows, vectors_digest)
+from app.quantization import QUANTIZATION_DTYPES, QuantizedVectors, quantized_path
+
+
+class StubModel:
+    """
+    Stands in for the sentence transformer: a fixed pseudo-random vector per text, and a log of encoded texts.
+    """
+
+    def __init__(self, dimensions=16):
+        self.dimensions = dimensions
+        self.encoded = []
+
+    def encode(self, texts, batch_size=64, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False):
+        self.encoded.extend(texts)
+        vectors = np.stack([np.random.default_rng(zlib.crc32(text.encode("utf-8"))).normal(size=self.dimensions)
+                            for text in texts])
+        return normalize_rows(vectors) if normalize_embeddings else vectors
+
+
+def course_numbers(df):
+    return df["guid"].str[len("guid-"):].astype(int).to_numpy()
+
+
+def make_courses(n=50):
+    return pd.DataFrame({
+        "guid": [f"guid-{i:04d}" for i in range(n)],
+        "search_text": [f"Kurs {i} Deutsch Grundlagen" for i in range(n)],
+    })
+
+
+class TestEmbeddingStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "course_embeddings.npy")
+        self.model = StubModel()
+        self.df = make_courses()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_rows_follow_the_catalog_by_guid(self):
+        build_embeddings(self.model, self.df, self.path)
+        expected = normalize_rows(StubModel().encode(self.df["search_text"].tolist()))
+
+        # Filtered and reordered catalog: every position still gets the vector of its own course
+        subset = self.df.iloc[::-3].reset_index(drop=True)
+        embeddings = CourseEmbeddings.load(self.path, subset)
+        query = expected[7]
+        positions = np.arange(len(subset))
+        np.testing.assert_allclose(embeddings.similarities(query, positions),
+                                   expected[course_numbers(subset)] @ query, rtol=1e-5)
+
+    def test_course_without_embedding_is_rejected(self):
+        build_embeddings(self.model, self.df, self.path)
+        extended = pd.concat([self.df, make_courses(51).tail(1)], ignore_index=True)
+        with self.assertRaisesRegex(ValueError, "guid-0050 has no embedding"):
+            CourseEmbeddings.load(self.path, extended)
+
+    def test_unversioned_file_is_normalized_in_catalog_order(self):
+        raw = StubModel().encode(self.df["search_text"].tolist()) * 3.0
+        np.save(self.path, raw.astype(np.float32))
+        embeddings = CourseEmbeddings.load(self.path, self.df)
+        self.assertNotIsInstance(embeddings.vectors, np.memmap)
+        np.testing.assert_allclose(np.linalg.norm(embeddings.vectors, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_array_equal(embeddings.rows, np.arange(len(self.df)))
+        with self.assertRaisesRegex(ValueError, "no guid order"):
+            CourseEmbeddings.load(self.path, self.df.head(10))
+
+        # Normalized once on disk (in chunks), the file is memory-mapped as it is and its compact copy rebuilt
+        QuantizedVectors.encode(normalize_rows(raw), "int8").save(quantized_path(self.path, "int8"))
+        self.assertTrue(normalize_file(self.path, chunk_rows=7))
+        self.assertFalse(normalize_file(self.path))
+        migrated = CourseEmbeddings.load(self.path, self.df, quantization="int8")
+        self.assertIsInstance(migrated.vectors, np.memmap)
+        self.assertIsNotNone(migrated.quantized)
+        np.testing.assert_allclose(migrated.vectors, embeddings.vectors, rtol=1e-6)
+
+    def test_incremental_build_encodes_only_changed_courses(self):
+        build_embeddings(self.model, self.df, self.path)
+        first = np.load(self.path)
+
+        refreshed = self.df.drop(index=[4]).copy()
+        refreshed.loc[3, "search_text"] = "Kurs 3 Englisch"
+        refreshed = pd.concat([refreshed, make_courses(51).tail(1)], ignore_index=True)
+        model = StubModel()
+        embeddings = build_embeddings(model, refreshed, self.path, incremental=True)
+
+        self.assertEqual(sorted(model.encoded), ["Kurs 3 Englisch", "Kurs 50 Deutsch Grundlagen"])
+        with open(guids_path(self.path), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["guids"], refreshed["guid"].tolist())
+        with open(hashes_path(self.path), encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), len(refreshed))
+        # Unchanged courses keep their exact previous vectors
+        np.testing.assert_array_equal(embeddings.vectors[0], first[0])
+        np.testing.assert_array_equal(embeddings.vectors[len(refreshed) - 2], first[49])
+
+    def test_guid_order_of_another_matrix_is_rejected(self):
+        build_embeddings(self.model, self.df, self.path)
+        with open(guids_path(self.path), encoding="utf-8") as f:
+            previous_order = f.read()
+
+        # Interrupted rebuild: the new matrix (a course removed) is in place, the guid order is still the old one
+        build_embeddings(StubModel(), self.df.drop(index=[0]), self.path)
+        with open(guids_path(self.path), "w", encoding="utf-8") as f:
+            f.write(previous_order)
+        with self.assertRaisesRegex(ValueError, "written for other embeddings"):
+            CourseEmbeddings.load(self.path, self.df.drop(index=[0]))
+
+    def test_incremental_build_refreshes_index_and_compact_copy(self):
+        build_embeddings(self.model, self.df, self.path)
+        vectors = np.load(self.path)
+        fingerprint = embeddings_fingerprint(self.path)
+        IVFIndex.build(vectors, n_lists=5).save(index_path(self.path), fingerprint=fingerprint)
+        QuantizedVectors.encode(vectors, "int8").save(quantized_path(self.path, "int8"), fingerprint=fingerprint)
+
+        # One course more: the previous index and int8 copy would no longer match the row count
+        refreshed = make_courses(51)
+        embeddings = build_embeddings(StubModel(), refreshed, self.path, incremental=True)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)),
+                         sorted(os.path.basename(path) for path in (self.path, guids_path(self.path),
+                                                                    hashes_path(self.path), index_path(self.path),
+                                                                    quantized_path(self.path, "int8"))))
+        loaded = CourseEmbeddings.load(self.path, refreshed, quantization="int8")
+        self.assertEqual((loaded.index.n_vectors, loaded.index.n_lists), (51, 5))
+        self.assertEqual(len(loaded.quantized.codes), 51)
+        positions, _ = loaded.nearest(embeddings.vectors[50], k=1, n_probe=5)
+        self.assertEqual(positions.tolist(), [50])
+
+    def test_nearest_skips_courses_no_longer_in_the_catalog(self):
+        build_embeddings(self.model, self.df, self.path)
+        vectors = np.load(self.path)
+        # The query is course 10 itself; drop it and its closest courses from the catalog
+        query = vectors[10]
+        closest = np.argsort(-(vectors @ query))[:5]
+        catalog = self.df.drop(index=closest).reset_index(drop=True)
+        embeddings = CourseEmbeddings.load(self.path, catalog)
+
+        positions, scores = embeddings.nearest(query, k=10)
+        self.assertEqual(len(positions), 10)
+        self.assertTrue(set(catalog["guid"].iloc[positions]).isdisjoint(self.df["guid"].iloc[closest]))
+        expected = np.sort(vectors[course_numbers(catalog)] @ query)[::-1][:10]
+        np.testing.assert_allclose(scores, expected, rtol=1e-5)
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+
+def unit_vectors(n, dimensions=32, seed=0):
+    return normalize_rows(np.random.default_rng(seed).normal(size=(n, dimensions)))
+
+
+class TestIVFIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = unit_vectors(2000)
+        self.queries = unit_vectors(20, seed=1)
+        self.index = IVFIndex.build(self.vectors, n_lists=40, seed=0)
+
+    def test_every_row_is_in_exactly_one_cell(self):
+        self.assertEqual(self.index.offsets[0], 0)
+        self.assertTrue(np.all(np.diff(self.index.offsets) >= 0))
+        self.assertEqual(self.index.n_vectors, len(self.vectors))
+        np.testing.assert_array_equal(np.sort(self.index.order), np.arange(len(self.vectors)))
+
+        _, assignment = spherical_kmeans(self.vectors, 40, seed=0)
+        for cell in range(self.index.n_lists):
+            members = self.index.order[self.index.offsets[cell]:self.index.offsets[cell + 1]]
+            self.assertTrue(np.all(assignment[members] == cell))
+
+    def test_probing_every_cell_is_exact_search(self):
+        rows = np.arange(len(self.vectors))
+        for query in self.queries:
+            found_rows, found_scores = self.index.search(self.vectors, query, 25, n_probe=self.index.n_lists)
+            exact_rows, exact_scores = top_k(rows, self.vectors @ query, 25)
+            np.testing.assert_array_equal(found_rows, exact_rows)
+            np.testing.assert_allclose(found_scores, exact_scores)
+
+    def test_ties_are_ordered_by_row(self):
+        rows = np.array([9, 2, 7, 4, 5, 1])
+        scores = np.array([0.5, 0.9, 0.5, 0.5, 0.1, 0.5])
+        best_rows, best_scores = top_k(rows, scores, 3)
+        np.testing.assert_array_equal(best_rows, [2, 1, 4])
+        np.testing.assert_array_equal(best_scores, [0.9, 0.5, 0.5])
+
+    def test_load_rejects_an_index_of_other_embeddings(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "course_embeddings.ivf.npz")
+            self.index.save(path)
+            loaded = IVFIndex.load(path, n_vectors=len(self.vectors))
+            np.testing.assert_array_equal(loaded.order, self.index.order)
+            with self.assertRaisesRegex(ValueError, "indexes 2000 embeddings, not 2001"):
+                IVFIndex.load(path, n_vectors=len(self.vectors) + 1)
+
+
+class TestQuantization(unittest.TestCase):
+
+    def setUp(self):
+        # Same dimensions as the sentence transformer, queries close to some courses
+        self.vectors = unit_vectors(3000, dimensions=384)
+        self.rows = np.arange(len(self.vectors))
+        self.queries = normalize_rows(self.vectors[:20] + 0.8 * unit_vectors(20, dimensions=384, seed=1))
+
+    def test_compact_scores_are_within_the_margin(self):
+        for dtype in QUANTIZATION_DTYPES:
+            quantized = QuantizedVectors.encode(self.vectors, dtype)
+            for query in self.queries:
+                error = np.abs(quantized.scores(self.rows, query) - self.vectors @ query)
+                self.assertLess(error.max(), QUANTIZATION_MARGIN, dtype)
+
+    def test_rows_reaching_the_threshold_keep_their_exact_score(self):
+        for dtype in QUANTIZATION_DTYPES:
+            quantized = QuantizedVectors.encode(self.vectors, dtype)
+            embeddings = CourseEmbeddings(self.vectors, self.rows, quantized=quantized)
+            for query in self.queries:
+                exact = self.vectors @ query
+                min_score = round(float(np.quantile(exact, 0.99)), 3)
+                scores = embeddings.similarities(query, self.rows, min_score=min_score)
+                passing = exact >= min_score
+                np.testing.assert_allclose(scores[passing], exact[passing], rtol=1e-6)
+                np.testing.assert_array_equal(scores >= min_score, passing)
+
+    def test_reranking_keeps_the_exact_top_k(self):
+        for dtype in QUANTIZATION_DTYPES:
+            quantized = QuantizedVectors.encode(self.vectors, dtype)
+            embeddings = CourseEmbeddings(self.vectors, self.rows, quantized=quantized)
+            for query in self.queries:
+                positions, scores = embeddings.nearest(query, 20)
+                exact_rows, exact_scores = top_k(self.rows, self.vectors @ query, 20)
+                np.testing.assert_array_equal(positions, exact_rows)
+                np.testing.assert_allclose(scores, exact_scores, rtol=1e-6)
+
+    def test_all_zero_rows_score_zero(self):
+        vectors = self.vectors[:10].copy()
+        vectors[3] = 0.0
+        quantized = QuantizedVectors.encode(vectors, "int8")
+        self.assertEqual(quantized.scales[3], 1.0)
+        self.assertFalse(np.any(quantized.codes[3]))
+        scores = quantized.scores(np.arange(10), self.queries[0])
+        self.assertTrue(np.all(np.isfinite(scores)))
+        self.assertEqual(scores[3], 0.0)
+
+    def test_copies_of_edited_embeddings_are_not_used(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "course_embeddings.npy")
+            build_embeddings(StubModel(dimensions=384), make_courses(), path)
+            vectors = np.load(path)
+            fingerprint = embeddings_fingerprint(path)
+            IVFIndex.build(vectors, n_lists=5).save(index_path(path), fingerprint=fingerprint)
+            QuantizedVectors.encode(vectors, "int8").save(quantized_path(path, "int8"), fingerprint=fingerprint)
+            loaded = CourseEmbeddings.load(path, make_courses(), quantization="int8")
+            self.assertIsNotNone(loaded.index)
+            self.assertIsNotNone(loaded.quantized)
+
+            # Course 3 edited in place: same row count, new vector and search-text hash
+            query = vectors[10]
+            vectors[3] = query
+            np.save(path, vectors)
+            with open(hashes_path(path), encoding="utf-8") as f:
+                hashes = json.load(f)
+            hashes[3] = "edited"
+            with open(hashes_path(path), "w", encoding="utf-8") as f:
+                json.dump(hashes, f)
+            with open(guids_path(path), encoding="utf-8") as f:
+                order = json.load(f)
+            order["vectors_digest"] = vectors_digest(vectors)
+            with open(guids_path(path), "w", encoding="utf-8") as f:
+                json.dump(order, f)
+
+            # Both copies are skipped, so the edited course is scored exactly instead of dropped
+            loaded = CourseEmbeddings.load(path, make_courses(), quantization="int8")
+            self.assertIsNone(loaded.index)
+            self.assertIsNone(loaded.quantized)
+            scores = loaded.similarities(query, np.arange(50), min_score=0.9)
+            self.assertAlmostEqual(float(scores[3]), 1.0, places=5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
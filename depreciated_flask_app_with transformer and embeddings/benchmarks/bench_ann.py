@@ -0,0 +1,76 @@
+"""
+Benchmark: IVF index (app.ann_index) against exact search over the course embeddings.
+Reports recall@k and the mean query latency for several n_probe values, on the saved embeddings or on a larger
+synthetic catalog (clustered random vectors) to see how the index scales.
+
+Usage (from this app's root folder):
+    python -m benchmarks.bench_ann --embeddings app/course_embeddings.npy --k 20 --probes 1 2 4 8 16
+    python -m benchmarks.bench_ann --synthetic 100000 --lists 316
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.ann_index import IVFIndex, top_k
+from app.embedding_store import normalize_rows
+
+
+def synthetic_embeddings(n, dimensions=384, topics=200, seed=0):
+    """
+    Unit-length vectors spread around `topics` random directions, like courses of a few hundred subjects.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dimensions))
+    return normalize_rows(centers[rng.integers(topics, size=n)] + 1.5 * rng.standard_normal((n, dimensions)))
+
+
+def sample_queries(vectors, count, seed=1, noise=0.05):
+    """
+    Queries near existing courses: random catalog vectors with some per-dimension noise, normalized.
+    """
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), count, replace=False)]
+    return normalize_rows(picked + noise * rng.standard_normal(picked.shape))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", default="app/course_embeddings.npy")
+    parser.add_argument("--synthetic", type=int, default=0, help="use this many synthetic embeddings instead")
+    parser.add_argument("--lists", type=int, default=None, help="index cells (default: sqrt(courses))")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_embeddings(args.synthetic)
+    else:
+        vectors = normalize_rows(np.load(args.embeddings, mmap_mode='r'))
+    queries = sample_queries(vectors, min(args.queries, len(vectors)))
+    all_rows = np.arange(len(vectors))
+
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors, n_lists=args.lists)
+    print(f"{len(vectors)} embeddings, {index.n_lists} cells, built in {time.perf_counter() - start:.2f} s")
+
+    # Exact top-k as ground truth
+    start = time.perf_counter()
+    exact = [set(top_k(all_rows, vectors @ q, args.k)[0]) for q in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"  exact        {exact_ms:8.3f} ms/query | recall@{args.k} 100.00% | scanned 100.0%")
+
+    for n_probe in args.probes:
+        if n_probe > index.n_lists:
+            continue
+        start = time.perf_counter()
+        found = [index.search(vectors, q, args.k, n_probe=n_probe)[0] for q in queries]
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        recall = np.mean([len(truth.intersection(rows)) / len(truth) for truth, rows in zip(exact, found)])
+        scanned = np.mean([len(index.candidates(q, n_probe)) for q in queries]) / len(vectors)
+        print(f"  n_probe {n_probe:<4} {ms:8.3f} ms/query | recall@{args.k} {recall:7.2%} | scanned {scanned:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: compact embedding copies (app.quantization) against full-precision scoring.
+Reports the memory of each representation, top-k agreement with exact search after re-ranking (same courses,
+same order) and threshold agreement of the prefilter scoring used by the keyword matcher.
+
+Usage (from this app's root folder):
+    python -m benchmarks.bench_quantization --embeddings app/course_embeddings.npy --k 20
+    python -m benchmarks.bench_quantization --synthetic 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.ann_index import top_k
+from app.embedding_store import CourseEmbeddings, normalize_rows
+from app.quantization import QUANTIZATION_DTYPES, QuantizedVectors
+from benchmarks.bench_ann import sample_queries, synthetic_embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", default="app/course_embeddings.npy")
+    parser.add_argument("--synthetic", type=int, default=0, help="use this many synthetic embeddings instead")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=0.45, help="similarity threshold of the matcher")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_embeddings(args.synthetic)
+    else:
+        vectors = normalize_rows(np.load(args.embeddings, mmap_mode='r'))
+    queries = sample_queries(vectors, min(args.queries, len(vectors)))
+    rows = np.arange(len(vectors))
+
+    exact = [top_k(rows, vectors @ q, args.k)[0] for q in queries]
+    passing = [vectors @ q >= args.threshold for q in queries]
+    print(f"{len(vectors)} embeddings x {vectors.shape[1]} dimensions, top-{args.k}, threshold {args.threshold}")
+
+    for dtype in ("float32",) + QUANTIZATION_DTYPES:
+        quantized = None if dtype == "float32" else QuantizedVectors.encode(vectors, dtype)
+        embeddings = CourseEmbeddings(vectors, rows, quantized=quantized)
+        nbytes = vectors.nbytes if quantized is None else quantized.nbytes
+
+        start = time.perf_counter()
+        found = [embeddings.nearest(q, args.k)[0] for q in queries]
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        same_order = np.mean([np.array_equal(a, b) for a, b in zip(exact, found)])
+        overlap = np.mean([len(np.intersect1d(a, b)) / args.k for a, b in zip(exact, found)])
+
+        # Threshold decisions (and exact scores of kept rows) of the keyword-prefilter scoring
+        agree = np.mean([
+            np.array_equal(embeddings.similarities(q, rows, min_score=args.threshold) >= args.threshold, keep)
+            for q, keep in zip(queries, passing)
+        ])
+        print(f"  {dtype:<8} {nbytes / 1e6:8.2f} MB ({vectors.nbytes / nbytes:3.1f}x smaller) | "
+              f"{ms:7.3f} ms/query | top-{args.k} identical {same_order:7.2%}, overlap {overlap:7.2%} | "
+              f"threshold agreement {agree:7.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,286 @@
+import hashlib
+import io
 import os
+import threading
+import time
 import pandas as pd
 
+from app.catalog_compiler import compile_catalog
+from app.columnar_catalog import ColumnarCatalog, is_columnar_catalog, MANIFEST_NAME
+from app.models.candidate_index import NgramIndex
+from app.models.language import CatalogLanguageDetector
+from app.models.translation import GlossaryTranslator, get_default_translator
+
+
+class _CatalogSnapshot:
+    """
+    Immutable holder for one loaded version of the catalog.
+    A new snapshot is built completely before it replaces the old one, so readers never see a half-loaded catalog.
+    """
+
+    __slots__ = ("df", "store", "version", "mtime_ns", "size", "loaded_at", "load_seconds", "artifacts")
+
+    def __init__(self, df, store, version, mtime_ns, size, loaded_at, load_seconds, artifacts=None):
+        self.df = df
+        self.store = store
+        self.version = version
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.loaded_at = loaded_at
+        self.load_seconds = load_seconds
+        # Structures derived from this catalog version (search index, ...), built once on first use
+        self.artifacts = {} if artifacts is None else artifacts
+
+
 class AssetLoader:
     """
     Class responsible for loading a serialized pandas DataFrame from app folder.
     Provides a safe interface for accessing the data.
+
+    Loaded catalogs are cached per process and shared by all loader instances pointing at the same file,
+    so constructing a loader per request is cheap. The file is only read again when its mtime or size changes,
+    and only re-parsed when its content hash changes as well.
+
+    Each instance is a consistent view of one catalog version: everything it hands out (frame, search index,
+    version) belongs to the snapshot resolved at construction. Construct a new loader or call refresh()
+    to pick up a changed file.
+
+    The path may also point at a columnar catalog directory (see app.columnar_catalog). Such catalogs are
+    opened lazily: numeric columns are memory-mapped and shared between worker processes, and other columns
+    are only decoded when a caller asks for them.
     """
 
+    # Process-wide cache: absolute file path -> _CatalogSnapshot
+    _snapshots = {}
+    _lock = threading.Lock()
+
     def __init__(self, df_path):
         """
         Initialize the AssetLoader with the path to a DataFrame file.
 
         Args:
-            df_path (str): Full path to a pickled DataFrame (.pkl).
+            df_path (str): Full path to a pickled DataFrame (.pkl) or a columnar catalog directory.
 
         Raises:
             FileNotFoundError: If the specified path does not exist.
         """
-        print("\U0001F4E6 [AssetLoader] Initializing...")  
-        print(f"\U0001F4C1 df_path: {df_path} — exists: {os.path.exists(df_path)}")  
+        self.df_path = os.path.abspath(df_path)
+        self.is_columnar = is_columnar_catalog(self.df_path)
+        # Columnar catalogs are versioned by their manifest, which the converter writes last
+        self._stat_path = os.path.join(self.df_path, MANIFEST_NAME) if self.is_columnar else self.df_path
 
-        if not os.path.exists(df_path):
+        if not os.path.exists(self.df_path):
+            print(f"\U0001F4C1 df_path: {self.df_path} — exists: False")
             raise FileNotFoundError(f"DataFrame path not found: {df_path}")
 
-        # Load the DataFrame from the given path
-        self.df = pd.read_pickle(df_path)
+        # Load the DataFrame from the given path (or reuse the cached one)
+        self._current = self._snapshot()
+
+    def refresh(self):
+        """
+        Switch this loader to the latest catalog version, reloading the file if it changed on disk.
+
+        Returns:
+            bool: True if the catalog version changed.
+        """
+        previous = self._current
+        self._current = self._snapshot()
+        return self._current.version != previous.version
+
+    def _snapshot(self):
+        """
+        Return the current snapshot for this loader's file, reloading it first if the file changed on disk.
+
+        Returns:
+            _CatalogSnapshot: The snapshot that is current for the file.
+        """
+        stat = os.stat(self._stat_path)
+        snapshot = AssetLoader._snapshots.get(self.df_path)
+
+        # Fast path: nothing changed on disk since the last load
+        if snapshot is not None and snapshot.mtime_ns == stat.st_mtime_ns and snapshot.size == stat.st_size:
+            return snapshot
+
+        with AssetLoader._lock:
+            # Another thread may have finished the reload while we were waiting for the lock
+            snapshot = AssetLoader._snapshots.get(self.df_path)
+            if snapshot is not None and snapshot.mtime_ns == stat.st_mtime_ns and snapshot.size == stat.st_size:
+                return snapshot
+
+            snapshot = self._load(stat, previous=snapshot)
+            AssetLoader._snapshots[self.df_path] = snapshot
+            return snapshot
+
+    def _load(self, stat, previous=None):
+        """
+        Read the file and build a new snapshot. Skips unpickling if the content hash is unchanged.
+        Pickled catalogs are compiled (see app.catalog_compiler) right after loading; columnar catalogs
+        are compiled once by the converter.
+
+        Args:
+            stat (os.stat_result): Stat of the file taken before reading it.
+            previous (_CatalogSnapshot, optional): The snapshot currently in use, if any.
+
+        Returns:
+            _CatalogSnapshot: The freshly loaded (or re-stamped) snapshot.
+        """
+        start = time.perf_counter()
+
+        if self.is_columnar:
+            store = ColumnarCatalog(self.df_path)
+            if previous is not None and previous.version == store.version:
+                return _CatalogSnapshot(previous.df, previous.store, store.version, stat.st_mtime_ns, stat.st_size,
+                                        previous.loaded_at, previous.load_seconds, previous.artifacts)
+            print(f"\U0001F4E6 [AssetLoader] Opened columnar catalog {self.df_path} — version: {store.version}")
+            return _CatalogSnapshot(None, store, store.version, stat.st_mtime_ns, stat.st_size,
+                                    time.time(), time.perf_counter() - start)
+
+        with open(self.df_path, "rb") as f:
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        # Same bytes with a new mtime (e.g. the file was touched or copied over): keep the parsed frame
+        if previous is not None and previous.version == version:
+            return _CatalogSnapshot(previous.df, None, version, stat.st_mtime_ns, stat.st_size,
+                                    previous.loaded_at, previous.load_seconds, previous.artifacts)
+
+        print("\U0001F4E6 [AssetLoader] Loading catalog...")
+        print(f"\U0001F4C1 df_path: {self.df_path} — version: {version}")
+
+        # Derive the query-independent columns once per load instead of once per request
+        df = compile_catalog(pd.read_pickle(io.BytesIO(raw)))
+        return _CatalogSnapshot(df, None, version, stat.st_mtime_ns, stat.st_size,
+                                time.time(), time.perf_counter() - start)
+
+    def get_dataframe(self, columns=None):
+        """
+        Return a view of the loaded DataFrame.
+
+        The returned frame is a shallow copy: adding or dropping columns on it does not affect the cached
+        catalog, but the underlying values are shared and must be treated as read-only.
+
+        Args:
+            columns (list, optional): Only include these columns. For columnar catalogs the other
+                columns are then never read from disk. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: A shallow copy of the current catalog.
+        """
+        snapshot = self._current
+        if snapshot.store is not None:
+            return snapshot.store.to_frame(columns)
+        if columns is not None:
+            return snapshot.df[list(columns)].copy(deep=False)
+        return snapshot.df.copy(deep=False)
+
+    def get_rows(self, start, stop, columns=None):
+        """
+        Return a range of catalog rows, slicing before projecting so only the requested rows are copied.
+
+        Args:
+            start (int): First row position.
+            stop (int): Row position after the last row.
+            columns (list, optional): Only include these columns. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: The selected rows.
+        """
+        snapshot = self._current
+        if snapshot.store is not None:
+            # Only the page's rows are decoded, whatever the catalog size
+            return snapshot.store.rows(start, stop, columns)
+        rows = snapshot.df.iloc[start:stop]
+        return rows if columns is None else rows[list(columns)]
+
+    @property
+    def columns(self):
+        """
+        list: Column names of the catalog version this loader serves.
+        """
+        snapshot = self._current
+        return list(snapshot.df.columns) if snapshot.store is None else list(snapshot.store.columns)
+
+    @property
+    def row_count(self):
+        """
+        int: Number of courses in the catalog version this loader serves.
+        """
+        snapshot = self._current
+        return len(snapshot.df) if snapshot.store is None else snapshot.store.n_rows
+
+    def get_artifact(self, name, builder, columns=None):
+        """
+        Return a structure derived from the current catalog, building it once per catalog version.
+
+        Args:
+            name (str): Cache key of the artifact.
+            builder (callable): Called with the catalog DataFrame to build the artifact.
+            columns (list, optional): Only pass these columns to the builder. Defaults to all columns.
+
+        Returns:
+            object: The cached or freshly built artifact.
+        """
+        snapshot = self._current
+        artifact = snapshot.artifacts.get(name)
+        if artifact is None:
+            with AssetLoader._lock:
+                artifact = snapshot.artifacts.get(name)
+                if artifact is None:
+                    if snapshot.store is not None:
+                        df = snapshot.store.to_frame(columns)
+                    else:
+                        df = snapshot.df if columns is None else snapshot.df[list(columns)]
+                    artifact = builder(df)
+                    snapshot.artifacts[name] = artifact
+        return artifact
 
-    def get_dataframe(self):
+    def get_search_index(self):
         """
-        Return a copy of the loaded DataFrame to ensure immutability outside the loader.
+        Return the n-gram candidate index for the current catalog version.
 
         Returns:
-            pd.DataFrame: A defensive copy of the loaded DataFrame.
+            NgramIndex: Index used by CourseMatcher to skip rows that cannot match.
+        """
+        return self.get_artifact("search_index", NgramIndex.from_catalog)
+
+    def get_translator(self):
+        """
+        Return the catalog-derived glossary translator for the current catalog version.
+        Queries the glossary does not cover well enough go to the shared cached Google translator.
+
+        Returns:
+            GlossaryTranslator: Translator for CourseMatcher.
+        """
+        return self.get_artifact(
+            "translator", lambda df: GlossaryTranslator.from_catalog(df, fallback=get_default_translator())
+        )
+
+    def get_language_detector(self):
+        """
+        Return the de/en language detector trained on the current catalog version.
+
+        Returns:
+            CatalogLanguageDetector: Detector for CourseMatcher.
+        """
+        return self.get_artifact("language_detector", CatalogLanguageDetector.from_catalog)
+
+    @property
+    def catalog_version(self):
+        """
+        str: Short content hash of the catalog version this loader serves.
+        """
+        return self._current.version
+
+    @property
+    def loaded_at(self):
+        """
+        float: Unix timestamp of when this catalog version was loaded in this process.
+        """
+        return self._current.loaded_at
+
+    @property
+    def load_seconds(self):
+        """
+        float: Wall-clock seconds loading this catalog version took.
         """
-        return self.df.copy()
+        return self._current.load_seconds
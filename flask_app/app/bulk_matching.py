@@ -0,0 +1,228 @@
+"""
+Offline bulk runner: push many queries through the full search pipeline (matcher, platform ranker, consensus)
+with a process pool, for relevance evaluation and provider reports.
+
+Usage (from flask_app/):
+    python -m app.bulk_matching queries.jsonl results.jsonl --catalog app/data/Processed_data_for_app.pkl
+
+Input rows (JSONL objects or CSV columns): id (optional), query, budget, gender, target_groups
+(a JSON list, or ';'-separated in CSV). Output: one JSON object per query, in input order.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from app.assets_loader import AssetLoader
+from app.models.translation import GlossaryTranslator
+from app.processor import process_user_inputs
+from app.search_api import API_RESULT_COLUMNS
+
+DEFAULT_CATALOG_PATH = os.path.join("app", "data", "Processed_data_for_app.pkl")
+
+# Per-process state of pool workers, set by _init_worker
+_worker_loader = None
+_worker_offline = False
+_worker_top_n = 20
+
+
+def read_requests(path):
+    """
+    Read search requests from a JSONL or CSV file, lazily.
+
+    Rows that cannot be parsed (invalid JSON, a non-numeric budget, ...) are yielded with an 'error' message
+    instead, so they are reported in the output rather than aborting the run.
+
+    Args:
+        path (str): Input file; '.csv' files are read as CSV, anything else as JSONL.
+
+    Yields:
+        dict: id, query, budget, gender and target_groups of one request, or id, query and error.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (line for line in f if line.strip())
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                row = json.loads(row) if isinstance(row, str) else row
+                request = _parse_request(number, row)
+            except (TypeError, ValueError, AttributeError) as e:
+                row = row if isinstance(row, dict) else {}
+                request = {"id": row.get("id") or number, "query": row.get("query"),
+                           "error": f"Invalid request on row {number}: {e}"}
+            yield request
+
+
+def _parse_request(number, row):
+    """
+    Turn one input row (CSV dict or decoded JSON line) into a request.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("expected a JSON object")
+    groups = row.get("target_groups") or []
+    if isinstance(groups, str):
+        groups = [g.strip() for g in groups.split(";") if g.strip()]
+    return {
+        "id": row.get("id") or number,
+        "query": row.get("query", ""),
+        "budget": float(row.get("budget") or 0),
+        "gender": row.get("gender", ""),
+        "target_groups": groups or ["Not applicable"],
+    }
+
+
+def _offline_translator(df):
+    """
+    Glossary-only translator (no network calls): queries are translated as far as the catalog glossary allows.
+    """
+    return GlossaryTranslator.from_catalog(df)
+
+
+def _translator(loader, offline):
+    """
+    Return the translator for this run: glossary-only when offline, otherwise the loader's default.
+    """
+    if offline:
+        return loader.get_artifact("offline_translator", _offline_translator)
+    return loader.get_translator()
+
+
+def _init_worker(catalog_path, offline, top_n):
+    """
+    Pool initializer. With the fork start method the catalog and the prebuilt artifacts are inherited from the
+    parent (shared copy-on-write), so this only re-checks the file; otherwise each worker loads the catalog once
+    (columnar catalogs are memory-mapped and still shared through the page cache).
+    """
+    global _worker_loader, _worker_offline, _worker_top_n
+    _worker_loader = AssetLoader(df_path=catalog_path)
+    _worker_offline = offline
+    _worker_top_n = top_n
+
+
+def _run_request(request):
+    """
+    Run one request through the pipeline in a worker.
+
+    Returns:
+        tuple: (JSON output line, whether the request failed). Serialized in the worker, so the parent only writes.
+            Failures are reported in the row's 'error' field.
+    """
+    loader = _worker_loader
+    start = time.perf_counter()
+    output = {"id": request["id"], "query": request["query"], "catalog_version": loader.catalog_version}
+    try:
+        if request.get("error"):
+            raise ValueError(request["error"])
+        results_df = process_user_inputs(
+            user_query=request["query"],
+            user_budget=request["budget"],
+            user_gender=request["gender"],
+            user_target_groups=request["target_groups"],
+            df=loader.get_dataframe(),
+            search_index=loader.get_search_index(),
+            translator=_translator(loader, _worker_offline),
+            detector=loader.get_language_detector(),
+            catalog_version=loader.catalog_version,
+            top_n=_worker_top_n,
+            workers=1,  # parallelism comes from the process pool
+        )
+        columns = [col for col in API_RESULT_COLUMNS if col in results_df.columns]
+        output["results"] = json.loads(results_df[columns].to_json(orient="records", date_format="iso"))
+        output["error"] = None
+    except ValueError as e:
+        output["results"] = []
+        output["error"] = str(e)
+    except Exception as e:
+        # Any other failure is reported on its own row, so one bad request cannot abort the run
+        output["results"] = []
+        output["error"] = f"{type(e).__name__}: {e}"
+    output["seconds"] = round(time.perf_counter() - start, 6)
+    return json.dumps(output, ensure_ascii=False), output["error"] is not None
+
+
+def run_bulk(input_path, output_path, catalog_path=DEFAULT_CATALOG_PATH, workers=None, offline=False, top_n=20,
+             chunksize=8, progress_every=500):
+    """
+    Run every request of an input file and stream the results to a JSONL file, in input order.
+
+    Args:
+        input_path (str): JSONL or CSV file with search requests.
+        output_path (str): JSONL file to write.
+        catalog_path (str, optional): Catalog (pickle or columnar directory). Defaults to the app catalog.
+        workers (int, optional): Worker processes; 1 runs in-process. Defaults to the number of CPUs.
+        offline (bool, optional): Translate with the catalog glossary only, never calling Google. Defaults to False.
+        top_n (int, optional): Results per query. Defaults to 20.
+        chunksize (int, optional): Requests handed to a worker at a time. Defaults to 8.
+        progress_every (int, optional): Print throughput every this many queries (0 = never). Defaults to 500.
+
+    Returns:
+        dict: queries, errors, seconds, queries_per_second and workers.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    # Step 1: Load the catalog and build the shared artifacts once, before any worker starts
+    loader = AssetLoader(df_path=catalog_path)
+    loader.get_search_index()
+    loader.get_language_detector()
+    if offline:
+        loader.get_artifact("offline_translator", _offline_translator)
+
+    # Step 2: Run the requests, in-process or on a pool that inherits the loaded catalog
+    start = time.perf_counter()
+    count = errors = 0
+    requests = read_requests(input_path)
+    with open(output_path, "w", encoding="utf-8") as out:
+        if workers == 1:
+            _init_worker(catalog_path, offline, top_n)
+            lines = map(_run_request, requests)
+            pool = None
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            pool = context.Pool(workers, initializer=_init_worker, initargs=(catalog_path, offline, top_n))
+            lines = pool.imap(_run_request, requests, chunksize=chunksize)
+
+        try:
+            # Step 3: Stream results to disk as they arrive
+            for line, failed in lines:
+                out.write(line + "\n")
+                count += 1
+                errors += failed
+                if progress_every and count % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"⏱️ {count} queries, {count / elapsed:.1f} queries/s")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    seconds = time.perf_counter() - start
+    return {"queries": count, "errors": errors, "seconds": seconds,
+            "queries_per_second": count / seconds if seconds else 0.0, "workers": workers}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("input", help="JSONL or CSV file with search requests")
+    parser.add_argument("output", help="JSONL file for the results")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="catalog pickle or columnar directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--offline", action="store_true", help="glossary-only translation, no network calls")
+    parser.add_argument("--top-n", type=int, default=20, help="results per query")
+    args = parser.parse_args(argv)
+
+    summary = run_bulk(args.input, args.output, catalog_path=args.catalog, workers=args.workers,
+                       offline=args.offline, top_n=args.top_n)
+    print(f"✅ {summary['queries']} queries ({summary['errors']} errors) in {summary['seconds']:.1f} s "
+          f"with {summary['workers']} workers: {summary['queries_per_second']:.1f} queries/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from app.models.platform_ranker import PLATFORM_FLAG_COLUMNS, PLATFORM_FLAGS_COLUMN, PLATFORM_SCORE_COLUMNS
+
+# Raw text column -> pre-normalized column used by the matcher
+NORMALIZED_COLUMNS = {
+    'course_name_german': 'course_name_german_norm',
+    'course_name_translated': 'course_name_translated_norm',
+    'search_text': 'search_text_norm',
+}
+
+
+def normalize_text(value):
+    """
+    Normalize one catalog cell the way the matcher compares it: lists are joined with spaces,
+    missing values become empty strings and everything is lowercased.
+
+    Args:
+        value: A catalog cell (str, list of str, None or NaN).
+
+    Returns:
+        str: The normalized text.
+    """
+    if isinstance(value, list):
+        return " ".join(map(str, value)).lower()
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).lower()
+
+
+def add_search_columns(df):
+    """
+    Add the pre-normalized text columns listed in NORMALIZED_COLUMNS to a catalog frame.
+    Columns that are already present are left untouched.
+
+    Args:
+        df (pd.DataFrame): Catalog frame with the raw text columns.
+
+    Returns:
+        pd.DataFrame: The same frame, with the normalized columns added in place.
+    """
+    for raw_col, norm_col in NORMALIZED_COLUMNS.items():
+        if norm_col not in df.columns and raw_col in df.columns:
+            df[norm_col] = [normalize_text(v) for v in df[raw_col].to_numpy(dtype=object)]
+    return df
+
+
+def add_platform_features(df):
+    """
+    Add the query-independent platform ranking features used by PlatformPreferenceRanker:
+    one float32 numeric score per gender column (PLATFORM_SCORE_COLUMNS) and one uint32 bitmask per course
+    with the sponsorship and target-group flags (PLATFORM_FLAG_COLUMNS, bit i = i-th column).
+    Missing source values count as 0, as in the ranker; features whose source columns are absent are skipped.
+
+    Args:
+        df (pd.DataFrame): Catalog frame.
+
+    Returns:
+        pd.DataFrame: The same frame, with the feature columns added in place.
+    """
+    core_cols = ['prop_occupancy_left', 'prop_minimum_to_reach']
+    if all(col in df.columns for col in core_cols):
+        core = df[core_cols].fillna(0).to_numpy(dtype=np.float64).sum(axis=1)
+        for gender_col, score_col in PLATFORM_SCORE_COLUMNS.items():
+            if score_col not in df.columns and gender_col in df.columns:
+                df[score_col] = (core + df[gender_col].fillna(0).to_numpy(dtype=np.float64)).astype(np.float32)
+
+    if PLATFORM_FLAGS_COLUMN not in df.columns and 'sponsored' in df.columns:
+        flags = np.zeros(len(df), dtype=np.uint32)
+        for bit, col in enumerate(PLATFORM_FLAG_COLUMNS):
+            if col in df.columns:
+                flags |= (df[col].fillna(0).to_numpy() != 0).astype(np.uint32) << np.uint32(bit)
+        df[PLATFORM_FLAGS_COLUMN] = flags
+    return df
+
+
+def compile_catalog(df):
+    """
+    Run the one-off catalog compile step: derive every query-independent column the request pipeline needs,
+    so no per-request work is spent on data that only changes when the catalog is rebuilt.
+
+    Args:
+        df (pd.DataFrame): Freshly loaded catalog frame.
+
+    Returns:
+        pd.DataFrame: The compiled catalog frame.
+    """
+    df = add_search_columns(df)
+    return add_platform_features(df)
@@ -0,0 +1,143 @@
+import math
+
+# Fields shown on a course card in courses.html (plus the guid used as keyset cursor)
+CARD_COLUMNS = ['guid', 'course_name_translated', 'district', 'locations_address', 'price_amount',
+                'start_date', 'end_date', 'locations_appointments', 'number_of_sessions', 'website_uri',
+                'sponsored']
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _guid_positions(df):
+    """
+    Map every guid to its first row position in the catalog.
+    """
+    guids = df['guid'].tolist()
+    return dict(zip(reversed(guids), range(len(guids) - 1, -1, -1)))
+
+
+class CatalogPage:
+    """
+    One page of the catalog listing, with only the card fields projected.
+
+    Pages are addressed either by number (offset) or by a keyset cursor: the guid of the last course of the
+    previous page (after) or of the first course of the next page (before). Only numbered pages know their page
+    number; cursor pages carry their own neighbours' cursors instead, so they stay correct when the catalog or the
+    page size changes between requests. The records are produced lazily, so the page can be streamed into the template and a request
+    never materializes more than one page of rows, whatever the catalog size.
+    """
+
+    def __init__(self, loader, page=1, per_page=DEFAULT_PAGE_SIZE, after=None, before=None):
+        """
+        Select a page of the catalog.
+
+        Args:
+            loader (AssetLoader): Loader serving the catalog.
+            page (int, optional): 1-based page number, used when no cursor is given. Defaults to 1.
+            per_page (int, optional): Courses per page, capped at MAX_PAGE_SIZE. Defaults to DEFAULT_PAGE_SIZE.
+            after (str, optional): Keyset cursor: list the courses following this guid. Defaults to None.
+            before (str, optional): Keyset cursor: list the courses preceding this guid. Defaults to None.
+
+        Raises:
+            ValueError: If the page number or page size is not positive, both cursors are given, or a cursor is
+                unknown.
+        """
+        if page < 1 or per_page < 1:
+            raise ValueError("Page number and page size must be positive.")
+        if after and before:
+            raise ValueError("A page can only follow or precede one course.")
+
+        self.loader = loader
+        self.per_page = min(per_page, MAX_PAGE_SIZE)
+        self.columns = [col for col in CARD_COLUMNS if col in loader.columns]
+        self.total = loader.row_count
+
+        # Page number only for offset pages: a cursor's position says nothing about page boundaries
+        self.page = None
+        if after or before:
+            positions = loader.get_artifact("guid_positions", _guid_positions, columns=['guid'])
+            if (after or before) not in positions:
+                raise ValueError("Unknown page cursor. Please start again from the first page.")
+            if after:
+                self.start = positions[after] + 1
+                self.stop = min(self.start + self.per_page, self.total)
+            else:
+                self.stop = positions[before]
+                self.start = max(0, self.stop - self.per_page)
+        else:
+            self.page = page
+            self.start = (page - 1) * self.per_page
+            self.stop = min(self.start + self.per_page, self.total)
+
+    @classmethod
+    def from_request_args(cls, loader, args):
+        """
+        Build a page from query-string arguments (page, per_page, after, before).
+
+        Args:
+            loader (AssetLoader): Loader serving the catalog.
+            args (MultiDict): Request arguments.
+
+        Returns:
+            CatalogPage: The requested page.
+
+        Raises:
+            ValueError: If an argument is not a valid number or out of range.
+        """
+        try:
+            page = int(args.get("page", 1))
+            per_page = int(args.get("per_page", DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            raise ValueError("Page number and page size must be whole numbers.")
+        return cls(loader, page=page, per_page=per_page, after=args.get("after") or None,
+                   before=args.get("before") or None)
+
+    @property
+    def page_count(self):
+        """
+        int: Number of pages of this size in the catalog (at least 1).
+        """
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def has_prev(self):
+        """
+        bool: Whether courses precede this page.
+        """
+        return self.start > 0
+
+    @property
+    def has_next(self):
+        """
+        bool: Whether courses follow this page.
+        """
+        return self.stop < self.total
+
+    @property
+    def prev_cursor(self):
+        """
+        str: Keyset cursor of the previous page (guid of the first course on this page), or None on the first page.
+        """
+        if not self.has_prev or self.start >= self.total:
+            return None
+        return self.loader.get_rows(self.start, self.start + 1, ['guid'])['guid'].iat[0]
+
+    @property
+    def next_cursor(self):
+        """
+        str: Keyset cursor of the next page (guid of the last course on this page), or None on the last page.
+        """
+        if not self.has_next or self.stop <= self.start:
+            return None
+        return self.loader.get_rows(self.stop - 1, self.stop, ['guid'])['guid'].iat[0]
+
+    def records(self):
+        """
+        Yield the courses of this page as dicts of the card fields.
+
+        Yields:
+            dict: One course per page row.
+        """
+        rows = self.loader.get_rows(self.start, self.stop, self.columns)
+        yield from rows.to_dict(orient="records")
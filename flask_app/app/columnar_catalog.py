@@ -0,0 +1,327 @@
+"""
+Columnar on-disk format for the processed course catalog.
+
+A catalog is a directory with one file per column plus a ``manifest.json``:
+
+- numeric / boolean / datetime columns are stored as ``.npy`` arrays and opened with ``mmap_mode='r'``,
+  so every worker process maps the same page-cache pages instead of holding a private copy;
+- string columns are stored as a NUL-separated UTF-8 byte buffer plus an int64 offsets array
+  (and a null-kind array), all memory-mapped and only decoded when the column is first requested;
+- anything else (lists of dicts, keyword lists, ...) falls back to a pickled column loaded on demand.
+
+Convert an existing pickle with:
+
+    python -m app.columnar_catalog app/data/Processed_data_for_app.pkl app/data/Processed_data_for_app.cols
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+
+from app.catalog_compiler import compile_catalog
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_NAME = "vhs-columnar"
+FORMAT_VERSION = 1
+
+# Null kinds stored per row for string columns, so None and NaN round-trip unchanged
+_VALID, _NONE, _NAN = 0, 1, 2
+
+
+def is_columnar_catalog(path):
+    """
+    Check whether a path points at a columnar catalog directory.
+
+    Args:
+        path (str): Path to check.
+
+    Returns:
+        bool: True if the path is a directory containing a manifest.
+    """
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+def _is_string_column(series):
+    """
+    Return True if every non-null value of an object column is a str without NUL characters.
+    """
+    if series.dtype != object:
+        return False
+    values = series.dropna()
+    return all(isinstance(v, str) and "\x00" not in v for v in values)
+
+
+def _write_string_column(series, base_path):
+    """
+    Write a string column as a NUL-terminated UTF-8 byte buffer, an offsets array and a null-kind array.
+    The terminators let readers decode the whole column with one decode() and split() instead of per cell.
+    """
+    encoded = []
+    nulls = np.zeros(len(series), dtype=np.uint8)
+    for i, value in enumerate(series):
+        if isinstance(value, str):
+            encoded.append(value.encode("utf-8") + b"\x00")
+        else:
+            nulls[i] = _NONE if value is None else _NAN
+            encoded.append(b"\x00")
+
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    with open(base_path + ".bytes", "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(base_path + ".offsets.npy", offsets)
+    np.save(base_path + ".nulls.npy", nulls)
+
+
+def convert_pickle_to_columnar(pkl_path, out_dir):
+    """
+    Convert a pickled catalog DataFrame into the columnar format.
+    The catalog is compiled (see app.catalog_compiler) first, so the derived columns are stored as well.
+
+    The catalog is written into a temporary sibling directory and renamed into place at the end,
+    so a running app never sees a half-written catalog.
+
+    Args:
+        pkl_path (str): Path to the pickled DataFrame.
+        out_dir (str): Directory to create for the columnar catalog (replaced if it exists).
+
+    Returns:
+        dict: The manifest that was written.
+    """
+    with open(pkl_path, "rb") as f:
+        raw = f.read()
+    df = compile_catalog(pd.read_pickle(pkl_path))
+
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for pos, name in enumerate(df.columns):
+        series = df[name]
+        base = f"c{pos:04d}"
+        entry = {"name": name}
+
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufM":
+            np.save(os.path.join(tmp_dir, base + ".npy"), series.to_numpy())
+            entry.update(kind="numeric", file=base + ".npy")
+        elif _is_string_column(series):
+            _write_string_column(series, os.path.join(tmp_dir, base))
+            entry.update(kind="string", file=base)
+        else:
+            with open(os.path.join(tmp_dir, base + ".pkl"), "wb") as f:
+                pickle.dump(series.to_numpy(dtype=object), f, protocol=pickle.HIGHEST_PROTOCOL)
+            entry.update(kind="object", file=base + ".pkl")
+        columns.append(entry)
+
+    # Keep the index so filtered frames still line up with the pickle-based catalog
+    if isinstance(df.index, pd.RangeIndex):
+        index = {"kind": "range", "start": df.index.start, "stop": df.index.stop, "step": df.index.step}
+    else:
+        with open(os.path.join(tmp_dir, "index.pkl"), "wb") as f:
+            pickle.dump(df.index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        index = {"kind": "pickle", "file": "index.pkl"}
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "version": hashlib.sha256(raw).hexdigest()[:16],
+        "n_rows": len(df),
+        "index": index,
+        "columns": columns,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    # Move the old catalog aside before swapping the new one in, so out_dir is missing only between two renames
+    # (not for the whole delete); the old files are removed last
+    old_dir = out_dir.rstrip(os.sep) + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+class ColumnarCatalog:
+    """
+    Lazily opened columnar catalog. Only the manifest is read on construction;
+    columns are mapped (numeric) or decoded (strings, objects) the first time they are requested.
+    """
+
+    def __init__(self, path):
+        """
+        Open a columnar catalog directory.
+
+        Args:
+            path (str): Path to the catalog directory.
+
+        Raises:
+            FileNotFoundError: If the directory has no manifest.
+            ValueError: If the manifest is not a supported columnar catalog.
+        """
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"Columnar catalog manifest not found: {manifest_path}")
+
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get("format") != FORMAT_NAME or self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog format in {manifest_path}")
+
+        self.version = self.manifest["version"]
+        self.n_rows = self.manifest["n_rows"]
+        self.columns = [c["name"] for c in self.manifest["columns"]]
+        self._entries = {c["name"]: c for c in self.manifest["columns"]}
+        self._cache = {}
+        self._index = None
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_string_column(self, base):
+        """
+        Decode a string column from its memory-mapped byte buffer.
+        """
+        nulls = np.load(self._file(base + ".nulls.npy"), mmap_mode="r")
+        values = np.empty(len(nulls), dtype=object)
+        if len(nulls) == 0:
+            return values
+
+        data = np.memmap(self._file(base + ".bytes"), dtype=np.uint8, mode="r")
+        values[:] = data.tobytes().decode("utf-8").split("\x00")[:-1]
+
+        # Restore missing values (stored as empty cells) with their original null kind
+        values[nulls == _NONE] = None
+        values[nulls == _NAN] = np.nan
+        return values
+
+    def string_range(self, name, start, stop):
+        """
+        Decode a range of rows of a string column without decoding the whole column: only the bytes between the
+        range's offsets are read.
+
+        Args:
+            name (str): Name of a string column.
+            start (int): First row position.
+            stop (int): Row position after the last row (clipped like a slice).
+
+        Returns:
+            np.ndarray: Object array of the cell values (None/NaN for missing values).
+        """
+        rows = range(self.n_rows)[start:stop]
+        base = self._entries[name]["file"]
+        nulls = np.load(self._file(base + ".nulls.npy"), mmap_mode="r")[rows.start:rows.stop]
+        values = np.empty(len(nulls), dtype=object)
+        if len(nulls) == 0:
+            return values
+
+        offsets = np.load(self._file(base + ".offsets.npy"), mmap_mode="r")
+        data = np.memmap(self._file(base + ".bytes"), dtype=np.uint8, mode="r")
+        chunk = data[offsets[rows.start]:offsets[rows.stop]].tobytes()
+        values[:] = chunk.decode("utf-8").split("\x00")[:-1]
+        values[nulls == _NONE] = None
+        values[nulls == _NAN] = np.nan
+        return values
+
+    def column(self, name):
+        """
+        Return the values of one column, loading it on first access.
+
+        Args:
+            name (str): Column name.
+
+        Returns:
+            np.ndarray: Read-only memory-mapped array for numeric columns, object array otherwise.
+
+        Raises:
+            KeyError: If the column does not exist.
+        """
+        if name in self._cache:
+            return self._cache[name]
+
+        entry = self._entries[name]
+        if entry["kind"] == "numeric":
+            # Plain ndarray view over the mapping, so pandas never sees the memmap subclass
+            values = np.load(self._file(entry["file"]), mmap_mode="r").view(np.ndarray)
+        elif entry["kind"] == "string":
+            values = self._read_string_column(entry["file"])
+        else:
+            with open(self._file(entry["file"]), "rb") as f:
+                values = pickle.load(f)
+
+        self._cache[name] = values
+        return values
+
+    @property
+    def index(self):
+        """
+        pd.Index: Index of the original DataFrame.
+        """
+        if self._index is None:
+            spec = self.manifest["index"]
+            if spec["kind"] == "range":
+                self._index = pd.RangeIndex(spec["start"], spec["stop"], spec["step"])
+            else:
+                with open(self._file(spec["file"]), "rb") as f:
+                    self._index = pickle.load(f)
+        return self._index
+
+    def rows(self, start, stop, columns=None):
+        """
+        Assemble a range of rows, slicing every column before decoding it: numeric columns are sliced views of the
+        mapping and string columns decode only the range's bytes. Pickled columns have no row layout and are
+        loaded whole (once, then cached).
+
+        Args:
+            start (int): First row position.
+            stop (int): Row position after the last row (clipped like a slice).
+            columns (list, optional): Column names to include. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: The selected rows, with their original index labels.
+        """
+        rows = range(self.n_rows)[start:stop]
+        names = self.columns if columns is None else list(columns)
+        data = {}
+        for name in names:
+            entry = self._entries[name]
+            if name in self._cache or entry["kind"] == "object":
+                data[name] = self.column(name)[rows.start:rows.stop]
+            elif entry["kind"] == "numeric":
+                data[name] = np.load(self._file(entry["file"]), mmap_mode="r").view(np.ndarray)[rows.start:rows.stop]
+            else:
+                data[name] = self.string_range(name, rows.start, rows.stop)
+        return pd.DataFrame(data, index=self.index[rows.start:rows.stop], columns=names, copy=False)
+
+    def to_frame(self, columns=None):
+        """
+        Assemble a DataFrame from the requested columns without copying the memory-mapped ones.
+
+        Args:
+            columns (list, optional): Column names to include. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: Catalog frame backed by the mapped/decoded column arrays.
+        """
+        names = self.columns if columns is None else list(columns)
+        data = {name: self.column(name) for name in names}
+        return pd.DataFrame(data, index=self.index, columns=names, copy=False)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m app.columnar_catalog <input.pkl> <output_dir>")
+        sys.exit(1)
+
+    written = convert_pickle_to_columnar(sys.argv[1], sys.argv[2])
+    print(f"✅ Wrote {written['n_rows']} rows, {len(written['columns'])} columns "
+          f"(version {written['version']}) to {sys.argv[2]}")
@@ -0,0 +1,278 @@
+import math
+from collections import defaultdict
+import numpy as np
+
+from app.catalog_compiler import NORMALIZED_COLUMNS, add_search_columns
+
+# Columns indexed, in the same order the matcher scores them
+INDEX_COLUMNS = ['course_name_german', 'course_name_translated', 'search_text']
+
+
+def min_shared_qgrams(token_len, threshold, q=2):
+    """
+    Lower bound on the number of q-grams a token shares with any text it reaches
+    fuzz.partial_ratio >= threshold against (q-gram lemma, adapted to rapidfuzz's alignment windows).
+
+    partial_ratio compares the token (length m) with windows of the text of width w <= m
+    (full windows and the shorter ones at the start/end of the text). A window scores 200 * LCS / (m + w),
+    so reaching the threshold needs LCS >= threshold * (m + w) / 200. Every token character outside the
+    LCS breaks at most q of the token's q-grams and every gap inside the aligned window at most q - 1,
+    so at least (m - q + 1) - q * (m - LCS) - (q - 1) * (w - LCS) token q-grams appear in the window.
+
+    Args:
+        token_len (int): Length m of the search token.
+        threshold (float): partial_ratio threshold (0–100).
+        q (int): Gram length.
+
+    Returns:
+        int: Minimum number of shared q-gram positions (<= 0 means the index cannot prune for this token).
+            For q=1 this is simply the minimum LCS length.
+    """
+    if threshold <= 0 or token_len < q:
+        return 0
+
+    bound = None
+    for w in range(1, token_len + 1):
+        lcs = math.ceil(threshold * (token_len + w) / 200 - 1e-9)
+        if lcs > w:
+            continue  # this window width can never reach the threshold
+        killed = q * (token_len - lcs) + (q - 1) * (w - lcs)
+        shared = (token_len - q + 1) - killed
+        bound = shared if bound is None else min(bound, shared)
+
+    return 0 if bound is None else bound
+
+
+def max_token_set_length(token_len, threshold):
+    """
+    Longest sorted-word text a single token can reach fuzz.token_set_ratio >= threshold against
+    without appearing in it as a whole word.
+
+    Without a shared word, token_set_ratio is ratio(token, sorted words of the text) = 200 * LCS / (m + n),
+    and LCS <= m, so n <= 200 * m / threshold - m.
+
+    Args:
+        token_len (int): Length m of the search token.
+        threshold (float): token_set_ratio threshold (0–100).
+
+    Returns:
+        float: Maximum length n of the joined sorted unique words of a matching text (inf if unbounded).
+    """
+    if threshold <= 0:
+        return math.inf
+    return 200 * token_len / threshold - token_len + 1e-9
+
+
+class NgramIndex:
+    """
+    Inverted index over the normalized course text used to generate candidate rows before fuzzy scoring.
+
+    For every match column it stores character unigram and bigram postings (for multi-word queries scored with
+    partial_ratio) and whole-word postings plus sorted-word lengths (for single-word queries scored with
+    token_set_ratio). The candidate set is a guaranteed superset of the rows CourseMatcher would keep for the
+    same thresholds, so the matcher only has to rescore the candidates exactly.
+    """
+
+    def __init__(self, column_texts, gram_sizes=(1, 2)):
+        """
+        Build the index.
+
+        Args:
+            column_texts (list[list[str]]): For each match column, the normalized text of every row
+                (all columns must have the same number of rows).
+            gram_sizes (tuple, optional): Gram lengths to index. Each one is a separate necessary condition.
+                With the default partial threshold of 75, trigrams never give a positive bound from
+                min_shared_qgrams, so unigrams and bigrams are indexed by default.
+        """
+        self.gram_sizes = tuple(gram_sizes)
+        self.n_columns = len(column_texts)
+        self.n_rows = len(column_texts[0]) if column_texts else 0
+
+        # Documents are laid out column by column: doc = column * n_rows + row
+        docs = [text for texts in column_texts for text in texts]
+        self.n_docs = len(docs)
+        self.doc_lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=self.n_docs)
+
+        self._postings = {q: self._build_gram_postings(docs, q) for q in self.gram_sizes}
+        self._build_word_postings(docs)
+
+    @classmethod
+    def from_catalog(cls, df, gram_sizes=(1, 2)):
+        """
+        Build the index from a catalog frame, using its pre-normalized text columns.
+
+        Args:
+            df (pd.DataFrame): Catalog frame (compiled or raw).
+            gram_sizes (tuple, optional): Gram lengths to index. Defaults to (1, 2).
+
+        Returns:
+            NgramIndex: The built index.
+        """
+        if not all(NORMALIZED_COLUMNS[col] in df.columns for col in INDEX_COLUMNS):
+            df = add_search_columns(df.copy(deep=False))
+        return cls([df[NORMALIZED_COLUMNS[col]].tolist() for col in INDEX_COLUMNS], gram_sizes=gram_sizes)
+
+    @staticmethod
+    def _gram_keys(codes, q):
+        """
+        Pack consecutive code points of a uint32 array into one integer key per q-gram.
+        """
+        keys = np.zeros(max(len(codes) - q + 1, 0), dtype=np.uint64)
+        for offset in range(q):
+            keys = (keys << np.uint64(21)) | codes[offset:len(codes) - q + 1 + offset].astype(np.uint64)
+        return keys
+
+    def _chunk_pairs(self, docs, first_doc, q):
+        """
+        Return the unique (gram key, doc id) pairs of a slice of documents, sorted by key then doc.
+        """
+        # NUL separates documents; it never occurs inside normalized course text
+        joined = "\x00".join(d.replace("\x00", " ") for d in docs) + "\x00"
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+        separators = codes == 0
+        doc_of_char = np.cumsum(separators) - separators + first_doc
+
+        keys = self._gram_keys(codes, q)
+        valid = np.ones(len(keys), dtype=bool)
+        for offset in range(q):
+            valid &= ~separators[offset:len(codes) - q + 1 + offset]
+        keys = keys[valid]
+        doc_ids = doc_of_char[:len(valid)][valid].astype(np.int32)
+
+        order = np.lexsort((doc_ids, keys))
+        keys, doc_ids = keys[order], doc_ids[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (doc_ids[1:] != doc_ids[:-1])
+        return keys[keep], doc_ids[keep]
+
+    def _build_gram_postings(self, docs, q, chunk_size=200_000):
+        """
+        Build sorted (gram key -> doc ids) postings with NumPy, without a Python loop per gram.
+        Documents are processed in chunks to bound the peak memory of the build.
+
+        Returns:
+            tuple: (sorted unique gram keys, offsets into doc ids, doc ids grouped by gram)
+        """
+        chunks = [self._chunk_pairs(docs[i:i + chunk_size], i, q) for i in range(0, len(docs), chunk_size)]
+        if not chunks:
+            return np.zeros(0, dtype=np.uint64), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32)
+
+        keys = np.concatenate([c[0] for c in chunks])
+        doc_ids = np.concatenate([c[1] for c in chunks])
+        del chunks
+
+        # Chunks are in doc order, so a stable sort by key keeps the doc ids of each gram sorted
+        order = np.argsort(keys, kind="stable")
+        keys, doc_ids = keys[order], doc_ids[order]
+        del order
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+        return keys[starts], np.r_[starts, len(keys)].astype(np.int64), doc_ids
+
+    def _build_word_postings(self, docs):
+        """
+        Build whole-word postings and the length of each document's sorted unique words joined by spaces
+        (the string token_set_ratio compares a single token against when no word is shared).
+        """
+        postings = defaultdict(list)
+        sorted_lengths = np.zeros(self.n_docs, dtype=np.int64)
+        for doc_id, text in enumerate(docs):
+            words = set(text.split())
+            if words:
+                sorted_lengths[doc_id] = sum(len(w) for w in words) + len(words) - 1
+            for word in words:
+                postings[word].append(doc_id)
+
+        self._word_docs = {word: np.asarray(ids, dtype=np.int32) for word, ids in postings.items()}
+        self._sorted_lengths = sorted_lengths
+
+    def _shared_grams(self, token, q):
+        """
+        Count, for every doc, how many distinct q-grams of the token it contains.
+
+        Returns:
+            tuple: (counts per doc, number of q-gram positions in the token minus distinct q-grams)
+        """
+        keys_sorted, offsets, doc_ids = self._postings[q]
+        codes = np.frombuffer(token.encode("utf-32-le"), dtype=np.uint32)
+        all_keys = self._gram_keys(codes, q)
+        token_keys = np.unique(all_keys)
+
+        pos = np.searchsorted(keys_sorted, token_keys)
+        lists = [doc_ids[offsets[p]:offsets[p + 1]] for p, key in zip(pos, token_keys)
+                 if p < len(keys_sorted) and keys_sorted[p] == key]
+        counts = np.bincount(np.concatenate(lists), minlength=self.n_docs) if lists else np.zeros(self.n_docs, dtype=np.int64)
+        return counts, len(all_keys) - len(token_keys)
+
+    def _partial_candidates(self, token, threshold):
+        """
+        Docs that may reach partial_ratio >= threshold for one token, or None if the token cannot be pruned.
+        """
+        m = len(token)
+        candidates = None
+        for q in self.gram_sizes:
+            if m < q:
+                continue
+            # Repeated grams in the token only count once in the posting counts
+            counts, repeated = self._shared_grams(token, q)
+            need = min_shared_qgrams(m, threshold, q) - repeated
+            if need > 0:
+                passes = counts >= need
+                candidates = passes if candidates is None else candidates & passes
+
+        if candidates is None:
+            return None
+
+        # Texts not longer than the token can swap roles inside partial_ratio, so the bound does not apply to them
+        candidates |= (self.doc_lengths <= m) & (self.doc_lengths > 0)
+        return candidates
+
+    def _token_set_candidates(self, token, threshold):
+        """
+        Docs that may reach token_set_ratio >= threshold for one token.
+        """
+        m = len(token)
+        candidates = (self._sorted_lengths <= max_token_set_length(m, threshold)) & (self._sorted_lengths > 0)
+
+        # A short text still needs LCS >= threshold * (m + n) / 200 characters of the token
+        if 1 in self.gram_sizes and threshold > 0:
+            counts, repeated = self._shared_grams(token, 1)
+            need = np.ceil(threshold * (m + self._sorted_lengths) / 200 - 1e-9) - repeated
+            candidates &= counts >= need
+
+        docs = self._word_docs.get(token)
+        if docs is not None:
+            candidates[docs] = True
+        return candidates
+
+    def candidates(self, tokens, use_partial, partial_threshold=75, token_set_threshold=60,
+                   max_candidate_share=0.6):
+        """
+        Return the rows that may match any token in any indexed column.
+
+        Args:
+            tokens (list[str]): Lowercased search tokens.
+            use_partial (bool): Whether the matcher scores with partial_ratio (multi-word) or token_set_ratio.
+            partial_threshold (int): Threshold used with partial_ratio.
+            token_set_threshold (int): Threshold used with token_set_ratio.
+            max_candidate_share (float, optional): Above this share of rows, gathering the candidates costs
+                more than it saves and None is returned instead. Defaults to 0.6.
+
+        Returns:
+            np.ndarray or None: Boolean mask over catalog rows, or None if some token cannot be pruned
+            and every row has to be scored.
+        """
+        docs = np.zeros(self.n_docs, dtype=bool)
+        for token in tokens:
+            if use_partial:
+                token_docs = self._partial_candidates(token, partial_threshold)
+                if token_docs is None:
+                    return None
+            else:
+                token_docs = self._token_set_candidates(token, token_set_threshold)
+            docs |= token_docs
+
+        rows = docs.reshape(self.n_columns, self.n_rows).any(axis=0)
+        if rows.mean() > max_candidate_share:
+            return None
+        return rows
@@ -1,32 +1,83 @@
-import itertools
+import numpy as np
 import pandas as pd
-import pulp
+
+from app.models.kemeny import get_engine
 
 class ConsensusRanker:
     """
-    Class to compute a consensus ranking from two ranked lists (user and platform)
-    using a Kemeny-Young voting model solved via integer linear programming.
+    Class to compute a consensus ranking from several ranked lists (user, platform and any additional voters)
+    using a weighted Kemeny-Young voting model. The optimization itself is done by a pluggable engine
+    (see app.models.kemeny): exact for small problems, bounded-time local search for large ones.
     """
 
-    def __init__(self, user_df: pd.DataFrame, platform_df: pd.DataFrame):
+    def __init__(self, user_df: pd.DataFrame, platform_df: pd.DataFrame, engine=None,
+                 additional_rankings=None, weights=None):
         """
         Initialize the ranker with user and platform rankings.
 
         Args:
             user_df (pd.DataFrame): DataFrame with user rankings. Must include 'guid' column.
             platform_df (pd.DataFrame): DataFrame with platform rankings. Must include 'guid' column.
+            engine (str or object, optional): Consensus engine name ('auto', 'dp', 'local_search', 'ilp')
+                or instance. Defaults to 'auto'.
+            additional_rankings (list, optional): Further voters, each a DataFrame with a 'guid' column or a list
+                of GUIDs, ordered best first (e.g. a sponsor ranking). Defaults to None.
+            weights (list[float], optional): One weight per voter, in the order user, platform, additional
+                rankings. Defaults to equal weights summing to 1.
 
         Raises:
-            ValueError: If the GUIDs in user and platform data do not match.
+            ValueError: If the GUIDs of the rankings do not match, or the number of weights is wrong.
         """
         self.user_df = user_df
         self.platform_df = platform_df
         self.user_order = list(user_df['guid'])
         self.platform_order = list(platform_df['guid'])
+        self.engine = get_engine(engine)
+        self.result = None
 
         if set(self.user_order) != set(self.platform_order):
             raise ValueError("user_order and platform_order must contain the same GUIDs")
 
+        self.rankings = [self.user_order, self.platform_order]
+        for ranking in additional_rankings or []:
+            order = list(ranking['guid']) if isinstance(ranking, pd.DataFrame) else list(ranking)
+            if len(order) != len(self.user_order) or set(order) != set(self.user_order):
+                raise ValueError("Every additional ranking must contain the same GUIDs as user_order")
+            self.rankings.append(order)
+
+        if weights is None:
+            weights = [1 / len(self.rankings)] * len(self.rankings)
+        if len(weights) != len(self.rankings):
+            raise ValueError(f"Expected {len(self.rankings)} weights (one per ranking), got {len(weights)}")
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+    def margin_matrix(self):
+        """
+        Build the pairwise preference matrix of all voters in one array operation.
+
+        Each voter casts +weight for "i before j" and -weight otherwise. A positive total becomes the weight
+        of preferring i over j; a tie gets a small weight of 0.1 in both directions.
+
+        Returns:
+            np.ndarray: n x n matrix over user_order, entry [i, j] = weight of ranking i above j.
+        """
+        courses = pd.Index(self.user_order)
+        # positions[v, i] = rank of course i in voter v's list
+        positions = np.empty((len(self.rankings), len(courses)), dtype=np.int64)
+        for v, order in enumerate(self.rankings):
+            positions[v, courses.get_indexer(order)] = np.arange(len(order))
+
+        # Step 1: votes[i, j] = sum over voters of weight * (+1 if i is above j, else -1)
+        signs = np.sign(positions[:, None, :] - positions[:, :, None])
+        votes = np.tensordot(self.weights, signs, axes=1)
+
+        # Step 2: Keep the winning direction of each pair; ties get a small bidirectional weight
+        margins = np.where(votes > 0, votes, 0.0)
+        ties = np.isclose(votes, 0.0, atol=1e-12)
+        np.fill_diagonal(ties, False)
+        margins[ties] = 0.1
+        return margins
+
     def compute_consensus(self):
         """
         Compute a consensus ranking based on weighted pairwise preferences.
@@ -34,51 +85,8 @@ class ConsensusRanker:
         Returns:
             list: A list of GUIDs in the consensus order.
         """
-        courses = self.user_order
-        user_rank = {c: i for i, c in enumerate(self.user_order)}
-        platform_rank = {c: i for i, c in enumerate(self.platform_order)}
-        w_user, w_plat = 0.5, 0.5  # Equal weight for user and platform input
-
-        # Step 1: Build margin preferences based on both ranks
-        margins = {}
-        for i, j in itertools.combinations(courses, 2):
-            sign_user = 1 if user_rank[i] < user_rank[j] else -1
-            sign_plat = 1 if platform_rank[i] < platform_rank[j] else -1
-            vote = w_user * sign_user + w_plat * sign_plat
-
-            if vote > 0:
-                margins[(i, j)] = abs(vote)
-            elif vote < 0:
-                margins[(j, i)] = abs(vote)
-            else:
-                # Tie case: small bidirectional weight to avoid zero
-                margins[(i, j)] = 0.1
-                margins[(j, i)] = 0.1
-
-        # Step 2: Set up ILP using PuLP
-        model = pulp.LpProblem("Kemeny", pulp.LpMinimize)
-        x = pulp.LpVariable.dicts('x', (courses, courses), 0, 1, cat='Binary')
-
-        # Objective: Minimize total disagreement with the margins
-        model += pulp.lpSum(weight * x[j][i] for (i, j), weight in margins.items())
-
-        # Constraint: one must be ranked higher (antisymmetry)
-        for i, j in itertools.permutations(courses, 2):
-            model += x[i][j] + x[j][i] == 1
-
-        # Constraint: transitivity
-        for i, j, k in itertools.permutations(courses, 3):
-            model += x[i][j] + x[j][k] + x[k][i] >= 1
-
-        model.solve(pulp.PULP_CBC_CMD(msg=False))
-
-        # Step 3: Derive order by counting how often each course is ranked above others
-        consensus_order = sorted(
-            courses,
-            key=lambda c: sum(x[c][d].value() for d in courses if d != c),
-            reverse=True
-        )
-        return consensus_order
+        self.result = self.engine.solve(self.margin_matrix())
+        return [self.user_order[i] for i in self.result.order]
 
     def get_ranked_df(self):
         """
@@ -88,8 +96,5 @@ class ConsensusRanker:
             pd.DataFrame: Sorted copy of user_df based on consensus rank.
         """
         consensus_order = self.compute_consensus()
-        df = self.user_df.copy()
-        df['__rank__'] = df['guid'].apply(lambda x: consensus_order.index(x))
-        df.sort_values(by='__rank__', inplace=True)
-        df.drop(columns='__rank__', inplace=True)
-        return df
+        ranks = pd.Index(consensus_order).get_indexer(self.user_df['guid'])
+        return self.user_df.iloc[np.argsort(ranks, kind="stable")].copy()
@@ -0,0 +1,393 @@
+import time
+import itertools
+import numpy as np
+
+
+def kemeny_cost(weights, order):
+    """
+    Total disagreement of an order with a pairwise preference matrix.
+
+    Args:
+        weights (np.ndarray): n x n matrix, weights[i, j] = weight of the preference "i before j".
+        order (sequence[int]): Item indices from first to last.
+
+    Returns:
+        float: Sum of weights[i, j] over all pairs where j is placed before i.
+    """
+    order = np.asarray(order, dtype=np.int64)
+    permuted = weights[np.ix_(order, order)]
+    # Lower triangle = preferences of later items over earlier ones, i.e. the violated ones
+    return float(np.tril(permuted, -1).sum())
+
+
+def kemeny_lower_bound(weights):
+    """
+    Lower bound on the Kemeny cost: every pair pays at least its smaller preference weight.
+
+    Args:
+        weights (np.ndarray): n x n preference matrix.
+
+    Returns:
+        float: Sum of min(weights[i, j], weights[j, i]) over all pairs i < j.
+    """
+    return float(np.triu(np.minimum(weights, weights.T), 1).sum())
+
+
+class KemenyResult:
+    """
+    Outcome of a consensus engine run.
+    """
+
+    def __init__(self, order, cost, lower_bound, exact, engine, seconds):
+        """
+        Args:
+            order (list[int]): Item indices in consensus order.
+            cost (float): Kemeny cost of the order.
+            lower_bound (float): Proven lower bound on the optimal cost (equal to cost when exact).
+            exact (bool): Whether the order is proven optimal.
+            engine (str): Name of the engine that produced the order.
+            seconds (float): Wall-clock solve time.
+        """
+        self.order = order
+        self.cost = cost
+        self.lower_bound = lower_bound
+        self.exact = exact
+        self.engine = engine
+        self.seconds = seconds
+
+    @property
+    def gap(self):
+        """
+        float: Relative optimality gap (cost - lower bound) / cost, 0 when the order is proven optimal.
+        """
+        if self.exact or self.cost <= 0:
+            return 0.0
+        return max(0.0, (self.cost - self.lower_bound) / self.cost)
+
+    def __repr__(self):
+        return (f"KemenyResult(engine={self.engine!r}, n={len(self.order)}, cost={self.cost:.4f}, "
+                f"gap={self.gap:.2%}, exact={self.exact}, seconds={self.seconds:.4f})")
+
+
+def borda_order(weights):
+    """
+    Order items by their total preference weight over all others (weighted Borda count).
+    Ties keep the original item order, so the result is deterministic.
+
+    Args:
+        weights (np.ndarray): n x n preference matrix.
+
+    Returns:
+        list[int]: Item indices, best first.
+    """
+    return np.argsort(-(weights.sum(axis=1) - weights.sum(axis=0)), kind="stable").tolist()
+
+
+class DynamicProgrammingEngine:
+    """
+    Exact Kemeny solver over subsets (Held–Karp style bitmask dynamic program).
+
+    best[S] is the cheapest cost of placing the item set S first; appending item k after S costs the weight of
+    every preference of k over an item in S. Subsets are processed layer by layer (by size) with NumPy, so the
+    run time is O(2^n * n) array work and no external solver is involved.
+    """
+
+    name = "dp"
+
+    def __init__(self, max_n=16):
+        """
+        Args:
+            max_n (int, optional): Largest problem solved (memory grows as 2^n * n). Defaults to 16.
+        """
+        self.max_n = max_n
+
+    def solve(self, weights):
+        """
+        Compute an optimal Kemeny order.
+
+        Args:
+            weights (np.ndarray): n x n preference matrix.
+
+        Returns:
+            KemenyResult: The optimal order.
+
+        Raises:
+            ValueError: If the problem is larger than max_n.
+        """
+        start = time.perf_counter()
+        weights = np.asarray(weights, dtype=np.float64)
+        n = len(weights)
+        if n > self.max_n:
+            raise ValueError(f"DynamicProgrammingEngine supports at most {self.max_n} items, got {n}")
+        if n <= 1:
+            return KemenyResult(list(range(n)), 0.0, 0.0, True, self.name, time.perf_counter() - start)
+
+        subsets = np.arange(1 << n, dtype=np.int64)
+        members = ((subsets[:, None] >> np.arange(n)) & 1).astype(np.float64)
+        # append_cost[S, k] = cost of placing k directly after the set S = sum of weights[k, i] for i in S
+        append_cost = members @ weights.T
+        sizes = members.sum(axis=1).astype(np.int64)
+
+        best = np.full(1 << n, np.inf)
+        best[0] = 0.0
+        last = np.zeros(1 << n, dtype=np.int64)
+        for size in range(1, n + 1):
+            layer = subsets[sizes == size]
+            layer_best = np.full(len(layer), np.inf)
+            layer_last = np.zeros(len(layer), dtype=np.int64)
+            for k in range(n):
+                bit = 1 << k
+                has_k = (layer & bit) != 0
+                previous = layer[has_k] ^ bit
+                candidate = best[previous] + append_cost[previous, k]
+                improved = candidate < layer_best[has_k]
+                idx = np.flatnonzero(has_k)[improved]
+                layer_best[idx] = candidate[improved]
+                layer_last[idx] = k
+            best[layer] = layer_best
+            last[layer] = layer_last
+
+        order = []
+        subset = (1 << n) - 1
+        while subset:
+            k = int(last[subset])
+            order.append(k)
+            subset ^= 1 << k
+        order.reverse()
+
+        cost = float(best[-1])
+        return KemenyResult(order, cost, cost, True, self.name, time.perf_counter() - start)
+
+
+class LocalSearchEngine:
+    """
+    Bounded-time Kemeny heuristic: start from the weighted Borda order and apply best-insertion moves
+    (take one item out and reinsert it at its cheapest position) until no move improves or time runs out.
+    The result reports its gap to the pairwise lower bound.
+    """
+
+    name = "local_search"
+
+    def __init__(self, time_limit=0.05, max_passes=100):
+        """
+        Args:
+            time_limit (float, optional): Seconds of improvement work allowed. Defaults to 0.05.
+            max_passes (int, optional): Maximum number of passes over all items. Defaults to 100.
+        """
+        self.time_limit = time_limit
+        self.max_passes = max_passes
+
+    @staticmethod
+    def _best_insertion(weights, order, pos):
+        """
+        Return (delta, new position) of the best move of order[pos], delta < 0 meaning an improvement.
+        """
+        x = order[pos]
+        # Moving x in front of y swaps the paid weight of the pair from weights[x, y] to weights[y, x]
+        swap = weights[order, x] - weights[x, order]
+
+        best_delta, best_pos = 0.0, pos
+        if pos > 0:
+            # Move to q < pos: x jumps over order[q:pos]
+            left = np.cumsum(swap[pos - 1::-1])[::-1]
+            q = int(np.argmin(left))
+            if left[q] < best_delta - 1e-12:
+                best_delta, best_pos = float(left[q]), q
+        if pos < len(order) - 1:
+            # Move to q > pos: x jumps behind order[pos+1:q+1]
+            right = np.cumsum(-swap[pos + 1:])
+            q = int(np.argmin(right))
+            if right[q] < best_delta - 1e-12:
+                best_delta, best_pos = float(right[q]), pos + 1 + q
+        return best_delta, best_pos
+
+    def solve(self, weights, initial_order=None):
+        """
+        Compute a good (not necessarily optimal) Kemeny order.
+
+        Args:
+            weights (np.ndarray): n x n preference matrix.
+            initial_order (list[int], optional): Starting order. Defaults to the weighted Borda order.
+
+        Returns:
+            KemenyResult: The improved order, with its lower bound and gap.
+        """
+        start = time.perf_counter()
+        weights = np.asarray(weights, dtype=np.float64)
+        order = list(initial_order) if initial_order is not None else borda_order(weights)
+        lower_bound = kemeny_lower_bound(weights)
+        cost = kemeny_cost(weights, order)
+
+        deadline = start + self.time_limit
+        for _ in range(self.max_passes):
+            improved = False
+            pos = 0
+            while pos < len(order):
+                if cost - lower_bound <= 1e-12 or time.perf_counter() > deadline:
+                    break
+                delta, new_pos = self._best_insertion(weights, np.asarray(order), pos)
+                if delta < 0:
+                    order.insert(new_pos, order.pop(pos))
+                    cost += delta
+                    improved = True
+                pos += 1
+            if not improved or cost - lower_bound <= 1e-12 or time.perf_counter() > deadline:
+                break
+
+        cost = kemeny_cost(weights, order)
+        exact = cost - lower_bound <= 1e-9
+        return KemenyResult(order, cost, lower_bound, exact, self.name, time.perf_counter() - start)
+
+
+class ILPEngine:
+    """
+    Exact Kemeny solver through the original integer linear program (n^2 binaries, n^3 transitivity
+    constraints) solved by CBC. Slow; kept to validate the other engines.
+    """
+
+    name = "ilp"
+
+    def solve(self, weights):
+        """
+        Compute an optimal Kemeny order with PuLP/CBC.
+
+        Args:
+            weights (np.ndarray): n x n preference matrix.
+
+        Returns:
+            KemenyResult: The optimal order.
+        """
+        import pulp
+
+        start = time.perf_counter()
+        weights = np.asarray(weights, dtype=np.float64)
+        items = range(len(weights))
+
+        model = pulp.LpProblem("Kemeny", pulp.LpMinimize)
+        x = pulp.LpVariable.dicts('x', (items, items), 0, 1, cat='Binary')
+
+        # Objective: Minimize total disagreement with the preferences
+        model += pulp.lpSum(weights[i, j] * x[j][i] for i, j in itertools.permutations(items, 2) if weights[i, j])
+
+        # Constraint: one must be ranked higher (antisymmetry)
+        for i, j in itertools.permutations(items, 2):
+            model += x[i][j] + x[j][i] == 1
+
+        # Constraint: transitivity
+        for i, j, k in itertools.permutations(items, 3):
+            model += x[i][j] + x[j][k] + x[k][i] >= 1
+
+        model.solve(pulp.PULP_CBC_CMD(msg=False))
+
+        order = sorted(items, key=lambda c: sum(x[c][d].value() for d in items if d != c), reverse=True)
+        cost = kemeny_cost(weights, order)
+        return KemenyResult(order, cost, cost, True, self.name, time.perf_counter() - start)
+
+
+def majority_components(weights):
+    """
+    Split items into the strongly connected components of the majority graph, in consensus order.
+
+    There is an edge i -> j unless j is strictly preferred to i. Between two components every item of the
+    earlier one is strictly preferred to every item of the later one, so by the extended Condorcet criterion
+    every Kemeny-optimal order places the components in this order and each can be solved on its own.
+
+    Args:
+        weights (np.ndarray): n x n preference matrix.
+
+    Returns:
+        list[np.ndarray]: Item indices of each component, earliest component first.
+    """
+    n = len(weights)
+    reach = (weights >= weights.T) | np.eye(n, dtype=bool)
+    # Transitive closure by repeated squaring
+    for _ in range(max(1, int(np.ceil(np.log2(max(n, 2)))))):
+        grown = reach | ((reach.astype(np.float32) @ reach.astype(np.float32)) > 0)
+        if np.array_equal(grown, reach):
+            break
+        reach = grown
+
+    component_of = np.full(n, -1, dtype=np.int64)
+    components = []
+    for i in range(n):
+        if component_of[i] < 0:
+            members = np.flatnonzero(reach[i] & reach[:, i])
+            component_of[members] = len(components)
+            components.append(members)
+
+    # Components form a chain; an earlier component reaches every later one
+    components.sort(key=lambda members: -int(reach[members[0]].sum()))
+    return components
+
+
+class DecomposingEngine:
+    """
+    Default consensus engine: split the problem into majority-graph components, solve small components exactly
+    with the dynamic program and larger ones with the bounded local search.
+    """
+
+    name = "auto"
+
+    def __init__(self, exact_max_n=14, heuristic=None):
+        """
+        Args:
+            exact_max_n (int, optional): Largest component solved exactly. Defaults to 14.
+            heuristic (LocalSearchEngine, optional): Engine for larger components. Defaults to LocalSearchEngine().
+        """
+        self.exact = DynamicProgrammingEngine(max_n=exact_max_n)
+        self.heuristic = heuristic if heuristic is not None else LocalSearchEngine()
+
+    def solve(self, weights):
+        """
+        Compute a Kemeny order, exactly where the component sizes allow it.
+
+        Args:
+            weights (np.ndarray): n x n preference matrix.
+
+        Returns:
+            KemenyResult: The consensus order; exact is True only if every component was solved to optimality.
+        """
+        start = time.perf_counter()
+        weights = np.asarray(weights, dtype=np.float64)
+
+        order, exact = [], True
+        for members in majority_components(weights):
+            sub = weights[np.ix_(members, members)]
+            engine = self.exact if len(members) <= self.exact.max_n else self.heuristic
+            result = engine.solve(sub)
+            order.extend(members[result.order].tolist())
+            exact = exact and result.exact
+
+        cost = kemeny_cost(weights, order)
+        lower_bound = cost if exact else kemeny_lower_bound(weights)
+        return KemenyResult(order, cost, lower_bound, exact, self.name, time.perf_counter() - start)
+
+
+ENGINES = {
+    "auto": DecomposingEngine,
+    "dp": DynamicProgrammingEngine,
+    "local_search": LocalSearchEngine,
+    "ilp": ILPEngine,
+}
+
+
+def get_engine(engine):
+    """
+    Resolve an engine name or instance.
+
+    Args:
+        engine (str or object): Engine name from ENGINES or an object with a solve(weights) method.
+
+    Returns:
+        object: Engine instance.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if engine is None:
+        return DecomposingEngine()
+    if isinstance(engine, str):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown consensus engine '{engine}'. Choose from: {', '.join(ENGINES)}")
+        return ENGINES[engine]()
+    return engine
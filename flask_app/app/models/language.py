@@ -0,0 +1,132 @@
+import math
+from collections import Counter
+
+from app.catalog_compiler import normalize_text
+
+
+def char_ngrams(text, orders=(1, 2, 3)):
+    """
+    Yield the character n-grams of a lowercased text, with each word padded by spaces.
+
+    Args:
+        text (str): Input text.
+        orders (tuple, optional): N-gram lengths. Defaults to (1, 2, 3).
+
+    Yields:
+        str: Character n-grams.
+    """
+    for word in text.lower().split():
+        padded = f" {word} "
+        for n in orders:
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                if gram != " ":
+                    yield gram
+
+
+class CatalogLanguageDetector:
+    """
+    Deterministic German/English language identifier trained on the catalog itself:
+    a naive Bayes model over character 1–3-grams of the German course text and the translated English names.
+
+    Only the log-likelihood ratio of each n-gram is kept, so detection is one dictionary lookup per n-gram.
+    """
+
+    def __init__(self, log_ratios, prior=0.0, orders=(1, 2, 3)):
+        """
+        Initialize the detector.
+
+        Args:
+            log_ratios (dict): n-gram -> log P(gram | de) - log P(gram | en).
+            prior (float, optional): log P(de) - log P(en). Defaults to 0 (no preference).
+            orders (tuple, optional): N-gram lengths used in training. Defaults to (1, 2, 3).
+        """
+        self.log_ratios = log_ratios
+        self.prior = prior
+        self.orders = orders
+
+    @classmethod
+    def from_texts(cls, german_texts, english_texts, orders=(1, 2, 3), alpha=0.5, min_count=2):
+        """
+        Train the detector from German and English example texts.
+
+        Args:
+            german_texts (iterable): German texts.
+            english_texts (iterable): English texts.
+            orders (tuple, optional): N-gram lengths. Defaults to (1, 2, 3).
+            alpha (float, optional): Additive smoothing. Defaults to 0.5.
+            min_count (int, optional): Drop n-grams seen fewer times in total. Defaults to 2.
+
+        Returns:
+            CatalogLanguageDetector: The trained detector.
+        """
+        counts = {}
+        for lang, texts in (("de", german_texts), ("en", english_texts)):
+            counter = Counter()
+            for text in texts:
+                counter.update(char_ngrams(text, orders))
+            counts[lang] = counter
+
+        vocabulary = {g for g in counts["de"].keys() | counts["en"].keys()
+                      if counts["de"][g] + counts["en"][g] >= min_count}
+        total_de = sum(counts["de"][g] for g in vocabulary) + alpha * len(vocabulary)
+        total_en = sum(counts["en"][g] for g in vocabulary) + alpha * len(vocabulary)
+
+        log_ratios = {
+            g: math.log((counts["de"][g] + alpha) / total_de) - math.log((counts["en"][g] + alpha) / total_en)
+            for g in vocabulary
+        }
+        return cls(log_ratios, orders=orders)
+
+    @classmethod
+    def from_catalog(cls, df, **kwargs):
+        """
+        Train the detector from the catalog's German names/search text and translated English names.
+
+        Args:
+            df (pd.DataFrame): Catalog frame.
+            **kwargs: Passed on to from_texts.
+
+        Returns:
+            CatalogLanguageDetector: The trained detector.
+        """
+        german = [normalize_text(v) for v in df['course_name_german'].dropna().unique()]
+        if 'search_text' in df.columns:
+            german += [normalize_text(v) for v in df['search_text'].dropna().tolist()]
+        english = [normalize_text(v) for v in df['course_name_translated'].dropna().unique()]
+        return cls.from_texts(german, english, **kwargs)
+
+    def score(self, text):
+        """
+        Return the (order-normalized) log-odds that a text is German rather than English.
+
+        Args:
+            text (str): Text to score.
+
+        Returns:
+            float: Positive for German, negative for English, 0 if no known n-gram occurs.
+        """
+        total = self.prior
+        for gram in char_ngrams(text, self.orders):
+            total += self.log_ratios.get(gram, 0.0)
+        # Overlapping n-grams of several orders are far from independent; scale the evidence down accordingly
+        return total / len(self.orders)
+
+    def detect(self, text):
+        """
+        Detect whether a text is German or English.
+
+        Args:
+            text (str): Text to classify.
+
+        Returns:
+            tuple: (language code 'de' or 'en', confidence between 0.5 and 1).
+        """
+        log_odds = self.score(text)
+        # Numerically safe logistic function
+        if log_odds >= 0:
+            p_de = 1 / (1 + math.exp(-log_odds))
+        else:
+            z = math.exp(log_odds)
+            p_de = z / (1 + z)
+        return ("de", p_de) if p_de > 0.5 else ("en", 1 - p_de)
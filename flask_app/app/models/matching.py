@@ -1,8 +1,19 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import pandas as pd
 import numpy as np
-from langdetect import detect
-from deep_translator import GoogleTranslator
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+from app.catalog_compiler import NORMALIZED_COLUMNS, add_search_columns
+from app.models.translation import get_default_translator
+
+# Text columns a course can match on
+MATCH_COLUMNS = ['course_name_german', 'course_name_translated', 'search_text']
+
+# Threads running translations in concurrent mode; a translation that misses its latency budget keeps running
+# here and still fills the translation cache for the next request
+_translation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="translation")
 
 class CourseMatcher:
     """
@@ -11,7 +22,9 @@ class CourseMatcher:
     Handles language detection, translation, and scoring based on string match similarity and price deviation.
     """
 
-    def __init__(self, df, user_query, user_budget=None, top_n=20):
+    def __init__(self, df, user_query, user_budget=None, top_n=20, batched=True, workers=-1, search_index=None,
+                 translator=None, detector=None, ambiguity_threshold=0.75, concurrent=False,
+                 translation_timeout=None):
         """
         Initialize the matcher with course data, user query, and optional budget.
 
@@ -20,11 +33,39 @@ class CourseMatcher:
             user_query (str): The user's search query (can be in English or German).
             user_budget (float, optional): User's price budget. Defaults to None.
             top_n (int, optional): Number of top results to return. Defaults to 20.
+            batched (bool, optional): Score all tokens against all match columns in one native
+                rapidfuzz call instead of row by row. Results are identical. Defaults to True.
+            workers (int, optional): Threads used by rapidfuzz in batched mode (-1 = all cores). Defaults to -1.
+            search_index (NgramIndex, optional): Candidate index built from the same catalog as `df`.
+                In batched mode only its candidates are scored; results are identical. Defaults to None.
+            translator (object, optional): Object with a translate(text, source, target) method used for
+                non-German queries. Defaults to the shared cached Google translator.
+            detector (CatalogLanguageDetector, optional): Deterministic de/en detector with a detect(text) method
+                returning (language, confidence). Defaults to None (langdetect).
+            ambiguity_threshold (float, optional): Below this detector confidence the query is searched both as
+                typed and translated. Defaults to 0.75.
+            concurrent (bool, optional): Match the query as typed against the English course names while the
+                translation is in flight, then merge in the German-side matches. Defaults to False.
+            translation_timeout (float, optional): Latency budget in seconds for the translation in concurrent
+                mode. If it is exceeded (or the translation fails), only English-side results are served.
+                Defaults to None (wait for the translation).
         """
         self.df = df
         self.user_query = user_query
         self.user_budget = user_budget
         self.top_n = top_n
+        self.batched = batched
+        self.workers = workers
+        self.search_index = search_index
+        self.translator = translator if translator is not None else get_default_translator()
+        self.detector = detector
+        self.ambiguity_threshold = ambiguity_threshold
+        self.detected_lang = None
+        self.language_confidence = None
+        self.concurrent = concurrent
+        self.translation_timeout = translation_timeout
+        self.translation_timed_out = False
+        self.translation_error = None
         self.translated_query = None
         self.search_tokens = []
         self.use_partial = False
@@ -35,26 +76,61 @@ class CourseMatcher:
         Detect language and translate query to German if needed.
         Tokenize and determine matching strategy.
         """
-        if not isinstance(self.user_query, str) or not self.user_query.strip():
-            raise ValueError("Invalid input. Please provide a non-empty search query.")
+        needs_translation, ambiguous = self._detect_language()
 
-        try:
-            detected_lang = detect(self.user_query)
-        except Exception:
-            detected_lang = "en"
-
-        # Translate to German if the detected language is not German
-        if detected_lang != 'de':
+        # Translate to German if the detected language is not German (or might not be)
+        if needs_translation:
             try:
-                self.translated_query = GoogleTranslator(source='auto', target='de').translate(self.user_query)
+                translated_query = self.translator.translate(self.user_query, source='auto', target='de')
             except Exception as e:
                 raise ValueError(f"Translation failed: {e}")
         else:
-            self.translated_query = self.user_query
+            translated_query = self.user_query
+
+        self._set_search_tokens(translated_query, ambiguous)
 
+    def _detect_language(self):
+        """
+        Validate the query and detect its language.
+
+        Returns:
+            tuple: (whether the query needs translating, whether the detection was ambiguous)
+
+        Raises:
+            ValueError: If the query is empty.
+        """
+        if not isinstance(self.user_query, str) or not self.user_query.strip():
+            raise ValueError("Invalid input. Please provide a non-empty search query.")
+
+        if self.detector is not None:
+            detected_lang, confidence = self.detector.detect(self.user_query)
+        else:
+            # langdetect is only the fallback when no catalog detector is given, so it is imported on demand
+            from langdetect import detect
+
+            try:
+                detected_lang, confidence = detect(self.user_query), None
+            except Exception:
+                detected_lang, confidence = "en", None
+        self.detected_lang = detected_lang
+        self.language_confidence = confidence
+        ambiguous = confidence is not None and confidence < self.ambiguity_threshold
+        return detected_lang != 'de' or ambiguous, ambiguous
+
+    def _set_search_tokens(self, translated_query, ambiguous):
+        """
+        Tokenize the (translated) query and choose the matching strategy.
+        """
+        self.translated_query = translated_query
         self.search_tokens = self.translated_query.lower().split()
         self.use_partial = len(self.search_tokens) > 1
 
+        # Ambiguous queries are searched in both languages: the query as typed and its translation
+        if ambiguous:
+            for token in self.user_query.lower().split():
+                if token not in self.search_tokens:
+                    self.search_tokens.append(token)
+
     def fuzzy_token_match(self, text, partial_threshold=75, token_set_threshold=60):
         """
         Apply fuzzy token matching to a given text field.
@@ -80,6 +156,128 @@ class CourseMatcher:
             return any(fuzz.token_set_ratio(token, text) >= token_set_threshold for token in self.search_tokens)
         
 
+    def _normalized_df(self):
+        """
+        Return self.df with the normalized match columns, computing them only if the catalog was not compiled.
+        """
+        if all(col in self.df.columns for col in NORMALIZED_COLUMNS.values()):
+            return self.df
+        return add_search_columns(self.df.copy(deep=False))
+
+    def batch_token_match(self, partial_threshold=75, token_set_threshold=60, tokens=None, use_partial=None,
+                          columns=None):
+        """
+        Vectorized equivalent of applying fuzzy_token_match to all match columns.
+        Builds one token x (3 * rows) score matrix with rapidfuzz.process.cdist, which runs in native code
+        and spreads the work over `self.workers` threads. With a search index, only its candidate rows are scored.
+
+        Args:
+            partial_threshold (int): Minimum fuzz.partial_ratio score (0–100) for multi-word queries.
+            token_set_threshold (int): Minimum fuzz.token_set_ratio score (0–100) for single-word queries.
+            tokens (list, optional): Lowercased tokens to match. Defaults to self.search_tokens.
+            use_partial (bool, optional): Scoring strategy for `tokens`. Defaults to self.use_partial.
+            columns (list, optional): Subset of MATCH_COLUMNS to match on. Defaults to all of them.
+
+        Returns:
+            np.ndarray: Boolean mask over the rows of self.df, True where any column matches any token.
+        """
+        tokens = self.search_tokens if tokens is None else tokens
+        use_partial = self.use_partial if use_partial is None else use_partial
+        columns = MATCH_COLUMNS if columns is None else columns
+
+        n_rows = len(self.df)
+        if n_rows == 0 or not tokens:
+            return np.zeros(n_rows, dtype=bool)
+
+        # Pre-normalized columns (lowercased, lists joined, missing values as "") from the catalog compile step.
+        # An empty string scores 0, so missing values still never pass a positive threshold.
+        df = self._normalized_df()
+
+        # Narrow down to the index candidates (a guaranteed superset of the matches) when possible
+        rows = None
+        if self.search_index is not None and self.search_index.n_rows == n_rows:
+            candidates = self.search_index.candidates(tokens, use_partial, partial_threshold, token_set_threshold)
+            if candidates is not None:
+                rows = np.flatnonzero(candidates)
+
+        choices = []
+        for col in columns:
+            texts = df[NORMALIZED_COLUMNS[col]].to_numpy()
+            choices.extend((texts if rows is None else texts[rows]).tolist())
+
+        if use_partial:
+            scorer, threshold = fuzz.partial_ratio, partial_threshold
+        else:
+            scorer, threshold = fuzz.token_set_ratio, token_set_threshold
+
+        # score_cutoff zeroes everything below the threshold inside the scorer, in double precision
+        scores = process.cdist(tokens, choices, scorer=scorer, score_cutoff=threshold,
+                               dtype=np.float64, workers=self.workers)
+        matched = (scores >= threshold).any(axis=0).reshape(len(columns), -1).any(axis=0)
+        if rows is None:
+            return matched
+
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[rows] = matched
+        return mask
+
+    def match_courses_concurrently(self):
+        """
+        Detect the language, then overlap the translation with local matching: while the translation runs on a
+        worker thread, the query as typed is matched against the English course names. German-side matches are
+        merged in when the translation returns within the latency budget; otherwise only the English-side
+        matches are kept (and scored against the English names). A failed translation is logged and recorded in
+        translation_error rather than counted as a timeout.
+
+        Raises:
+            ValueError: If the query is empty or no matching courses are found.
+        """
+        start = time.perf_counter()
+        needs_translation, ambiguous = self._detect_language()
+        if not needs_translation:
+            self._set_search_tokens(self.user_query, ambiguous)
+            self.match_courses()
+            return
+
+        future = _translation_pool.submit(self.translator.translate, self.user_query, source='auto', target='de')
+
+        # English side: the query as typed against the translated (English) course names
+        english_tokens = self.user_query.lower().split()
+        english_mask = self.batch_token_match(tokens=english_tokens, use_partial=len(english_tokens) > 1,
+                                              columns=['course_name_translated'])
+
+        timeout = None
+        if self.translation_timeout is not None:
+            timeout = max(0.0, self.translation_timeout - (time.perf_counter() - start))
+        try:
+            translated_query = future.result(timeout=timeout)
+        except Exception as e:
+            # Over budget (the translation is still running) or failed: serve the English-side results now
+            if isinstance(e, FuturesTimeoutError) and not future.done():
+                self.translation_timed_out = True
+            else:
+                print(f"⚠️ Translation failed, matching the English course names only: {e!r}")
+                self.translation_error = e
+            self.translated_query = self.user_query
+            self.search_tokens = english_tokens
+            self.use_partial = len(english_tokens) > 1
+            mask = english_mask
+        else:
+            # German side: the usual match of the translated query, merged with the English side
+            self._set_search_tokens(translated_query, ambiguous)
+            mask = self.batch_token_match() | english_mask
+
+        self.filtered_df = self.df[mask]
+        if self.filtered_df.empty:
+            raise ValueError("No courses matched for search input. Try a different query.")
+
+    @property
+    def english_only(self):
+        """
+        bool: Whether the results were matched without the translated query (translation over budget or failed).
+        """
+        return self.translation_timed_out or self.translation_error is not None
+
     def match_courses(self):
         """
         Filter DataFrame using fuzzy matching across relevant text columns.
@@ -87,15 +285,27 @@ class CourseMatcher:
         Raises:
             ValueError: If no matching courses are found.
         """
-        self.filtered_df = self.df[
-            self.df['course_name_german'].apply(self.fuzzy_token_match) |
-            self.df['course_name_translated'].apply(self.fuzzy_token_match) |
-            self.df['search_text'].apply(self.fuzzy_token_match)
-        ]
+        if self.batched:
+            self.filtered_df = self.df[self.batch_token_match()]
+        else:
+            self.filtered_df = self.df[
+                self.df['course_name_german'].apply(self.fuzzy_token_match) |
+                self.df['course_name_translated'].apply(self.fuzzy_token_match) |
+                self.df['search_text'].apply(self.fuzzy_token_match)
+            ]
 
         if self.filtered_df.empty:
             raise ValueError("No courses matched for search input. Try a different query.")
 
+    def _normalized_names(self, df, column='course_name_german'):
+        """
+        Return the normalized course names (German by default) of the given rows.
+        """
+        norm_col = NORMALIZED_COLUMNS[column]
+        if norm_col in df.columns:
+            return df[norm_col].tolist()
+        return add_search_columns(df[[column]].copy())[norm_col].tolist()
+
     def compute_scores(self):
         """
         Compute fuzzy match score and apply budget filter and scoring logic if applicable.
@@ -105,10 +315,14 @@ class CourseMatcher:
         """
         self.filtered_df = self.filtered_df.copy()
 
-        # Compute match score based on query vs. German course name and scale it to [0, 1]
-        self.filtered_df['match_score'] = self.filtered_df['course_name_german'].apply(
-            lambda name: fuzz.token_set_ratio(self.translated_query.lower(), name.lower()) / 100 if pd.notna(name) else 0
+        # Compute match score based on query vs. German course name and scale it to [0, 1].
+        # Missing names are normalized to "" and score 0. Untranslated queries are scored against the English names.
+        names = self._normalized_names(
+            self.filtered_df, 'course_name_translated' if self.english_only else 'course_name_german'
         )
+        scores = process.cdist([self.translated_query.lower()], names, scorer=fuzz.token_set_ratio,
+                               dtype=np.float64, workers=self.workers)[0]
+        self.filtered_df['match_score'] = scores / 100
 
         #filter out courses that are not within 30% of the user's budget
 
@@ -160,7 +374,10 @@ class CourseMatcher:
         Returns:
             pd.DataFrame: Final ranked list of matched courses.
         """
-        self.preprocess_query()
-        self.match_courses()
+        if self.concurrent:
+            self.match_courses_concurrently()
+        else:
+            self.preprocess_query()
+            self.match_courses()
         self.compute_scores()
         return self.rank_results()
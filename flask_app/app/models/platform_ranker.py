@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 # Mapping from English user-facing group names to corresponding German column names in data
@@ -12,6 +13,49 @@ TARGET_GROUP_MAPPING = {
     "Adolescents / young people": "Jugendliche"
 }
 
+# Compiled platform features (see app.catalog_compiler.add_platform_features).
+# Numeric score per gender column: prop_occupancy_left + prop_minimum_to_reach + gender gap, as float32
+PLATFORM_SCORE_COLUMNS = {
+    'gap_to_80_percent_women': 'platform_score_women',
+    'gap_to_80_percent_men': 'platform_score_men',
+}
+# One bit per binary boosting criterion: bit 0 = sponsored, then one bit per target group
+PLATFORM_FLAGS_COLUMN = 'platform_flags'
+PLATFORM_FLAG_COLUMNS = ['sponsored'] + [f"target_group_{german}" for german in TARGET_GROUP_MAPPING.values()]
+
+
+def descending_order(values):
+    """
+    Stable descending argsort: equal values keep their current order and NaN goes last, so rankings are
+    deterministic.
+
+    Args:
+        values (array-like): Scores to sort.
+
+    Returns:
+        np.ndarray: Positions of the values from highest to lowest.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return np.argsort(-values, kind="stable")
+
+
+def flag_matrix(df, columns):
+    """
+    Binary criteria as a (courses x columns) boolean matrix: any non-zero value is a match and missing values are
+    not, the same rule the catalog compile step uses for PLATFORM_FLAGS_COLUMN.
+
+    Args:
+        df (pd.DataFrame): Courses with the criteria columns.
+        columns (list): Criteria column names, all present in df.
+
+    Returns:
+        np.ndarray: Boolean matrix, one column per criterion.
+    """
+    if not columns:
+        return np.zeros((len(df), 0), dtype=bool)
+    return df[columns].fillna(0).to_numpy() != 0
+
+
 class PlatformPreferenceRanker:
     """
     Class to rank the final courses that matched the user's search and budget
@@ -61,57 +105,176 @@ class PlatformPreferenceRanker:
         Returns:
             pd.DataFrame: Ranked DataFrame with a final boosted score and sorted by descending preference.
         """
-        df = matched_df.copy()
+        # Scores are computed as arrays; matched_df is only gathered once, in the final order
+        compiled = self._is_compiled(matched_df)
+        added = {}
 
-        # Step 1: Compute numeric score (core suitability indicators + gender preference gap)
-        core_cols = ['prop_occupancy_left', 'prop_minimum_to_reach', self.gender_col]
-        df['numeric_score'] = df[core_cols].sum(axis=1)
+        # Step 1: Compute numeric score (core suitability indicators + gender preference gap),
+        # precomputed by the catalog compile step when available
+        if compiled:
+            numeric_score = matched_df[PLATFORM_SCORE_COLUMNS[self.gender_col]].to_numpy(dtype=np.float64)
+        else:
+            core_cols = ['prop_occupancy_left', 'prop_minimum_to_reach', self.gender_col]
+            numeric_score = matched_df[core_cols].sum(axis=1).to_numpy(dtype=np.float64)
 
         # Step 2: Rank based on numeric score
-        df = df.sort_values(by='numeric_score', ascending=False).reset_index(drop=True)
-        df['rank_index'] = df.index
+        numeric_order = descending_order(numeric_score)
+        added['numeric_score'] = numeric_score[numeric_order]
+        added['rank_index'] = np.arange(len(matched_df))
+
+        # Step 3/4: Count how many binary criteria each course matches (sponsorship + target groups)
+        if compiled:
+            # Popcount of the course's flag bitmask restricted to the user's criteria
+            flags = matched_df[PLATFORM_FLAGS_COLUMN].to_numpy()
+            binary_sum = np.bitwise_count(flags & self.flag_mask()).astype(np.int64)
+        else:
+            # Includes 'sponsored' and all user-matching target groups
+            binary_cols = ['sponsored'] + self._target_group_columns()
+            for col in binary_cols[1:]:
+                if col not in matched_df.columns:
+                    added[col] = np.zeros(len(matched_df), dtype=np.int64)  # Assume 0 if column doesn't exist
+            present = [col for col in binary_cols if col in matched_df.columns]
+            binary_sum = flag_matrix(matched_df, present).sum(axis=1, dtype=np.int64)
+        added['binary_sum'] = binary_sum[numeric_order]
+
+        # Step 5: Prepare scoring context for weight calculation
+        self.max_score = np.nanmax(numeric_score) if len(numeric_score) else np.nan
+        self.min_score = np.nanmin(numeric_score) if len(numeric_score) else np.nan
+        self.total = len(matched_df)
 
-        # Step 3: Determine binary boosting columns
-        # Includes 'sponsored' and all user-matching target groups
-        binary_cols = ['sponsored']  # Sponsorship is always part of boosting
+        # Step 6: Apply boosting weight and compute final score
+        added['weight'] = self._weights(added['numeric_score'])
+        added['binary_boost'] = added['weight'] * added['binary_sum']
+        added['final_score_platform'] = added['numeric_score'] + added['binary_boost']
+
+        # Step 7: Return ranked and sorted results
+        final_order = descending_order(added['final_score_platform'])
+        df = matched_df.iloc[numeric_order[final_order]].reset_index(drop=True)
+        for col, values in added.items():
+            df[col] = values[final_order]
+        return df
+
+    def _target_group_columns(self):
+        """
+        Return the catalog columns of the selected target groups (unknown group labels are ignored).
+        """
+        columns = []
         for tg in self.selected_target_groups:
             german = TARGET_GROUP_MAPPING.get(tg)
             if german:
-                col = f"target_group_{german}"
-                if col not in df.columns:
-                    df[col] = 0  # Assume 0 if column doesn't exist
-                binary_cols.append(col)
+                columns.append(f"target_group_{german}")
+        # A group selected twice is still one criterion
+        return list(dict.fromkeys(columns))
 
-        # Step 4: Count how many binary criteria each course matches (sponsorship + target groups)
-        df['binary_sum'] = df[binary_cols].sum(axis=1)
+    def flag_mask(self):
+        """
+        Return the user's boosting criteria (sponsorship + selected target groups) as a PLATFORM_FLAGS_COLUMN mask.
 
-        # Step 5: Prepare scoring context for weight calculation
-        self.max_score = df['numeric_score'].max()
-        self.min_score = df['numeric_score'].min()
-        self.total = len(df)
+        Returns:
+            np.uint32: Bitmask with one bit per criterion.
+        """
+        mask = 0
+        for col in ['sponsored'] + self._target_group_columns():
+            mask |= 1 << PLATFORM_FLAG_COLUMNS.index(col)
+        return np.uint32(mask)
 
-        # Step 6: Apply boosting weight and compute final score
-        df['weight'] = df.apply(self._calculate_weight, axis=1)
-        df['binary_boost'] = df['weight'] * df['binary_sum']
-        df['final_score_platform'] = df['numeric_score'] + df['binary_boost']
+    def _is_compiled(self, df):
+        """
+        Whether df carries the compiled platform features this ranker needs.
+        """
+        return PLATFORM_SCORE_COLUMNS[self.gender_col] in df.columns and PLATFORM_FLAGS_COLUMN in df.columns
 
-        # Step 7: Return ranked and sorted results
-        return df.sort_values(by='final_score_platform', ascending=False).reset_index(drop=True)
+    def _weights(self, sorted_scores):
+        """
+        Vectorized boosting weights for numeric scores sorted in descending order.
+        Each item's weight is calculated keeping in mind the average gap between its numeric score and the best
+        one, per rank position, such that boosting ensures ranking modifications where relevant.
+
+        Args:
+            sorted_scores (np.ndarray): Numeric scores, highest first (position = rank index).
 
-    def _calculate_weight(self, row):
+        Returns:
+            np.ndarray: Weight to apply to each item's binary match count.
         """
-        Internal method to calculate a boosting weight based on the item's rank and how far its numeric score
-        is from the maximum. Weight is calculated keeping in mind the average gap between the numeric scores 
-        of courses currently ranked, such that boosting ensures ranking modifications where relevant.
+        return self._boost_weights(sorted_scores[None, :])[0]
+
+    @staticmethod
+    def _boost_weights(sorted_scores):
+        """
+        Boosting weights for a (profiles x items) matrix of numeric scores, each row sorted in descending order.
+        """
+        n = sorted_scores.shape[1]
+        if n == 0:
+            return np.zeros_like(sorted_scores)
+        max_score = np.nanmax(sorted_scores, axis=1, keepdims=True)
+        min_score = np.nanmin(sorted_scores, axis=1, keepdims=True)
+        rank_index = np.arange(n, dtype=np.float64)
+
+        weights = np.empty_like(sorted_scores)
+        weights[:, 1:] = (max_score - sorted_scores[:, 1:]) / rank_index[1:] * 1.05
+        # Use a fair baseline for the top-ranked row to avoid division by zero
+        weights[:, 0] = ((max_score - min_score) / n * 1.05)[:, 0]
+        return weights
+
+    @classmethod
+    def rank_profiles(cls, matched_df: pd.DataFrame, profiles: list):
+        """
+        Rank one set of matched courses for many user profiles at once.
+        Produces the same order as calling rank() once per profile, with all profiles scored in a few array
+        operations (used for offline fairness and sponsorship-exposure audits).
 
         Args:
-            row (pd.Series): A row with 'numeric_score' and 'rank_index'.
+            matched_df (pd.DataFrame): Matched courses, with the columns required by rank().
+            profiles (list): (user_gender, selected_target_groups) pairs.
 
         Returns:
-            float: Weight to apply to the binary match count.
+            np.ndarray: (profiles x courses) matrix of row positions in matched_df, best first for each profile.
+
+        Raises:
+            ValueError: If a profile is missing the gender or target groups.
         """
-        if row['rank_index'] > 0:
-            return ((self.max_score - row['numeric_score']) / row['rank_index']) * 1.05
+        rankers = [cls(gender, groups) for gender, groups in profiles]
+        n = len(matched_df)
+        if not rankers:
+            return np.zeros((0, n), dtype=np.int64)
+
+        compiled = all(r._is_compiled(matched_df) for r in rankers)
+
+        # Step 1: Numeric scores and their order, computed once per distinct gender column
+        gender_cols = sorted({r.gender_col for r in rankers})
+        if compiled:
+            scores = np.stack([matched_df[PLATFORM_SCORE_COLUMNS[col]].to_numpy(dtype=np.float64)
+                               for col in gender_cols])
         else:
-            # Use a fair baseline for the top-ranked row to avoid division by zero
-            return ((self.max_score - self.min_score) / self.total) * 1.05
+            base = matched_df['prop_occupancy_left'].fillna(0).to_numpy(dtype=np.float64) + \
+                matched_df['prop_minimum_to_reach'].fillna(0).to_numpy(dtype=np.float64)
+            scores = np.stack([base + matched_df[col].fillna(0).to_numpy(dtype=np.float64) for col in gender_cols])
+        orders = np.stack([descending_order(row) for row in scores])
+        sorted_scores = np.take_along_axis(scores, orders, axis=1)
+        weights = cls._boost_weights(sorted_scores)
+
+        # Step 2: Binary matches per profile
+        if compiled:
+            # Popcount of every (profile mask, course flags) pair
+            masks = np.array([r.flag_mask() for r in rankers], dtype=np.uint32)
+            flags = matched_df[PLATFORM_FLAGS_COLUMN].to_numpy()
+            binary_sum = np.bitwise_count(masks[:, None] & flags[None, :]).astype(np.float64)
+        else:
+            # Selection matrix x course flags
+            flag_cols = ['sponsored'] + sorted({c for r in rankers for c in r._target_group_columns()})
+            flags = np.zeros((len(flag_cols), n))
+            present = [i for i, col in enumerate(flag_cols) if col in matched_df.columns]
+            flags[present] = flag_matrix(matched_df, [flag_cols[i] for i in present]).T
+            selection = np.zeros((len(rankers), len(flag_cols)))
+            selection[:, 0] = 1.0
+            for p, ranker in enumerate(rankers):
+                for col in ranker._target_group_columns():
+                    selection[p, flag_cols.index(col)] = 1.0
+            binary_sum = selection @ flags
+
+        # Step 3: Final scores in each profile's numeric order, then a stable descending sort per profile
+        gender_idx = np.array([gender_cols.index(r.gender_col) for r in rankers])
+        numeric_order = orders[gender_idx]
+        final = sorted_scores[gender_idx] + weights[gender_idx] * np.take_along_axis(binary_sum, numeric_order, axis=1)
+        final_order = np.argsort(-final, axis=1, kind="stable")
+        return np.take_along_axis(numeric_order, final_order, axis=1)
@@ -0,0 +1,423 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+# Default on-disk location of the translation cache (next to the catalog)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "data", "translation_cache.sqlite3")
+
+
+def normalize_query(text):
+    """
+    Normalize a query for use as a cache key: trimmed, lowercased, single spaces.
+
+    Args:
+        text (str): Raw query text.
+
+    Returns:
+        str: Normalized query text.
+    """
+    return " ".join(text.lower().split())
+
+
+class GoogleTranslatorBackend:
+    """
+    Translator backend calling Google Translate through deep-translator (one network round-trip per call).
+    """
+
+    def translate(self, text, source, target):
+        """
+        Translate a text.
+
+        Args:
+            text (str): Text to translate.
+            source (str): Source language code, or 'auto'.
+            target (str): Target language code.
+
+        Returns:
+            str: The translated text.
+        """
+        # Imported on first use: deep-translator (and its HTTP stack) is only needed when a query misses the cache
+        from deep_translator import GoogleTranslator
+
+        return GoogleTranslator(source=source, target=target).translate(text)
+
+
+class TranslationCache:
+    """
+    Two-level translation cache: a bounded in-process LRU in front of an optional SQLite store.
+    Entries in both levels expire after `ttl_seconds`; the SQLite store drops its oldest rows beyond `max_disk_entries`.
+    The store is pruned on the first write and then every `prune_every` writes, so it may briefly hold up to
+    `prune_every` rows more than the limit.
+    """
+
+    def __init__(self, path=None, max_memory_entries=2048, max_disk_entries=100_000, ttl_seconds=30 * 24 * 3600,
+                 prune_every=256):
+        """
+        Initialize the cache.
+
+        Args:
+            path (str, optional): SQLite file for the persistent level. None keeps the cache in memory only.
+            max_memory_entries (int, optional): Size of the in-process LRU. Defaults to 2048.
+            max_disk_entries (int, optional): Maximum rows kept in SQLite. Defaults to 100,000.
+            ttl_seconds (float, optional): Lifetime of an entry. Defaults to 30 days.
+            prune_every (int, optional): Writes between two prunes of the SQLite store. Defaults to 256.
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.prune_every = max(1, prune_every)
+        self._writes = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " query TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL,"
+                " translation TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (query, source, target))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS translations_created ON translations (created_at)")
+
+    def get(self, key):
+        """
+        Look up a translation.
+
+        Args:
+            key (tuple): (normalized query, source, target).
+
+        Returns:
+            tuple: (translation or None, level) where level is 'memory', 'disk' or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translation, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return translation, "memory"
+                del self._memory[key]
+
+            if self._conn is None:
+                return None, None
+
+            row = self._conn.execute(
+                "SELECT translation, created_at FROM translations WHERE query = ? AND source = ? AND target = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None, None
+            if now - row[1] >= self.ttl_seconds:
+                self._conn.execute("DELETE FROM translations WHERE query = ? AND source = ? AND target = ?", key)
+                return None, None
+
+            self._remember(key, row[0], row[1])
+            return row[0], "disk"
+
+    def put(self, key, translation):
+        """
+        Store a translation in both levels.
+
+        Args:
+            key (tuple): (normalized query, source, target).
+            translation (str): The translated text.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now)
+            if self._conn is None:
+                return
+
+            self._conn.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", (*key, translation, now))
+            # Pruning scans the created_at index, so it is amortized over prune_every writes
+            if self._writes % self.prune_every == 0:
+                self._prune(now)
+            self._writes += 1
+
+    def _prune(self, now):
+        """
+        Expire old rows and keep the store bounded (oldest first). Caller holds the lock.
+        """
+        self._conn.execute("DELETE FROM translations WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM translations WHERE rowid IN ("
+            " SELECT rowid FROM translations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def _remember(self, key, translation, created_at):
+        """
+        Insert into the in-process LRU, evicting the least recently used entry when full. Caller holds the lock.
+        """
+        self._memory[key] = (translation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries from both levels.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM translations")
+
+
+_WORD_RE = re.compile(r"\w+(?:[-'/]\w+)*")
+
+
+def _words(text):
+    """
+    Split a text into lowercased word tokens (punctuation dropped, hyphenated words kept together).
+    """
+    return _WORD_RE.findall(text.lower())
+
+
+class GlossaryTranslator:
+    """
+    Offline English -> German translator built from the catalog's parallel course names
+    (course_name_translated <-> course_name_german).
+
+    Queries are translated with a phrase table (whole English course names) and a token glossary
+    (each English word aligned to the German word it co-occurs with most, by Dice coefficient).
+    If too few query words are covered, the query goes to the fallback translator instead.
+    """
+
+    def __init__(self, phrases, glossary, german_vocabulary, fallback=None, min_coverage=0.75, max_phrase_words=6):
+        """
+        Initialize the translator.
+
+        Args:
+            phrases (dict): Normalized English phrase -> German phrase.
+            glossary (dict): English word -> German word.
+            german_vocabulary (set): German catalog words; query words already in it are kept unchanged.
+            fallback (object, optional): Translator used when coverage is too low
+                (any object with translate(text, source, target)). Defaults to None (always use the glossary).
+            min_coverage (float, optional): Share of query words that must be covered. Defaults to 0.75.
+            max_phrase_words (int, optional): Longest phrase looked up in the phrase table. Defaults to 6.
+        """
+        self.phrases = phrases
+        self.glossary = glossary
+        self.german_vocabulary = german_vocabulary
+        self.fallback = fallback
+        self.min_coverage = min_coverage
+        self.max_phrase_words = max_phrase_words
+        self._counter_lock = threading.Lock()
+        self.counters = {"glossary": 0, "fallback": 0}
+
+    @classmethod
+    def from_catalog(cls, df, fallback=None, min_pair_count=2, min_dice=0.3, **kwargs):
+        """
+        Build the phrase table and token glossary from the catalog's distinct name pairs.
+
+        Args:
+            df (pd.DataFrame): Catalog with 'course_name_german' and 'course_name_translated'.
+            fallback (object, optional): Translator used when coverage is too low.
+            min_pair_count (int, optional): Minimum co-occurrences for a glossary entry. Defaults to 2.
+            min_dice (float, optional): Minimum Dice coefficient for a glossary entry. Defaults to 0.3.
+            **kwargs: Passed on to the constructor.
+
+        Returns:
+            GlossaryTranslator: The built translator.
+        """
+        pairs = df[['course_name_german', 'course_name_translated']].dropna().drop_duplicates()
+
+        phrase_votes = {}
+        english_counts, german_counts, pair_counts = Counter(), Counter(), Counter()
+        german_vocabulary = set()
+        for german, english in pairs.itertuples(index=False):
+            if not isinstance(german, str) or not isinstance(english, str):
+                continue
+            english_words, german_words = _words(english), _words(german)
+            german_vocabulary.update(german_words)
+            phrase_votes.setdefault(" ".join(english_words), Counter())[german] += 1
+
+            english_set, german_set = set(english_words), set(german_words)
+            english_counts.update(english_set)
+            german_counts.update(german_set)
+            pair_counts.update((e, g) for e in english_set for g in german_set)
+
+        phrases = {english: votes.most_common(1)[0][0] for english, votes in phrase_votes.items() if english}
+
+        best = {}
+        for (english, german), count in pair_counts.items():
+            if count < min_pair_count:
+                continue
+            dice = 2 * count / (english_counts[english] + german_counts[german])
+            if dice >= min_dice and dice > best.get(english, (None, 0.0))[1]:
+                best[english] = (german, dice)
+        glossary = {english: german for english, (german, _) in best.items()}
+
+        return cls(phrases, glossary, german_vocabulary, fallback=fallback, **kwargs)
+
+    def glossary_translate(self, text):
+        """
+        Translate a text with the phrase table and glossary only.
+
+        Args:
+            text (str): English text.
+
+        Returns:
+            tuple: (German text, coverage) where coverage is the share of words that were translated or
+            already German.
+        """
+        words = _words(text)
+        if not words:
+            return text, 0.0
+
+        output, covered, i = [], 0, 0
+        while i < len(words):
+            # Longest phrase first, then single words
+            for size in range(min(self.max_phrase_words, len(words) - i), 1, -1):
+                phrase = self.phrases.get(" ".join(words[i:i + size]))
+                if phrase is not None:
+                    output.append(phrase)
+                    covered += size
+                    i += size
+                    break
+            else:
+                word = words[i]
+                if word in self.phrases:
+                    output.append(self.phrases[word])
+                    covered += 1
+                elif word in self.glossary:
+                    output.append(self.glossary[word])
+                    covered += 1
+                else:
+                    output.append(word)
+                    covered += word in self.german_vocabulary
+                i += 1
+
+        return " ".join(output), covered / len(words)
+
+    def translate(self, text, source="auto", target="de"):
+        """
+        Translate a query to German, locally if the glossary covers it well enough.
+
+        Args:
+            text (str): Query text.
+            source (str, optional): Source language code. Defaults to 'auto'.
+            target (str, optional): Target language code. Defaults to 'de'.
+
+        Returns:
+            str: The translated query.
+        """
+        if target == "de" and source in ("auto", "en"):
+            translation, coverage = self.glossary_translate(text)
+            if coverage >= self.min_coverage or self.fallback is None:
+                self._count("glossary")
+                return translation
+
+        if self.fallback is None:
+            return text
+        self._count("fallback")
+        return self.fallback.translate(text, source=source, target=target)
+
+    def _count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+
+class CachedTranslator:
+    """
+    Translator used by CourseMatcher: serves repeated queries from a TranslationCache and only calls the
+    backend (by default Google Translate) on a miss. Keeps hit/miss counters for monitoring.
+    """
+
+    def __init__(self, backend=None, cache=None):
+        """
+        Initialize the translator.
+
+        Args:
+            backend (object, optional): Object with a translate(text, source, target) method.
+                Defaults to GoogleTranslatorBackend; tests can pass a local stub.
+            cache (TranslationCache, optional): Cache to use. Defaults to an in-memory-only cache.
+        """
+        self.backend = backend if backend is not None else GoogleTranslatorBackend()
+        self.cache = cache if cache is not None else TranslationCache()
+        self._counter_lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def translate(self, text, source="auto", target="de"):
+        """
+        Translate a query, using the cache whenever possible.
+
+        Args:
+            text (str): Query text.
+            source (str, optional): Source language code. Defaults to 'auto'.
+            target (str, optional): Target language code. Defaults to 'de'.
+
+        Returns:
+            str: The translated query.
+
+        Raises:
+            Exception: Whatever the backend raises on a miss; failures are never cached.
+        """
+        key = (normalize_query(text), source, target)
+        translation, level = self.cache.get(key)
+        if translation is not None:
+            self._count(f"{level}_hits")
+            return translation
+
+        self._count("misses")
+        try:
+            translation = self.backend.translate(text, source, target)
+        except Exception:
+            self._count("errors")
+            raise
+
+        if translation:
+            self.cache.put(key, translation)
+        return translation
+
+    def stats(self):
+        """
+        Return a snapshot of the hit/miss counters and the hit rate.
+
+        Returns:
+            dict: Counter values plus 'hit_rate' (0–1).
+        """
+        with self._counter_lock:
+            stats = dict(self.counters)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_default_translator = None
+_default_lock = threading.Lock()
+
+
+def get_default_translator():
+    """
+    Return the process-wide cached Google translator, persisted to DEFAULT_CACHE_PATH when writable.
+
+    Returns:
+        CachedTranslator: Shared translator instance.
+    """
+    global _default_translator
+    if _default_translator is None:
+        with _default_lock:
+            if _default_translator is None:
+                try:
+                    cache = TranslationCache(path=DEFAULT_CACHE_PATH)
+                except (OSError, sqlite3.Error):
+                    cache = TranslationCache()  # read-only deployment: keep the in-process level only
+                _default_translator = CachedTranslator(cache=cache)
+    return _default_translator
@@ -1,10 +1,14 @@
 from app.models.matching import CourseMatcher
 from app.models.platform_ranker import PlatformPreferenceRanker
 from app.models.consensus_ranker import ConsensusRanker
+from app.result_cache import ResultCache, get_result_cache
 
-def process_user_inputs(user_query, user_budget, user_gender, user_target_groups, df):
+def process_user_inputs(user_query, user_budget, user_gender, user_target_groups, df, search_index=None,
+                        translator=None, detector=None, catalog_version=None, result_cache=None, top_n=20,
+                        workers=-1, concurrent_translation=False, translation_timeout=None):
     """
     Full processing pipeline to produce a consensus-ranked list of course matches.
+    When the catalog version is known, results are served from (and stored in) the search result cache.
 
     Args:
         user_query (str): User's search query.
@@ -12,12 +16,45 @@ def process_user_inputs(user_query, user_budget, user_gender, user_target_groups
         user_gender (str): Gender string for demographic targeting.
         user_target_groups (list): List of groups the user identifies with.
         df (pd.DataFrame): Course catalog DataFrame.
+        search_index (NgramIndex, optional): Candidate index built from the same catalog.
+        translator (object, optional): Query translator. Defaults to the shared cached Google translator.
+        detector (CatalogLanguageDetector, optional): de/en query language detector. Defaults to langdetect.
+        catalog_version (str, optional): Version of `df` (AssetLoader.catalog_version). Defaults to None,
+            which disables result caching.
+        result_cache (ResultCache, optional): Cache to use. Defaults to the process-wide result cache.
+        top_n (int, optional): Maximum number of courses returned. Defaults to 20.
+        workers (int, optional): Threads used by rapidfuzz for matching (-1 = all cores). Defaults to -1.
+        concurrent_translation (bool, optional): Overlap the query translation with English-side matching.
+            Defaults to False.
+        translation_timeout (float, optional): Latency budget for the translation in concurrent mode; past it,
+            English-side results are served and not cached. Defaults to None (no budget).
 
     Returns:
         pd.DataFrame: Final ranked course list.
     """
+    def compute():
+        return _run_pipeline(user_query, user_budget, user_gender, user_target_groups, df,
+                             search_index, translator, detector, top_n, workers, concurrent_translation,
+                             translation_timeout)
+
+    if catalog_version is None:
+        return compute()
+
+    cache = result_cache if result_cache is not None else get_result_cache()
+    key = ResultCache.make_key(user_query, user_budget, user_gender, user_target_groups, catalog_version, top_n)
+    # Results served without the German side (translation over budget or failed) are not worth keeping
+    return cache.get_or_compute(key, compute, cacheable=lambda result: not result.attrs.get("english_only"))
+
+
+def _run_pipeline(user_query, user_budget, user_gender, user_target_groups, df, search_index, translator,
+                  detector, top_n, workers, concurrent_translation, translation_timeout):
+    """
+    Run matching, platform ranking and consensus for one search (arguments as in process_user_inputs).
+    """
     # Step 1: Match courses based on match score and price-based filters
-    matcher = CourseMatcher(df=df, user_query=user_query, user_budget=user_budget)
+    matcher = CourseMatcher(df=df, user_query=user_query, user_budget=user_budget, top_n=top_n, workers=workers,
+                            search_index=search_index, translator=translator, detector=detector,
+                            concurrent=concurrent_translation, translation_timeout=translation_timeout)
     final_matches_df = matcher.run()
 
     # Step 2: Rank based on platform preference (e.g., inclusivity, target groups, sponsorship)
@@ -27,5 +64,6 @@ def process_user_inputs(user_query, user_budget, user_gender, user_target_groups
     # Step 3: Consensus ranking to reconcile user and platform preferences
     consensus = ConsensusRanker(final_matches_df, platform_ranked_df)
     final_output_df = consensus.get_ranked_df()
+    final_output_df.attrs["english_only"] = matcher.english_only
 
     return final_output_df
@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.models.translation import normalize_query
+
+
+class _Flight:
+    """
+    One in-progress computation that concurrent identical requests wait on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.seconds = 0.0
+
+
+class ResultCache:
+    """
+    In-process cache of final search results with LRU and TTL eviction and single-flight deduplication:
+    while one request computes a result, identical concurrent requests wait for it instead of recomputing.
+
+    Keys contain the catalog version, and a key with a new version drops every entry of older versions,
+    so a catalog reload invalidates the cache automatically.
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=600):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int, optional): Maximum number of cached results. Defaults to 512.
+            ttl_seconds (float, optional): Lifetime of a cached result. Defaults to 10 minutes.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(user_query, user_budget, user_gender, user_target_groups, catalog_version, top_n=20):
+        """
+        Build the cache key of a search.
+
+        Args:
+            user_query (str): User's search query.
+            user_budget (float): Budget filter (None and 0 both mean no budget).
+            user_gender (str): Gender string.
+            user_target_groups (list): Selected target groups (order does not matter).
+            catalog_version (str): Version of the catalog the result is computed from.
+            top_n (int, optional): Maximum number of results. Defaults to 20.
+
+        Returns:
+            tuple: Hashable cache key.
+        """
+        query = normalize_query(user_query) if isinstance(user_query, str) else user_query
+        budget = float(user_budget) if user_budget else 0.0
+        gender = (user_gender or "").strip().lower()
+        groups = tuple(sorted(set(user_target_groups or [])))
+        return (catalog_version, query, budget, gender, groups, int(top_n))
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Return the cached result for a key, computing it at most once across concurrent callers.
+        Exceptions are passed on to every waiting caller and are not cached.
+
+        Args:
+            key (tuple): Key from make_key.
+            compute (callable): Function without arguments returning the result (a DataFrame).
+            cacheable (callable, optional): Called with a fresh result; False keeps it out of the cache
+                (it is still shared with concurrent waiters). Defaults to caching every result.
+
+        Returns:
+            pd.DataFrame: A copy of the result, safe for the caller to modify.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if key[0] != self._version:
+                # New catalog version: results computed from the old catalog are stale
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = key[0]
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, created_at, seconds = entry
+                if now - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += seconds
+                    return result.copy()
+                del self._entries[key]
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self.saved_seconds += flight.seconds
+            return flight.result.copy()
+
+        start = time.perf_counter()
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.seconds = seconds = time.perf_counter() - start
+            with self._lock:
+                if key[0] == self._version and (cacheable is None or cacheable(flight.result)):
+                    self._entries[key] = (flight.result, time.monotonic(), seconds)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            return flight.result.copy()
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+
+    def clear(self):
+        """
+        Remove all cached results (in-flight computations are not affected).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return cache metrics.
+
+        Returns:
+            dict: Entry count, hits, misses, shared (requests that waited on an identical in-flight computation),
+                evictions, invalidations, hit rate and the compute time saved by hits in seconds.
+        """
+        with self._lock:
+            served = self.hits + self.shared
+            total = served + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": served / total if total else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+_default_cache = ResultCache()
+
+
+def get_result_cache():
+    """
+    Return the process-wide search result cache.
+
+    Returns:
+        ResultCache: Shared cache instance.
+    """
+    return _default_cache
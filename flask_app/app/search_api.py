@@ -0,0 +1,111 @@
+import hashlib
+import json
+
+from app.result_cache import ResultCache
+
+# Result fields returned by the JSON search API, in output order
+API_RESULT_COLUMNS = ['guid', 'course_name_german', 'course_name_translated', 'district', 'price_amount',
+                      'start_date', 'end_date', 'number_of_sessions', 'website_uri', 'sponsored', 'match_score']
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 500
+FORMATS = ("json", "ndjson")
+
+
+def parse_search_args(args):
+    """
+    Read and validate the search parameters of an API request.
+
+    Args:
+        args (MultiDict): Request arguments: q, budget, gender, target_group (repeatable), limit, format.
+
+    Returns:
+        dict: user_query, user_budget, user_gender, user_target_groups, top_n and format.
+
+    Raises:
+        ValueError: If a parameter is missing or invalid.
+    """
+    query = args.get("q", "").strip()
+    if not query:
+        raise ValueError("Invalid input. Please provide a non-empty search query (q).")
+
+    try:
+        budget = float(args.get("budget") or 0)
+        limit = int(args.get("limit") or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError("budget must be a number and limit a whole number.")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}.")
+
+    output_format = args.get("format", "json").lower()
+    if output_format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}.")
+
+    return {
+        "user_query": query,
+        "user_budget": budget,
+        "user_gender": args.get("gender", ""),
+        # Same default as the search form, where "Not applicable" is preselected
+        "user_target_groups": args.getlist("target_group") or ["Not applicable"],
+        "top_n": limit,
+        "format": output_format,
+    }
+
+
+def search_etag(params, catalog_version):
+    """
+    Derive the ETag of a search response from the catalog version and the normalized request,
+    so it is known before (and without) running the search.
+
+    Args:
+        params (dict): Output of parse_search_args.
+        catalog_version (str): Version of the catalog the response is computed from.
+
+    Returns:
+        str: Opaque entity tag (without quotes).
+    """
+    key = ResultCache.make_key(params["user_query"], params["user_budget"], params["user_gender"],
+                               params["user_target_groups"], catalog_version, params["top_n"])
+    return hashlib.sha256(repr((key, params["format"])).encode("utf-8")).hexdigest()[:32]
+
+
+def _project(results_df):
+    """
+    Keep the API fields of a result frame, in API_RESULT_COLUMNS order.
+    """
+    return results_df[[col for col in API_RESULT_COLUMNS if col in results_df.columns]]
+
+
+def results_to_json(results_df, catalog_version):
+    """
+    Serialize search results as one compact JSON document.
+
+    Args:
+        results_df (pd.DataFrame): Output of process_user_inputs.
+        catalog_version (str): Version of the catalog the results come from.
+
+    Returns:
+        str: {"catalog_version": ..., "count": ..., "results": [...]}, missing values as null.
+    """
+    # pandas writes NaN as null and NumPy scalars natively, which json.dumps does not
+    records = _project(results_df).to_json(orient="records", force_ascii=False, date_format="iso")
+    return (f'{{"catalog_version":{json.dumps(catalog_version)},"count":{len(results_df)},'
+            f'"results":{records}}}')
+
+
+def iter_ndjson(results_df, chunk_size=100):
+    """
+    Serialize search results as newline-delimited JSON, one course per line, in chunks.
+
+    Args:
+        results_df (pd.DataFrame): Output of process_user_inputs.
+        chunk_size (int, optional): Courses serialized per yielded chunk. Defaults to 100.
+
+    Yields:
+        str: Chunks of NDJSON lines.
+    """
+    projected = _project(results_df)
+    for start in range(0, len(projected), chunk_size):
+        chunk = projected.iloc[start:start + chunk_size]
+        lines = chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+        yield lines if lines.endswith("\n") else lines + "\n"
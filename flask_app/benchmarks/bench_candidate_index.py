@@ -0,0 +1,81 @@
+"""
+Benchmark: query latency of CourseMatcher.match_courses with and without the n-gram candidate index
+on synthetic catalogs of increasing size. Every query also checks that both paths keep the same rows.
+
+Usage (from flask_app/):
+    python -m benchmarks.bench_candidate_index --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from app.catalog_compiler import compile_catalog
+from app.models.candidate_index import NgramIndex
+from app.models.matching import CourseMatcher
+
+SYLLABLES = ["ber", "lin", "kurs", "ma", "len", "en", "glisch", "an", "fän", "ger", "töp", "fern", "com",
+             "pu", "ter", "yo", "ga", "ko", "chen", "tan", "zen", "spa", "nisch", "fo", "to", "gra", "fie",
+             "deutsch", "ni", "veau", "gi", "tar", "re", "schrei", "ben", "nä", "hen", "pro", "gramm"]
+
+QUERIES = ["töpfern", "englisch", "fotografie", "englisch anfänger", "computerkurs grundlagen"]
+
+
+def synthetic_catalog(n_rows, seed=0):
+    """
+    Build a catalog with pseudo-German course names drawn from a few thousand syllable words.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = ["".join(rng.choice(SYLLABLES, rng.integers(2, 5))) for _ in range(5000)]
+    vocab[:6] = ["töpfern", "englisch", "anfänger", "fotografie", "computerkurs", "grundlagen"]
+    vocab = np.array(vocab, dtype=object)
+
+    def names(k_min, k_max):
+        counts = rng.integers(k_min, k_max + 1, n_rows)
+        words = vocab[rng.integers(0, len(vocab), counts.sum())]
+        splits = np.split(words, np.cumsum(counts)[:-1])
+        return [" ".join(w) for w in splits]
+
+    german = names(1, 4)
+    return pd.DataFrame({
+        "guid": np.arange(n_rows).astype(str),
+        "course_name_german": german,
+        "course_name_translated": names(1, 4),
+        "search_text": [g + " " + extra for g, extra in zip(german, names(4, 10))],
+    })
+
+
+def time_match(df, query, search_index):
+    matcher = CourseMatcher(df=df, user_query=query, search_index=search_index)
+    matcher.translated_query = query
+    matcher.search_tokens = query.split()
+    matcher.use_partial = len(matcher.search_tokens) > 1
+    start = time.perf_counter()
+    mask = matcher.batch_token_match()
+    return time.perf_counter() - start, mask
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for n_rows in args.sizes:
+        df = compile_catalog(synthetic_catalog(n_rows))
+        start = time.perf_counter()
+        index = NgramIndex.from_catalog(df)
+        build = time.perf_counter() - start
+        print(f"\n{n_rows:>9,} courses | index build {build:6.2f} s")
+
+        for query in QUERIES:
+            full_time, full_mask = time_match(df, query, None)
+            index_time, index_mask = time_match(df, query, index)
+            assert np.array_equal(full_mask, index_mask), f"index changed the result for {query!r}"
+            candidates = index.candidates(query.split(), len(query.split()) > 1, max_candidate_share=1.0)
+            share = "not prunable" if candidates is None else f"{candidates.mean():6.1%} candidates"
+            print(f"  {query:<25} full {full_time * 1000:9.1f} ms | index {index_time * 1000:9.1f} ms"
+                  f" | {share} | {full_mask.sum():,} matches")
+
+
+if __name__ == "__main__":
+    main()
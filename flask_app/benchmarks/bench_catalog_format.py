@@ -0,0 +1,110 @@
+"""
+Benchmark: cold-start time and memory per worker for the pickled catalog vs. the columnar catalog.
+
+Starts N worker processes per format at the same time (like N gunicorn workers), each of which loads the
+catalog and touches every column. RSS counts shared page-cache pages in every worker, PSS splits them
+between the workers mapping them, so PSS is the number that shows the sharing.
+
+A third round opens the columnar catalog but only the columns the search pipeline reads, which is what
+the lazy loader allows and the pickle cannot do.
+
+Usage (from flask_app/):
+    python -m benchmarks.bench_catalog_format app/data/Processed_data_for_app.pkl --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+# Columns read by matching and ranking (the card fields for rendering are decoded on demand)
+SEARCH_COLUMNS = [
+    "guid", "course_name_german", "course_name_translated", "search_text", "price_amount",
+    "prop_occupancy_left", "prop_minimum_to_reach", "gap_to_80_percent_women", "gap_to_80_percent_men",
+    "sponsored",
+]
+
+
+def _memory_kb():
+    """
+    Return (rss_kb, pss_kb) of the current process, read from /proc (Linux only).
+    """
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values.get("Rss:", 0), values.get("Pss:", 0)
+
+
+def _worker(fmt, path, barrier, results, columns=None):
+    start = time.perf_counter()
+    import numpy as np
+    import pandas as pd
+
+    if fmt == "pickle":
+        df = pd.read_pickle(path)
+    else:
+        from app.columnar_catalog import ColumnarCatalog
+        df = ColumnarCatalog(path).to_frame(columns)
+
+    # Touch every column so lazily mapped pages are actually faulted in
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype.kind in "biuf":
+            np.nansum(values)
+        else:
+            len(values)
+    elapsed = time.perf_counter() - start
+
+    # Measure while all workers of this round are alive, so shared pages are split between them
+    barrier.wait()
+    rss, pss = _memory_kb()
+    results.put((elapsed, rss, pss))
+    barrier.wait()
+
+
+def run(fmt, path, workers, columns=None, label=None):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(fmt, path, barrier, results, columns)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    n = len(rows)
+    print(f"{label or fmt:>17} | start {sum(r[0] for r in rows) / n * 1000:8.1f} ms"
+          f" | RSS {sum(r[1] for r in rows) / n / 1024:7.1f} MB"
+          f" | PSS {sum(r[2] for r in rows) / n / 1024:7.1f} MB   (mean per worker, {n} workers)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("pickle_path")
+    parser.add_argument("--columnar-path", help="Existing columnar catalog (converted on the fly if omitted)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from app.columnar_catalog import convert_pickle_to_columnar
+
+    with tempfile.TemporaryDirectory() as tmp:
+        columnar_path = args.columnar_path
+        if columnar_path is None:
+            columnar_path = os.path.join(tmp, "catalog.cols")
+            convert_pickle_to_columnar(args.pickle_path, columnar_path)
+
+        run("pickle", args.pickle_path, args.workers)
+        run("columnar", columnar_path, args.workers)
+
+        from app.columnar_catalog import ColumnarCatalog
+        available = set(ColumnarCatalog(columnar_path).columns)
+        columns = [c for c in SEARCH_COLUMNS if c in available]
+        run("columnar", columnar_path, args.workers, columns=columns, label="columnar (search)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: consensus engines (app.models.kemeny) on random weighted rankings of n = 10 ... 200 courses.
+Reports solve time, Kemeny cost and the optimality gap of each engine; the ILP is only run up to --ilp-max-n.
+
+Usage (from flask_app/):
+    python -m benchmarks.bench_consensus --sizes 10 20 50 100 200 --voters 3
+"""
+import argparse
+import numpy as np
+
+from app.models.kemeny import DecomposingEngine, DynamicProgrammingEngine, ILPEngine, LocalSearchEngine
+
+
+def random_preferences(n, voters, seed=0, noise=0.3):
+    """
+    Preference matrix of `voters` weighted rankings, each a noisy copy of one hidden ranking
+    (like relevance, platform priority and sponsorship rankings of the same result list).
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.random(n)
+    weights = np.zeros((n, n))
+    for weight in rng.random(voters) + 0.5:
+        scores = base + noise * rng.standard_normal(n)
+        weights += weight * (scores[:, None] > scores[None, :])
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    parser.add_argument("--voters", type=int, default=3)
+    parser.add_argument("--ilp-max-n", type=int, default=20)
+    parser.add_argument("--time-limit", type=float, default=0.05, help="local search budget in seconds")
+    args = parser.parse_args()
+
+    engines = [
+        DecomposingEngine(heuristic=LocalSearchEngine(time_limit=args.time_limit)),
+        LocalSearchEngine(time_limit=args.time_limit),
+        DynamicProgrammingEngine(),
+        ILPEngine(),
+    ]
+    for n in args.sizes:
+        weights = random_preferences(n, args.voters)
+        print(f"\nn = {n} courses, {args.voters} voters")
+        for engine in engines:
+            if isinstance(engine, DynamicProgrammingEngine) and n > engine.max_n:
+                continue
+            if isinstance(engine, ILPEngine) and n > args.ilp_max_n:
+                continue
+            result = engine.solve(weights)
+            print(f"  {engine.name:<13} {result.seconds * 1000:9.1f} ms | cost {result.cost:10.3f}"
+                  f" | gap {result.gap:6.2%} | exact {result.exact}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: worker startup. Each scenario runs in a fresh interpreter and reports the median over --repeats runs:
+importing flask_app, serving /home on a cold worker, the first search on a cold worker, and the first search
+after warm_up() (with the warm-up time itself).
+
+Usage (from flask_app/):
+    python -m benchmarks.bench_startup --repeats 5 --query "Töpfern für Anfänger"
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter; prints a JSON object of timings
+SCENARIO = """
+import json, sys, time
+start = time.perf_counter()
+import flask_app
+timings = {{"import": time.perf_counter() - start}}
+if {catalog!r}:
+    flask_app.CATALOG_PATH = {catalog!r}
+client = flask_app.app.test_client()
+scenario = {scenario!r}
+if scenario == "home":
+    start = time.perf_counter()
+    client.get("/home")
+    timings["first /home"] = time.perf_counter() - start
+else:
+    if scenario == "warm":
+        start = time.perf_counter()
+        flask_app.warm_up()
+        timings["warm-up"] = time.perf_counter() - start
+    start = time.perf_counter()
+    client.get("/api/search", query_string={{"q": {query!r}, "gender": "female"}})
+    timings["first search"] = time.perf_counter() - start
+    start = time.perf_counter()
+    client.get("/api/search", query_string={{"q": {query!r} + " Kurs", "gender": "female"}})
+    timings["second search"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_scenario(scenario, query, catalog):
+    """
+    Run one scenario in a new interpreter and return its timings.
+    """
+    code = SCENARIO.format(scenario=scenario, query=query, catalog=catalog)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--query", default="Töpfern für Anfänger", help="search query (German avoids translation)")
+    parser.add_argument("--catalog", default="", help="catalog path (default: flask_app.CATALOG_PATH)")
+    args = parser.parse_args()
+
+    for scenario in ("home", "cold", "warm"):
+        runs = [run_scenario(scenario, args.query, args.catalog) for _ in range(args.repeats)]
+        medians = {step: statistics.median(run[step] for run in runs) for step in runs[0]}
+        print(f"{scenario:<5} " + " | ".join(f"{step} {seconds * 1000:8.1f} ms" for step, seconds in medians.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
-from flask import Flask, render_template, request
-from app.processor import process_user_inputs
-from app.assets_loader import AssetLoader
-import pandas as pd
+from flask import Flask, json, render_template, request, stream_template
+from app.catalog_pages import CatalogPage
+from app.search_api import iter_ndjson, parse_search_args, results_to_json, search_etag
 import os
 import sys
 from werkzeug.datastructures import MultiDict
@@ -11,6 +10,34 @@ sys.stdout.reconfigure(encoding='utf-8')
 
 app = Flask(__name__)
 
+# The loader caches the catalog per process, so building one per request only costs a stat() call
+CATALOG_PATH = os.path.abspath("app/data/Processed_data_for_app.pkl")
+
+# Longest wait for a query translation; past it, results matched on the English course names are served
+TRANSLATION_BUDGET_SECONDS = 1.5
+
+
+def get_loader():
+    """
+    Return the catalog loader. The pipeline (pandas, rapidfuzz, ranking models) is imported on first use, so
+    importing this module and serving /home or /about stay cheap; call warm_up() to pay that cost up front.
+    """
+    from app.assets_loader import AssetLoader
+    return AssetLoader(df_path=CATALOG_PATH)
+
+
+def warm_up():
+    """
+    Load the catalog and run one dummy search, so the first user search does not pay the one-time costs.
+    Call it before the worker serves requests: from the WSGI file after importing `app`, or from a gunicorn
+    post_worker_init hook.
+
+    Returns:
+        dict: Seconds per warm-up step.
+    """
+    from app.warmup import warm_up as warm_up_worker
+    return warm_up_worker(CATALOG_PATH)
+
 @app.route('/')
 @app.route('/home')
 def home():
@@ -19,11 +46,12 @@ def home():
 
 @app.route("/courses", methods=["GET", "POST"])
 def course_list():
-    loader = AssetLoader(df_path=os.path.abspath("app/data/Processed_data_for_app.pkl"))
-    df = loader.get_dataframe()
+    loader = get_loader()
 
     if request.method == "POST":
+        from app.processor import process_user_inputs
         try:
+            df = loader.get_dataframe()
             user_query = request.form.get("search", "")
             budget_input = request.form.get("budget", "").strip()
             user_budget = float(budget_input) if budget_input else 0
@@ -35,7 +63,13 @@ def course_list():
                 user_budget=user_budget,
                 user_gender=user_gender,
                 user_target_groups=target_groups,
-                df=df
+                df=df,
+                search_index=loader.get_search_index(),
+                translator=loader.get_translator(),
+                detector=loader.get_language_detector(),
+                catalog_version=loader.catalog_version,
+                concurrent_translation=True,
+                translation_timeout=TRANSLATION_BUDGET_SECONDS
             )
 
             return render_template(
@@ -46,20 +80,84 @@ def course_list():
 
         except Exception as e:
             error_msg = f"Hey, one last thing: {e}"
-            empty_df = pd.DataFrame()
             return render_template(
                 "courses.html",
-                courses=empty_df.to_dict(orient="records"),
+                courses=[],
                 error=error_msg,
                 form_data=request.form  # Re-populate form after failure
             )
 
-    # GET request: show full list
-    return render_template(
+    # GET request: stream one page of the catalog, projected to the card fields
+    try:
+        page = CatalogPage.from_request_args(loader, request.args)
+    except ValueError as e:
+        return render_template(
+            "courses.html",
+            courses=[],
+            error=f"Hey, one last thing: {e}",
+            form_data=MultiDict()
+        )
+
+    return app.response_class(stream_template(
         "courses.html",
-        courses=df.to_dict(orient="records"),
+        courses=page.records(),
+        total_courses=page.total,
+        pagination=page,
         form_data=MultiDict()  # Empty but safe for .getlist() in template
-    )
+    ))
+
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """
+    JSON search API running the same pipeline as the search form.
+    Responses carry an ETag derived from the catalog version and the normalized request, so repeated searches
+    get a 304 without being recomputed. format=ndjson streams one course per line.
+    """
+    from app.processor import process_user_inputs
+
+    loader = get_loader()
+    try:
+        params = parse_search_args(request.args)
+    except ValueError as e:
+        return app.response_class(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+
+    etag = search_etag(params, loader.catalog_version)
+    headers = {"Cache-Control": "no-cache"}  # caches may store responses but must revalidate them
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    try:
+        results_df = process_user_inputs(
+            user_query=params["user_query"],
+            user_budget=params["user_budget"],
+            user_gender=params["user_gender"],
+            user_target_groups=params["user_target_groups"],
+            df=loader.get_dataframe(),
+            search_index=loader.get_search_index(),
+            translator=loader.get_translator(),
+            detector=loader.get_language_detector(),
+            catalog_version=loader.catalog_version,
+            top_n=params["top_n"],
+            concurrent_translation=True,
+            translation_timeout=TRANSLATION_BUDGET_SECONDS
+        )
+    except ValueError as e:
+        return app.response_class(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+
+    if params["format"] == "ndjson":
+        response = app.response_class(iter_ndjson(results_df), mimetype="application/x-ndjson", headers=headers)
+    else:
+        response = app.response_class(results_to_json(results_df, loader.catalog_version),
+                                      mimetype="application/json", headers=headers)
+    if results_df.attrs.get("english_only"):
+        # English-only fallback: must not be revalidated as the full result later
+        response.headers["Cache-Control"] = "no-store"
+    else:
+        response.set_etag(etag)
+    return response
 
 
 @app.route('/about')
@@ -68,4 +166,5 @@ def about():
 
 
 if __name__ == '__main__':
+    warm_up()
     app.run(debug=True)
@@ -0,0 +1,656 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+from app.assets_loader import AssetLoader
+from app.bulk_matching import run_bulk
+from app.catalog_compiler import compile_catalog
+from app.catalog_pages import CARD_COLUMNS, MAX_PAGE_SIZE, CatalogPage
+from app.columnar_catalog import ColumnarCatalog, convert_pickle_to_columnar
+from app.models.candidate_index import NgramIndex
+from app.models.consensus_ranker import ConsensusRanker
+from app.models.kemeny import DecomposingEngine, DynamicProgrammingEngine, ILPEngine, LocalSearchEngine
+from app.models.language import CatalogLanguageDetector
+from app.models.matching import CourseMatcher
+from app.models.platform_ranker import PlatformPreferenceRanker
+from app.models.translation import CachedTranslator, GlossaryTranslator, TranslationCache
+from app.processor import process_user_inputs
+from app.result_cache import ResultCache
+from app.warmup import warm_up
+
+GERMAN_WORDS = ["Englisch", "für", "Anfänger", "Töpfern", "Computer", "Grundlagen", "Deutsch", "Yoga",
+                "Malen", "Spanisch", "Kochen", "Fotografie", "Gitarre", "Italienisch", "Tanzen", "Nähen"]
+ENGLISH_WORDS = ["English", "for", "beginners", "pottery", "computer", "basics", "German", "yoga",
+                 "painting", "Spanish", "cooking", "photography", "guitar", "Italian", "dancing", "sewing"]
+GROUPS = ["Menschen mit Migrationshintergrund", "Frauen", "Ältere", "Kinder", "Jugendliche"]
+
+
+def make_catalog(n=400, seed=0):
+    """
+    Build a small synthetic course catalog with the columns the app pipeline relies on.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        idx = rng.choice(len(GERMAN_WORDS), rng.integers(1, 4), replace=False)
+        german = " ".join(GERMAN_WORDS[j] for j in idx)
+        english = " ".join(ENGLISH_WORDS[j] for j in idx)
+        missing = i % 23 == 0
+        rows.append({
+            "guid": f"guid-{i:06d}",
+            "course_name_german": None if missing else german,
+            "course_name_translated": None if missing else english,
+            "search_text": f"{'' if missing else german} Ein Kurs {GERMAN_WORDS[rng.integers(len(GERMAN_WORDS))]}",
+            "price_amount": float(rng.integers(10, 300)),
+            "prop_occupancy_left": rng.random(),
+            "prop_minimum_to_reach": rng.random() * 0.5,
+            "percent_women": rng.random(),
+            "sponsored": int(rng.random() < 0.25),
+            "target_group_raw": GROUPS[rng.integers(len(GROUPS))] if rng.random() < 0.5 else None,
+        })
+    df = pd.DataFrame(rows)
+    df["gap_to_80_percent_women"] = 0.8 - df["percent_women"]
+    df["gap_to_80_percent_men"] = 0.8 - (1 - df["percent_women"])
+    for group in GROUPS:
+        df[f"target_group_{group}"] = (df["target_group_raw"] == group).astype(int)
+    return df
+
+
+class TestAssetLoaderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "catalog.pkl")
+        make_catalog(50).to_pickle(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_catalog_shared_and_reloaded_on_change(self):
+        first = AssetLoader(self.path)
+        second = AssetLoader(self.path)
+        self.assertEqual(first.catalog_version, second.catalog_version)
+        self.assertEqual(first.loaded_at, second.loaded_at)
+
+        # Views handed out must not leak column changes back into the cache
+        view = first.get_dataframe()
+        view["extra"] = 1
+        self.assertNotIn("extra", second.get_dataframe().columns)
+
+        # Touching the file without changing it keeps the parsed catalog
+        version = first.catalog_version
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(first.refresh())
+        self.assertEqual(AssetLoader(self.path).loaded_at, first.loaded_at)
+
+        # A loader keeps serving its version until refreshed; new loaders see the new file
+        make_catalog(10).to_pickle(self.path)
+        self.assertEqual(len(second.get_dataframe()), 50)
+        self.assertEqual(len(AssetLoader(self.path).get_dataframe()), 10)
+        self.assertTrue(second.refresh())
+        self.assertNotEqual(second.catalog_version, version)
+        print("Asset loader cache test passed")
+
+    def test_columnar_catalog_round_trip(self):
+        columnar_path = os.path.join(self.tmpdir.name, "catalog.cols")
+        convert_pickle_to_columnar(self.path, columnar_path)
+
+        loader = AssetLoader(columnar_path)
+        pd.testing.assert_frame_equal(loader.get_dataframe(), compile_catalog(pd.read_pickle(self.path)))
+        self.assertEqual(list(loader.get_dataframe(["guid", "price_amount"]).columns), ["guid", "price_amount"])
+
+        # String row ranges decode only their own bytes, with missing values restored
+        store = ColumnarCatalog(columnar_path)
+        names = store.column("course_name_german")
+        for start, stop in [(0, 5), (20, 47), (45, 1000), (50, 50)]:
+            expected = pd.Series(names[start:stop], dtype=object)
+            pd.testing.assert_series_equal(pd.Series(store.string_range("course_name_german", start, stop),
+                                                     dtype=object), expected)
+
+        # Row pages slice every column before decoding and match the full frame
+        full = store.to_frame()
+        for start, stop in [(0, 8), (45, 1000), (50, 50)]:
+            pd.testing.assert_frame_equal(ColumnarCatalog(columnar_path).rows(start, stop), full.iloc[start:stop])
+        pd.testing.assert_frame_equal(AssetLoader(columnar_path).get_rows(8, 16, columns=["guid", "price_amount"]),
+                                      full.iloc[8:16][["guid", "price_amount"]])
+
+        # Converting over an existing catalog swaps it in and leaves no temporary or old directory behind
+        make_catalog(20).to_pickle(self.path)
+        convert_pickle_to_columnar(self.path, columnar_path)
+        self.assertEqual(len(AssetLoader(columnar_path).get_dataframe()), 20)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), sorted(["catalog.cols", os.path.basename(self.path)]))
+        print("Columnar catalog test passed")
+
+    def test_catalog_pages_cover_the_catalog_once(self):
+        columnar_path = os.path.join(self.tmpdir.name, "catalog.cols")
+        convert_pickle_to_columnar(self.path, columnar_path)
+        expected = list(pd.read_pickle(self.path)['guid'])
+
+        for path in (self.path, columnar_path):
+            loader = AssetLoader(path)
+            seen, cursor = [], None
+            while True:
+                page = CatalogPage(loader, per_page=8, after=cursor)
+                records = list(page.records())
+                self.assertTrue(set(records[0]) <= set(CARD_COLUMNS))
+                seen.extend(record['guid'] for record in records)
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+            self.assertListEqual(seen, expected)
+
+            # Walking back from the last cursor page with explicit cursors revisits every course once
+            back = []
+            while True:
+                records = [r['guid'] for r in page.records()]
+                back[:0] = records
+                self.assertIsNone(page.page)
+                if not page.has_prev:
+                    break
+                page = CatalogPage(loader, per_page=8, before=page.prev_cursor)
+            self.assertListEqual(back, expected)
+            self.assertIsNone(page.prev_cursor)
+
+            # Numbered pages address the same rows as the cursor walk
+            third = [r['guid'] for r in CatalogPage(loader, page=3, per_page=8).records()]
+            self.assertListEqual(third, expected[16:24])
+            self.assertEqual(CatalogPage(loader, per_page=10_000).per_page, MAX_PAGE_SIZE)
+            self.assertEqual(CatalogPage(loader, page=3, per_page=8).page, 3)
+            with self.assertRaises(ValueError):
+                CatalogPage(loader, after="no-such-guid")
+            with self.assertRaises(ValueError):
+                CatalogPage(loader, after=expected[3], before=expected[9])
+        print("Catalog pages test passed")
+
+
+class StubTranslator:
+    """
+    Local stand-in for the Google backend that records how often it is called.
+    """
+
+    def __init__(self, translations=None):
+        self.translations = translations or {}
+        self.calls = 0
+
+    def translate(self, text, source, target):
+        self.calls += 1
+        return self.translations.get(text.lower(), text)
+
+
+class SlowTranslator(StubTranslator):
+    """
+    Stub translator with network-like latency.
+    """
+
+    def __init__(self, translations=None, delay=0.3):
+        super().__init__(translations)
+        self.delay = delay
+
+    def translate(self, text, source, target):
+        time.sleep(self.delay)
+        return super().translate(text, source, target)
+
+
+class FailingTranslator(StubTranslator):
+    """
+    Stub translator whose backend raises the given error.
+    """
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+    def translate(self, text, source, target):
+        self.calls += 1
+        raise self.error
+
+
+def prepared_matcher(df, query, **kwargs):
+    """
+    Build a CourseMatcher with the query already "translated", so tests never hit the network.
+    """
+    kwargs.setdefault("translator", StubTranslator())
+    matcher = CourseMatcher(df=df, user_query=query, **kwargs)
+    matcher.translated_query = query
+    matcher.search_tokens = query.lower().split()
+    matcher.use_partial = len(matcher.search_tokens) > 1
+    return matcher
+
+
+class TestCourseMatcherScoring(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_catalog(400)
+        self.queries = ["Englisch Anfänger", "töpfern", "Computer Grundlagen", "Yog", "xyzq"]
+
+    def test_batched_matching_equals_row_matching(self):
+        for query in self.queries:
+            row_mask = prepared_matcher(self.df, query, batched=False)
+            batch_mask = prepared_matcher(self.df, query, batched=True)
+            expected = (self.df['course_name_german'].apply(row_mask.fuzzy_token_match) |
+                        self.df['course_name_translated'].apply(row_mask.fuzzy_token_match) |
+                        self.df['search_text'].apply(row_mask.fuzzy_token_match))
+            self.assertListEqual(list(batch_mask.batch_token_match()), list(expected), query)
+
+            # Same result on a compiled catalog, which carries the pre-normalized columns
+            compiled = prepared_matcher(compile_catalog(self.df.copy()), query)
+            self.assertListEqual(list(compiled.batch_token_match()), list(expected), query)
+        print("Batched matching test passed")
+
+    def test_candidate_index_keeps_all_matches(self):
+        compiled = compile_catalog(self.df.copy())
+        index = NgramIndex.from_catalog(compiled)
+        for query in self.queries + ["fotografie", "englisch anfängr", "kochen"]:
+            expected = prepared_matcher(compiled, query).batch_token_match()
+            with_index = prepared_matcher(compiled, query, search_index=index).batch_token_match()
+            self.assertListEqual(list(with_index), list(expected), query)
+
+            candidates = index.candidates(query.lower().split(), len(query.split()) > 1, max_candidate_share=1.0)
+            if candidates is not None:
+                self.assertFalse((expected & ~candidates).any(), query)
+        print("Candidate index test passed")
+
+
+class TestConcurrentTranslation(unittest.TestCase):
+
+    def setUp(self):
+        self.df = compile_catalog(make_catalog(400))
+        self.detector = CatalogLanguageDetector.from_catalog(self.df)
+
+    def matcher(self, translator, **kwargs):
+        return CourseMatcher(df=self.df, user_query="pottery", detector=self.detector, translator=translator,
+                             **kwargs)
+
+    def test_translation_overlaps_and_merges(self):
+        sequential = self.matcher(StubTranslator({"pottery": "Töpfern"}))
+        sequential.preprocess_query()
+        sequential.match_courses()
+
+        concurrent = self.matcher(SlowTranslator({"pottery": "Töpfern"}, delay=0.1), concurrent=True)
+        result = concurrent.run()
+        self.assertFalse(concurrent.translation_timed_out)
+        self.assertEqual(concurrent.translated_query, "Töpfern")
+        # German-side matches are all kept; English-side matches are merged in
+        self.assertTrue(set(sequential.filtered_df['guid']) <= set(concurrent.filtered_df['guid']))
+        self.assertFalse(result.empty)
+        print("Concurrent translation merge test passed")
+
+    def test_english_results_when_translation_is_over_budget(self):
+        matcher = self.matcher(SlowTranslator({"pottery": "Töpfern"}, delay=0.5), concurrent=True,
+                               translation_timeout=0.05)
+        start = time.perf_counter()
+        result = matcher.run()
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertTrue(matcher.translation_timed_out)
+        self.assertTrue(result['course_name_translated'].str.lower().str.contains("pottery").all())
+        self.assertEqual(result['match_score'].iloc[0], 1.0)
+        print("Translation budget test passed")
+
+    def test_failed_translation_is_not_a_timeout(self):
+        # A backend that times out on its own fails fast: that is an error, not the latency budget running out
+        for error in (RuntimeError("quota exceeded"), TimeoutError("read timed out")):
+            matcher = self.matcher(FailingTranslator(error), concurrent=True, translation_timeout=5.0)
+            with mock.patch("builtins.print") as log:
+                result = matcher.run()
+            self.assertFalse(matcher.translation_timed_out)
+            self.assertIs(matcher.translation_error, error)
+            self.assertTrue(matcher.english_only)
+            self.assertIn(repr(error), log.call_args.args[0])
+            self.assertTrue(result['course_name_translated'].str.lower().str.contains("pottery").all())
+        print("Failed translation test passed")
+
+
+class TestTranslationCache(unittest.TestCase):
+
+    def test_repeated_queries_skip_the_backend(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "translations.sqlite3")
+            backend = StubTranslator({"pottery": "Töpfern"})
+
+            translator = CachedTranslator(backend=backend, cache=TranslationCache(path=path))
+            self.assertEqual(translator.translate("Pottery"), "Töpfern")
+            self.assertEqual(translator.translate("  pottery "), "Töpfern")
+            self.assertEqual(backend.calls, 1)
+
+            # A new process (fresh in-memory level) is served from SQLite
+            restarted = CachedTranslator(backend=backend, cache=TranslationCache(path=path))
+            self.assertEqual(restarted.translate("pottery"), "Töpfern")
+            self.assertEqual(backend.calls, 1)
+            self.assertEqual(restarted.stats()["disk_hits"], 1)
+
+            # Expired entries go back to the backend
+            expired = CachedTranslator(backend=backend, cache=TranslationCache(path=path, ttl_seconds=0))
+            expired.translate("pottery")
+            self.assertEqual(backend.calls, 2)
+        print("Translation cache test passed")
+
+    def test_disk_store_is_pruned_every_few_writes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = TranslationCache(path=os.path.join(tmpdir, "translations.sqlite3"), max_disk_entries=10,
+                                     prune_every=4)
+            sizes = []
+            for i in range(30):
+                cache.put((f"query {i}", "en", "de"), f"Anfrage {i}")
+                sizes.append(cache._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0])
+            # Bounded by the limit plus the writes since the last prune
+            self.assertLessEqual(max(sizes), 10 + 4 - 1)
+            self.assertEqual(sizes[28], 10)  # pruned on writes 0, 4, ..., 28
+            restarted = TranslationCache(path=cache.path)
+            self.assertEqual(restarted.get(("query 29", "en", "de")), ("Anfrage 29", "disk"))
+            self.assertEqual(restarted.get(("query 0", "en", "de")), (None, None))
+
+    def test_glossary_translates_catalog_vocabulary_offline(self):
+        remote = StubTranslator()
+        glossary = GlossaryTranslator.from_catalog(make_catalog(400), fallback=remote)
+
+        self.assertEqual(glossary.translate("pottery").lower(), "töpfern")
+        self.assertEqual(glossary.translate("Spanish cooking").lower(), "spanisch kochen")
+        self.assertEqual(remote.calls, 0)
+
+        # Mostly unknown words go to the remote translator
+        glossary.translate("quantum chromodynamics seminar")
+        self.assertEqual(remote.calls, 1)
+        print("Glossary translator test passed")
+
+
+class TestLanguageDetector(unittest.TestCase):
+
+    def test_catalog_detector_is_deterministic(self):
+        detector = CatalogLanguageDetector.from_catalog(make_catalog(400))
+        self.assertEqual(detector.detect("Englisch für Anfänger")[0], "de")
+        self.assertEqual(detector.detect("English for beginners")[0], "en")
+        self.assertEqual(detector.detect("Spanish cooking"), detector.detect("Spanish cooking"))
+
+        # Without any evidence the detector is unsure, and the query is searched as typed and translated
+        unsure = CatalogLanguageDetector({})
+        self.assertEqual(unsure.detect("xyz")[1], 0.5)
+        matcher = CourseMatcher(df=make_catalog(10), user_query="Pottery", detector=unsure,
+                                translator=StubTranslator({"pottery": "Töpfern"}))
+        matcher.preprocess_query()
+        self.assertEqual(matcher.search_tokens, ["töpfern", "pottery"])
+        self.assertFalse(matcher.use_partial)
+        print("Language detector test passed")
+
+
+class TestConsensusEngines(unittest.TestCase):
+
+    def test_engines_match_the_ilp(self):
+        rng = np.random.default_rng(3)
+        for n in (2, 5, 8, 11):
+            weights = np.zeros((n, n))
+            for voter_weight in rng.random(3):
+                position = np.argsort(rng.permutation(n))
+                weights += voter_weight * (position[:, None] < position[None, :])
+
+            optimum = ILPEngine().solve(weights).cost
+            for engine in (DynamicProgrammingEngine(), DecomposingEngine(), DecomposingEngine(exact_max_n=2)):
+                result = engine.solve(weights)
+                self.assertEqual(sorted(result.order), list(range(n)))
+                if result.exact:
+                    self.assertAlmostEqual(result.cost, optimum)
+                self.assertLessEqual(result.lower_bound, optimum + 1e-9)
+
+            heuristic = LocalSearchEngine().solve(weights)
+            self.assertGreaterEqual(heuristic.cost, optimum - 1e-9)
+            self.assertGreaterEqual(heuristic.gap, 0)
+        print("Consensus engine test passed")
+
+    def test_consensus_ranker_uses_engine(self):
+        df = make_catalog(30)
+        platform_df = df.sort_values("percent_women")
+        default = ConsensusRanker(df, platform_df)
+        ranked = default.get_ranked_df()
+        self.assertEqual(sorted(ranked['guid']), sorted(df['guid']))
+        self.assertTrue(default.result.exact)
+
+        ilp = ConsensusRanker(df, platform_df, engine="ilp")
+        ilp.get_ranked_df()
+        self.assertAlmostEqual(default.result.cost, ilp.result.cost)
+        print("Consensus ranker engine test passed")
+
+    def test_margin_matrix_matches_pairwise_votes(self):
+        df = make_catalog(25)
+        platform_df = df.sort_values("percent_women")
+        sponsor_df = df.sort_values("sponsored", ascending=False)
+        weights = [0.5, 0.3, 0.2]
+        ranker = ConsensusRanker(df, platform_df, additional_rankings=[sponsor_df], weights=weights)
+
+        # Reference: the pairwise vote loop over all voters
+        guids = list(df['guid'])
+        ranks = [{g: r for r, g in enumerate(order['guid'])} for order in (df, platform_df, sponsor_df)]
+        expected = np.zeros((len(guids), len(guids)))
+        for a, i in enumerate(guids):
+            for b, j in enumerate(guids):
+                if a != b:
+                    vote = sum(w * (1 if rank[i] < rank[j] else -1) for w, rank in zip(weights, ranks))
+                    expected[a, b] = 0.1 if abs(vote) < 1e-12 else max(vote, 0)
+        np.testing.assert_allclose(ranker.margin_matrix(), expected)
+
+        ranked = ranker.get_ranked_df()
+        self.assertEqual(list(ranked['guid']), ranker.compute_consensus())
+        with self.assertRaises(ValueError):
+            ConsensusRanker(df, platform_df, weights=[1.0])
+        print("Margin matrix test passed")
+
+
+class TestPlatformRanker(unittest.TestCase):
+
+    def test_profile_batch_matches_single_rankings(self):
+        df = make_catalog(120)
+        profiles = [("female", ["Children"]), ("male", ["Women", "Older adults / older people"]),
+                    ("diverse", ["People with a migration background"]), ("male", ["Unknown group"])]
+        orders = PlatformPreferenceRanker.rank_profiles(df, profiles)
+        self.assertEqual(orders.shape, (len(profiles), len(df)))
+        for (gender, groups), order in zip(profiles, orders):
+            ranked = PlatformPreferenceRanker(gender, groups).rank(df)
+            self.assertListEqual(list(df['guid'].to_numpy()[order]), list(ranked['guid']))
+            self.assertTrue(ranked['final_score_platform'].is_monotonic_decreasing)
+
+        with self.assertRaises(ValueError):
+            PlatformPreferenceRanker.rank_profiles(df, [("female", [])])
+        print("Platform ranker batch test passed")
+
+    def test_compiled_features_match_raw_columns(self):
+        raw = make_catalog(120)
+        # Flags that are not plain 0/1 count once when set and not at all when missing
+        raw.loc[raw.index[::7], 'target_group_Kinder'] = 2
+        raw.loc[raw.index[3::11], 'target_group_Kinder'] = np.nan
+        compiled = compile_catalog(raw.copy())
+        self.assertEqual(compiled['platform_flags'].dtype, np.uint32)
+        self.assertEqual(compiled['platform_score_women'].dtype, np.float32)
+
+        # Groups selected twice are one criterion on both paths
+        profiles = [("female", ["Children", "Children"]), ("male", ["Women", "Older adults / older people", "Women"])]
+        raw_orders = PlatformPreferenceRanker.rank_profiles(raw, profiles)
+        compiled_orders = PlatformPreferenceRanker.rank_profiles(compiled, profiles)
+        np.testing.assert_array_equal(raw_orders, compiled_orders)
+        for (gender, groups), order in zip(profiles, compiled_orders):
+            from_raw = PlatformPreferenceRanker(gender, groups).rank(raw).set_index('guid')
+            from_compiled = PlatformPreferenceRanker(gender, groups).rank(compiled)
+            self.assertListEqual(list(compiled['guid'].to_numpy()[order]), list(from_compiled['guid']))
+            self.assertLessEqual(from_compiled['binary_sum'].max(), 1 + len(set(groups)))
+
+            aligned = from_raw.loc[from_compiled['guid']]
+            self.assertListEqual(list(from_compiled['binary_sum']), list(aligned['binary_sum']))
+            np.testing.assert_allclose(from_compiled['numeric_score'], aligned['numeric_score'], rtol=1e-6)
+
+        # Ranking leaves the matched frame as it was
+        before = raw.copy()
+        PlatformPreferenceRanker("female", ["Other target groups"]).rank(raw)
+        pd.testing.assert_frame_equal(raw, before)
+        print("Compiled platform features test passed")
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_concurrent_identical_requests_compute_once(self):
+        cache = ResultCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return pd.DataFrame({"guid": ["a", "b"]})
+
+        key = ResultCache.make_key(" Yoga ", 50, "Female", ["Frauen", "Kinder"], "v1")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(key, compute)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+
+        # Normalized inputs share the entry; a new catalog version invalidates it
+        same = ResultCache.make_key("yoga", 50.0, "female", ["Kinder", "Frauen"], "v1")
+        cache.get_or_compute(same, compute)
+        self.assertEqual(len(calls), 1)
+        cache.get_or_compute(ResultCache.make_key("yoga", 50, "female", ["Frauen", "Kinder"], "v2"), compute)
+        self.assertEqual(len(calls), 2)
+
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["hits"], stats["shared"], stats["invalidations"]), (2, 1, 3, 1))
+        self.assertGreater(stats["saved_seconds"], 0)
+        print("Result cache test passed")
+
+    def test_process_user_inputs_serves_cached_results(self):
+        df = make_catalog(200)
+        cache = ResultCache()
+        kwargs = dict(user_query="Töpfern", user_budget=0, user_gender="female", user_target_groups=["Women"], df=df,
+                      translator=StubTranslator(), detector=CatalogLanguageDetector.from_catalog(df),
+                      catalog_version="v1", result_cache=cache)
+        first = process_user_inputs(**kwargs)
+        second = process_user_inputs(**kwargs)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+        # Callers get their own copy
+        second["guid"] = "changed"
+        pd.testing.assert_frame_equal(process_user_inputs(**kwargs), first)
+        print("Processor cache test passed")
+
+
+class TestSearchApi(unittest.TestCase):
+
+    def setUp(self):
+        import flask_app
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "catalog.pkl")
+        make_catalog(300).to_pickle(path)
+        self.patch = mock.patch.object(flask_app, "CATALOG_PATH", path)
+        self.patch.start()
+        self.client = flask_app.app.test_client()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmpdir.cleanup()
+
+    def test_etag_and_conditional_get(self):
+        url = "/api/search?q=T%C3%B6pfern+Kochen&gender=female&target_group=Women&limit=5"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["count"], len(body["results"]))
+        self.assertLessEqual(body["count"], 5)
+        self.assertIn("guid", body["results"][0])
+        etag = response.headers["ETag"]
+
+        # Same normalized request: 304 without a body
+        repeat = self.client.get(url.replace("T%C3%B6pfern+Kochen", "t%C3%B6pfern++KOCHEN"),
+                                 headers={"If-None-Match": etag})
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.data, b"")
+
+        # NDJSON is a different representation with its own tag
+        ndjson = self.client.get(url + "&format=ndjson", headers={"If-None-Match": etag})
+        self.assertEqual(ndjson.status_code, 200)
+        lines = ndjson.data.decode("utf-8").splitlines()
+        self.assertListEqual([json_line.startswith('{"guid"') for json_line in lines], [True] * body["count"])
+
+        self.assertEqual(self.client.get("/api/search?q=&gender=female").status_code, 400)
+        print("Search API test passed")
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_lazy_imports_and_warm_up(self):
+        # Importing the web app must not pull in the search pipeline's heavy dependencies
+        code = "import sys, flask_app; print(sorted(m for m in ('pandas', 'deep_translator', 'langdetect') if m in sys.modules))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "catalog.pkl")
+            make_catalog(100).to_pickle(path)
+            timings = warm_up(path, query="Töpfern")
+            self.assertGreaterEqual(timings["total"], timings["search"])
+            # The warm-up built the shared artifacts the first search reuses
+            loader = AssetLoader(df_path=path)
+            with mock.patch("app.assets_loader.NgramIndex.from_catalog", side_effect=AssertionError):
+                loader.get_search_index()
+        print("Startup test passed")
+
+
+class TestBulkMatching(unittest.TestCase):
+
+    def test_pool_results_match_in_process_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            catalog = os.path.join(tmpdir, "catalog.pkl")
+            make_catalog(200).to_pickle(catalog)
+            requests = os.path.join(tmpdir, "queries.csv")
+            with open(requests, "w", encoding="utf-8") as f:
+                f.write("id,query,budget,gender,target_groups\n")
+                for i, query in enumerate(["Töpfern", "Computer Grundlagen", "xyzq", "Kochen", "Yoga", "Malen"] * 3):
+                    f.write(f"q{i},{query},{100 if i % 2 else ''},female,Women;Children\n")
+
+            outputs = {}
+            for workers in (1, 2):
+                path = os.path.join(tmpdir, f"results{workers}.jsonl")
+                summary = run_bulk(requests, path, catalog_path=catalog, workers=workers, offline=True)
+                self.assertEqual(summary["queries"], 18)
+                with open(path, encoding="utf-8") as f:
+                    outputs[workers] = [json.loads(line) for line in f]
+
+            for single, pooled in zip(outputs[1], outputs[2]):
+                self.assertEqual((single["id"], single["results"], single["error"]),
+                                 (pooled["id"], pooled["results"], pooled["error"]))
+            self.assertEqual([row["id"] for row in outputs[2]], [f"q{i}" for i in range(18)])
+            self.assertTrue(any(row["error"] for row in outputs[2]))
+        print("Bulk matching test passed")
+
+    def test_bad_rows_are_reported_without_aborting_the_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            catalog = os.path.join(tmpdir, "catalog.pkl")
+            make_catalog(100).to_pickle(catalog)
+            requests = os.path.join(tmpdir, "queries.jsonl")
+            with open(requests, "w", encoding="utf-8") as f:
+                f.write('{"id": "ok1", "query": "Yoga", "budget": 100, "gender": "female"}\n')
+                f.write('{"id": "none", "query": null, "gender": "female"}\n')
+                f.write('{"id": "budget", "query": "Kochen", "budget": "cheap", "gender": "female"}\n')
+                f.write('not json\n')
+                f.write('{"id": "ok2", "query": "Computer", "budget": 80, "gender": "male"}\n')
+
+            for workers in (1, 2):
+                path = os.path.join(tmpdir, f"results{workers}.jsonl")
+                summary = run_bulk(requests, path, catalog_path=catalog, workers=workers, offline=True)
+                self.assertEqual((summary["queries"], summary["errors"]), (5, 3))
+                with open(path, encoding="utf-8") as f:
+                    rows = [json.loads(line) for line in f]
+                self.assertEqual([row["id"] for row in rows], ["ok1", "none", "budget", 4, "ok2"])
+                self.assertEqual([row["error"] is None for row in rows], [True, False, False, False, True])
+                self.assertIn("cheap", rows[2]["error"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)